@@ -0,0 +1,135 @@
+"""
+Замер времени холодного запуска модулей приложений по ``python -X importtime``.
+
+Каждый модуль импортируется в новом процессе интерпретатора; из отчета importtime
+берется суммарное время импорта модуля и самые тяжелые импорты верхнего уровня,
+а сам процесс сообщает пиковый объем резидентной памяти (где это доступно).
+Результаты пишутся в JSON; при сравнении с сохраненным ранее файлом программа
+завершается с кодом 1, если время запуска какого-либо модуля выросло больше порога.
+
+Пример запуска из корня репозитория:
+
+    python -m common.benchmark_startup -o startup.json --baseline old_startup.json --threshold 0.3
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from common.benchmarking import check_baseline, matched_results, write_report
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_MODULES = [
+    "lab2.lab2", "lab2.lab2_true", "lab2.lab222",
+    "lab3.lab3", "lab3.lab33", "lab3.lab333", "lab3.lab3_true",
+    "lab4.lab4",
+    "lab6.lab6", "lab6.lab66", "lab6.lab6_true",
+]
+
+# Пиковая резидентная память процесса в КиБ (ru_maxrss в Linux), -1 там, где resource недоступен
+MEMORY_CODE = ("try:\n    import resource\n    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+               "except ImportError:\n    print(-1)\n")
+
+
+def parse_importtime(report):
+    """
+    Разбирает вывод ``-X importtime``.
+
+    :param report: текст из stderr интерпретатора
+    :return: список (имя модуля, собственное время в мкс, суммарное время в мкс, уровень вложенности;
+             0 - импорт верхнего уровня)
+    """
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|", 2)
+        # Имя отделено одним пробелом, каждый уровень вложенности добавляет еще два
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_time), int(cumulative), level))
+    return entries
+
+
+def profile_import(module, top=5):
+    """
+    Импортирует модуль в новом процессе и собирает статистику запуска.
+
+    :param module: имя модуля
+    :param top: число самых тяжелых прямых импортов модуля в отчете
+    :return: словарь с результатами; при ошибке импорта - с полем error
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}\n" + MEMORY_CODE],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+
+    entries = parse_importtime(result.stderr)
+    total = next(cumulative for name, _, cumulative, level in reversed(entries) if name == module and level == 0)
+    # Импорты, выполненные непосредственно модулем приложения и его пакетом
+    heaviest = sorted((entry for entry in entries if entry[3] == 1), key=lambda entry: -entry[2])
+    return {
+        "module": module,
+        "import_ms": total / 1e3,
+        "max_rss_kib": int(result.stdout.split()[-1]),
+        "heaviest": [{"module": name, "cumulative_ms": cumulative / 1e3}
+                     for name, _, cumulative, _ in heaviest if name != module][:top],
+    }
+
+
+def run_benchmarks(modules, repeats=3):
+    """
+    Замеряет запуск каждого модуля; время - минимум по повторам.
+
+    :param modules: имена модулей
+    :param repeats: число запусков каждого модуля
+    :return: список словарей с результатами
+    """
+    results = []
+    for module in modules:
+        runs = [profile_import(module) for _ in range(repeats)]
+        if "error" in runs[0]:
+            results.append(runs[0])
+            print(f"{module:>16}: ошибка импорта - {runs[0]['error']}")
+            continue
+        best = min(runs, key=lambda run: run["import_ms"])
+        results.append(best)
+        heaviest = ", ".join(f"{item['module']} {item['cumulative_ms']:.0f}" for item in best["heaviest"][:3])
+        print(f"{module:>16}: {best['import_ms']:9.1f} мс, {best['max_rss_kib'] / 1024:7.1f} МиБ  ({heaviest})")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Сравнивает время запуска с сохраненным ранее.
+
+    :param results: текущие результаты
+    :param baseline: результаты из файла истории
+    :param threshold: допустимая относительная деградация (0.3 - на 30%)
+    :return: список строк с описанием регрессий
+    """
+    regressions = []
+    for item, old in matched_results(results, baseline, lambda item: item["module"]):
+        if item["import_ms"] > old["import_ms"] * (1 + threshold):
+            regressions.append(f'{item["module"]}: время запуска {old["import_ms"]:.1f} -> {item["import_ms"]:.1f} мс')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер времени холодного запуска модулей приложений")
+    parser.add_argument("modules", nargs="*", default=APP_MODULES, help="имена модулей (по умолчанию все приложения)")
+    parser.add_argument("--repeats", type=int, default=3, help="число запусков каждого модуля")
+    parser.add_argument("-o", "--output", default="benchmark_startup.json", help="файл для сохранения результатов")
+    parser.add_argument("--baseline", default=None, help="файл с прошлыми результатами для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.3, help="допустимая относительная деградация")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.modules, args.repeats)
+    write_report(args.output, results)
+    if args.baseline:
+        return check_baseline(args.baseline, results, compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
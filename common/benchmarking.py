@@ -0,0 +1,69 @@
+"""
+Общие части программ замера производительности: сохранение результатов в JSON
+и сравнение с сохраненными ранее результатами (файлом истории).
+
+Файл результатов - словарь {"meta": сведения об окружении, "results": список замеров}.
+Правило сравнения отдельного замера задает сама программа замера.
+"""
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+
+def write_report(path, results, **meta):
+    """
+    Сохраняет результаты вместе со сведениями об окружении.
+
+    :param path: путь к файлу JSON
+    :param results: список замеров (словарей)
+    :param meta: дополнительные сведения об окружении (например, версии библиотек)
+    """
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            **meta,
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты сохранены: {path}")
+
+
+def matched_results(results, baseline, key):
+    """
+    Пары (текущий замер, прошлый замер) с одинаковым ключом; замеры с ошибкой пропускаются.
+
+    :param results: текущие результаты
+    :param baseline: результаты из файла истории
+    :param key: функция, возвращающая ключ замера
+    """
+    previous = {key(item): item for item in baseline if "error" not in item}
+    for item in results:
+        old = previous.get(key(item))
+        if old is not None and "error" not in item:
+            yield item, old
+
+
+def check_baseline(path, results, compare, threshold):
+    """
+    Сравнивает результаты с файлом истории и печатает регрессии.
+
+    :param path: путь к файлу JSON с прошлыми результатами
+    :param results: текущие результаты
+    :param compare: функция (результаты, прошлые результаты, порог) -> список строк с описанием регрессий
+    :param threshold: допустимая относительная деградация
+    :return: код завершения программы: 1, если есть регрессии, иначе 0
+    """
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, threshold)
+    for line in regressions:
+        print(f"Регрессия: {line}")
+    if regressions:
+        return 1
+    print("Регрессий не обнаружено.")
+    return 0
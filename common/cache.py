@@ -0,0 +1,154 @@
+"""
+Дисковый кэш результатов обработки файлов.
+
+Ключ записи - хэш содержимого исходного файла, имя вычисления и его параметры,
+поэтому измененный файл или другие параметры дают новый ключ, а неизменные
+файлы обрабатываются повторно без вычислений. Чтобы после изменения кода
+вычисления не возвращались старые результаты, вызывающий код включает в параметры
+номер версии вычисления и увеличивает его при изменении алгоритма. Каждая запись - каталог с
+файлами .npy (по одному на массив), которые читаются с отображением в память.
+Суммарный размер кэша ограничен: при превышении удаляются записи, к которым
+дольше всего не обращались (LRU по времени изменения каталога записи).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "npi_signal_processing")
+DEFAULT_MAX_BYTES = 1 << 30
+HASH_CHUNK_SIZE = 1 << 20
+# Версия формата записей и ключей; при изменении все прежние записи перестают находиться
+CACHE_FORMAT_VERSION = 1
+
+# Хэши файлов в пределах процесса: (путь, размер, время изменения) -> хэш
+_digests = {}
+
+
+def file_digest(path):
+    """
+    Хэш содержимого файла (BLAKE2b); повторный вызов для неизмененного файла не читает его.
+
+    :param path: путь к файлу
+    :return: шестнадцатеричная строка
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _digests:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        _digests[key] = digest.hexdigest()
+    return _digests[key]
+
+
+class ArrayCache:
+    """
+    Кэш наборов именованных массивов numpy с ограничением размера.
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param directory: каталог кэша
+        :param max_bytes: максимальный суммарный размер записей в байтах
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, path, name, params):
+        """
+        Ключ записи для результата вычисления над файлом.
+
+        :param path: путь к исходному файлу
+        :param name: имя вычисления
+        :param params: словарь параметров (сериализуемый в JSON), включая версию вычисления
+        :return: строка ключа
+        """
+        description = json.dumps([CACHE_FORMAT_VERSION, file_digest(path), name, params], sort_keys=True,
+                                 default=str)
+        return hashlib.blake2b(description.encode(), digest_size=20).hexdigest()
+
+    def get(self, key):
+        """
+        Читает запись.
+
+        :param key: ключ записи
+        :return: словарь {имя: массив, отображенный в память} или None, если записи нет
+                 (каталог записи без массивов тоже считается отсутствующей записью)
+        """
+        entry = os.path.join(self.directory, key)
+        try:
+            names = [name for name in os.listdir(entry) if name.endswith(".npy")]
+            if not names:
+                return None
+            arrays = {name[:-4]: np.load(os.path.join(entry, name), mmap_mode="r") for name in names}
+            os.utime(entry)  # отметка последнего обращения для LRU
+        except (FileNotFoundError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key, arrays):
+        """
+        Сохраняет запись и при необходимости вытесняет старые.
+
+        :param key: ключ записи
+        :param arrays: словарь {имя: массив}
+        """
+        # Запись собирается во временном каталоге и переименовывается целиком,
+        # поэтому прерванная запись не оставляет неполных данных
+        staging = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, name + ".npy"), np.asarray(array))
+        entry = os.path.join(self.directory, key)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+        self.evict()
+
+    def get_or_compute(self, path, name, params, compute):
+        """
+        Возвращает результат из кэша или вычисляет и сохраняет его.
+
+        :param path: путь к исходному файлу
+        :param name: имя вычисления
+        :param params: словарь параметров вычисления, включая версию вычисления
+        :param compute: функция без аргументов, возвращающая словарь {имя: массив}
+        :return: словарь {имя: массив}
+        """
+        key = self.key(path, name, params)
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, arrays)
+        return arrays
+
+    def entries(self):
+        """
+        Записи кэша от давно использованных к недавним.
+
+        :return: список (время последнего обращения, размер в байтах, путь)
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            with os.scandir(entry) as files:
+                size = sum(item.stat().st_size for item in files)
+            entries.append((os.stat(entry).st_mtime_ns, size, entry))
+        return sorted(entries)
+
+    def evict(self):
+        """
+        Удаляет давно использованные записи, пока размер кэша больше max_bytes.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,45 @@
+"""
+Отложенный импорт тяжелых зависимостей (scipy, matplotlib, OpenCV, scikit-image).
+
+``lazy_import`` сразу возвращает объект-заместитель, а настоящий импорт модуля
+выполняется при первом обращении к его атрибуту. Поэтому окно приложения
+открывается и функции обработки импортируются без ожидания загрузки библиотек,
+которые в этом запуске могут и не понадобиться.
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Заместитель модуля, импортирующий его при первом обращении к атрибуту.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """
+    Возвращает модуль, если он уже импортирован, иначе - заместитель с отложенным импортом.
+
+    :param name: полное имя модуля, например "scipy.signal"
+    :return: модуль или LazyModule
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
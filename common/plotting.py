@@ -0,0 +1,107 @@
+"""
+Отображение длинных сигналов с уровнем детализации по ширине графика.
+
+Для сигнала заранее строится пирамида огибающих: на каждом уровне хранятся минимум
+и максимум по блокам все большего размера. При отрисовке и при каждом изменении
+границ оси X выбирается уровень, дающий не больше точек, чем пикселей в ширине оси,
+поэтому в matplotlib передаются тысячи точек вместо миллионов отсчетов.
+"""
+import numpy as np
+
+# Уровни пирамиды строятся до тех пор, пока блоков больше этого числа
+MIN_LEVEL_SIZE = 256
+
+
+class EnvelopePyramid:
+    """
+    Пирамида огибающих (минимум/максимум по блокам) одномерного сигнала.
+    """
+    def __init__(self, signal, factor=4):
+        """
+        :param signal: одномерный сигнал
+        :param factor: во сколько раз растет размер блока на каждом следующем уровне
+        """
+        self.signal = signal
+        self.factor = factor
+        self.levels = []  # список (размер блока, минимумы, максимумы)
+
+        mins = maxs = signal
+        block = 1
+        while len(mins) > MIN_LEVEL_SIZE:
+            starts = np.arange(0, len(mins), factor)
+            mins = np.minimum.reduceat(mins, starts)
+            maxs = np.maximum.reduceat(maxs, starts)
+            block *= factor
+            self.levels.append((block, mins, maxs))
+
+    def query(self, start, stop, max_points):
+        """
+        Возвращает точки для отрисовки отрезка сигнала [start, stop).
+
+        :param start: индекс первого отсчета
+        :param stop: индекс после последнего отсчета
+        :param max_points: максимальное число точек (обычно ширина оси в пикселях)
+        :return: индексы отсчетов и значения; на огрубленных уровнях для каждого
+                 блока возвращаются две точки - минимум и максимум
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), len(self.signal))
+        if stop <= start:
+            return np.empty(0), np.empty(0, dtype=self.signal.dtype)
+        if stop - start <= max_points or not self.levels:
+            return np.arange(start, stop), self.signal[start:stop]
+
+        for block, mins, maxs in self.levels:
+            if (stop - start) / block * 2 <= max_points:
+                break
+        first, last = start // block, -(-stop // block)
+        x = np.repeat(np.arange(first, last) * block, 2)
+        y = np.column_stack((mins[first:last], maxs[first:last])).ravel()
+        return x, y
+
+
+class EnvelopeLine:
+    """
+    Линия на осях matplotlib, которая перестраивается из пирамиды
+    при масштабировании и прокрутке.
+    """
+    def __init__(self, ax, signal, fs=None, **kwargs):
+        """
+        :param ax: оси matplotlib
+        :param signal: одномерный сигнал
+        :param fs: частота дискретизации; если задана, ось X - время в секундах, иначе номер отсчета
+        :param kwargs: параметры линии matplotlib
+        """
+        self.ax = ax
+        self.pyramid = EnvelopePyramid(signal)
+        self.dt = 1.0 / fs if fs else 1.0
+        x, y = self.pyramid.query(0, len(signal), self._max_points())
+        self.line, = ax.plot(x * self.dt, y, **kwargs)
+        # Ссылка из линии удерживает объект: matplotlib хранит обработчики по слабым ссылкам
+        self.line.envelope = self
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def _max_points(self):
+        return max(int(self.ax.bbox.width), 100)
+
+    def _on_xlim_changed(self, ax):
+        x_min, x_max = ax.get_xlim()
+        x, y = self.pyramid.query(np.floor(x_min / self.dt), np.ceil(x_max / self.dt) + 1, self._max_points())
+        self.line.set_data(x * self.dt, y)
+        ax.figure.canvas.draw_idle()
+
+
+def plot_signal(ax, signal, fs=None, **kwargs):
+    """
+    Рисует сигнал с огибающей по уровню детализации; каждый канал - отдельная линия.
+
+    :param ax: оси matplotlib
+    :param signal: сигнал формы (N,) или (N, каналы)
+    :param fs: частота дискретизации; если задана, ось X - время в секундах, иначе номер отсчета
+    :param kwargs: параметры линии matplotlib
+    :return: список объектов EnvelopeLine
+    """
+    signal = np.asarray(signal)
+    if signal.ndim == 1:
+        return [EnvelopeLine(ax, signal, fs, **kwargs)]
+    return [EnvelopeLine(ax, signal[:, channel], fs, **kwargs) for channel in range(signal.shape[1])]
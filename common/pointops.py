@@ -0,0 +1,349 @@
+"""
+Поточечные преобразования изображений через таблицы подстановки (LUT).
+
+Результат поточечного преобразования зависит только от значения пикселя (и, для
+части формул, от максимума изображения), поэтому формулу достаточно вычислить
+один раз для всех 256 уровней (65536 для 16-битных изображений) и затем
+применить получившуюся таблицу одним проходом по изображению. Таблицы кэшируются
+по имени преобразования, параметрам и типу пикселей.
+
+Формулы здесь повторяют вычисления из лабораторных 4 и 6 буквально, с теми же
+типами промежуточных значений, поэтому таблица дает тот же результат, что и
+вычисление формулы по всему изображению.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from common.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Строки изображения обрабатываются полосами примерно такого размера, чтобы полоса оставалась в кэше процессора
+PIPELINE_BLOCK_BYTES = 1 << 18
+
+# Имя преобразования -> (формула от массива уровней, нужен ли максимум изображения)
+POINT_TRANSFORMS = {}
+
+
+def point_transform(name, needs_peak=False):
+    """
+    Регистрирует формулу поточечного преобразования.
+
+    :param name: имя преобразования
+    :param needs_peak: формула зависит от максимума изображения (параметр peak)
+    """
+    def register(formula):
+        POINT_TRANSFORMS[name] = (formula, needs_peak)
+        return formula
+    return register
+
+
+@point_transform("log", needs_peak=True)
+def log_formula(levels, peak):
+    # Лабораторная 4: логарифмическое преобразование
+    c = 255 / np.log(1 + peak)
+    image_log = np.where(levels == 0, 1, levels)
+    return (c * (np.log(1 + image_log))).astype(np.uint8)
+
+
+@point_transform("power")
+def power_formula(levels, gamma):
+    # Лабораторная 4: степенное преобразование
+    return np.array(255 * (levels / 255) ** gamma, dtype=np.uint8)
+
+
+@point_transform("threshold")
+def threshold_formula(levels, thresh=127, maxval=255):
+    # Как cv2.threshold с THRESH_BINARY: выше порога - maxval, иначе 0
+    return np.where(levels > thresh, maxval, 0).astype(levels.dtype)
+
+
+@point_transform("negative")
+def negative_formula(levels):
+    return np.invert(levels)
+
+
+@point_transform("exponential", needs_peak=True)
+def exponential_formula(levels, peak):
+    # Лабораторная 6: максимум преобразованного изображения - значение формулы в максимуме исходного
+    img = levels / 255.0
+    img = np.exp(img) - 1
+    return np.clip(img * 255.0 / img[peak], 0, 255).astype(np.uint8)
+
+
+@point_transform("rayleigh", needs_peak=True)
+def rayleigh_formula(levels, peak):
+    img = levels / 255.0
+    img = img ** 2
+    return np.clip(img * 255.0 / img[peak], 0, 255).astype(np.uint8)
+
+
+@point_transform("hyperbolic", needs_peak=True)
+def hyperbolic_formula(levels, peak):
+    img = levels / 255.0
+    img = np.tanh(img)
+    return np.clip(img * 255.0 / img[peak], 0, 255).astype(np.uint8)
+
+
+@point_transform("gamma")
+def gamma_formula(levels, gamma):
+    inv_gamma = 1.0 / gamma
+    return np.array([((i / 255.0) ** inv_gamma) * 255 for i in levels]).astype(np.uint8)
+
+
+@point_transform("scale_abs")
+def scale_abs_formula(levels, alpha=1.0, beta=0.0):
+    return cv2.convertScaleAbs(levels, alpha=alpha, beta=beta).reshape(levels.shape)
+
+
+@point_transform("power_clip")
+def power_clip_formula(levels, gamma):
+    # Лабораторная 6 (вариант ImageProcessorApp): степенные кривые контраста
+    return np.uint8(255 * (levels / 255) ** gamma)
+
+
+@point_transform("tanh_contrast")
+def tanh_contrast_formula(levels):
+    return np.uint8(255 * (np.tanh(levels / 255) * (2 - np.tanh(levels / 255))))
+
+
+@lru_cache(maxsize=256)
+def compile_lut(name, dtype="uint8", **params):
+    """
+    Вычисляет таблицу подстановки для преобразования.
+
+    :param name: имя преобразования из POINT_TRANSFORMS
+    :param dtype: тип пикселей входного изображения (uint8 или uint16)
+    :param params: параметры формулы; для формул, зависящих от максимума, - peak
+    :return: таблица только для чтения длины 256 или 65536
+    """
+    formula, needs_peak = POINT_TRANSFORMS[name]
+    dtype = np.dtype(dtype)
+    if dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"Таблица подстановки строится только для uint8 и uint16, а не {dtype}")
+    levels = np.arange(np.iinfo(dtype).max + 1, dtype=dtype)
+    if needs_peak:
+        # Максимум передается скаляром того же типа, что и пиксели, как при вычислении по изображению
+        params["peak"] = dtype.type(params["peak"])
+    table = np.ascontiguousarray(formula(levels, **params))
+    table.flags.writeable = False
+    return table
+
+
+def apply_lut(image, table, out=None):
+    """
+    Применяет таблицу подстановки к изображению за один проход.
+
+    :param image: изображение uint8 или uint16 (любое число каналов)
+    :param table: таблица длины 2 ** (бит на пиксель)
+    :param out: массив для результата (может совпадать с image, если типы равны)
+    :return: преобразованное изображение
+    """
+    if image.dtype == np.uint8 and table.dtype == np.uint8 and image.ndim <= 3:
+        result = cv2.LUT(image, table, dst=out)
+        return result if out is None else out
+    return np.take(table, image, out=out)
+
+
+def transform_image(image, name, inplace=False, **params):
+    """
+    Применяет зарегистрированное поточечное преобразование через кэшированную таблицу.
+
+    :param image: изображение uint8 или uint16
+    :param name: имя преобразования
+    :param inplace: записать результат в само изображение (если тип результата совпадает)
+    :param params: параметры формулы (максимум изображения вычисляется автоматически)
+    :return: преобразованное изображение
+    """
+    _, needs_peak = POINT_TRANSFORMS[name]
+    if needs_peak:
+        params["peak"] = int(np.max(image))
+    table = compile_lut(name, image.dtype.str.lstrip("<>|="), **params)
+    out = image if inplace and table.dtype == image.dtype else None
+    return apply_lut(image, table, out)
+
+
+def equalize_lut(histogram):
+    """
+    Таблица выравнивания гистограммы, совпадающая с cv2.equalizeHist (те же вычисления во float32).
+
+    :param histogram: гистограмма 256 уровней изображения uint8
+    :return: таблица uint8
+    """
+    histogram = np.asarray(histogram, dtype=np.int64)
+    total = int(histogram.sum())
+    first = int(np.flatnonzero(histogram)[0])
+    if histogram[first] == total:
+        return np.full(256, first, dtype=np.uint8)
+    scale = np.float32(255) / np.float32(total - histogram[first])
+    cumulative = np.cumsum(histogram) - histogram[first]
+    table = np.rint(cumulative.astype(np.float32) * scale)
+    table[:first] = 0
+    return np.clip(table, 0, 255).astype(np.uint8)
+
+
+class PointPipeline:
+    """
+    Цепочка поточечных операций, выполняемая как одна операция.
+
+    Последовательные таблицы подстановки сворачиваются в одну, а перевод в полутоновое
+    изображение и таблица применяются полосами строк, пока полоса в кэше: изображение
+    читается и результат записывается один раз, без промежуточных изображений.
+    Если преобразование в цепочке зависит от максимума (логарифмическое, контрастные
+    кривые), максимум промежуточного изображения берется из гистограммы входа.
+    """
+    def __init__(self, steps=()):
+        """
+        :param steps: начальные шаги - пары (имя преобразования, словарь параметров);
+                      имя "gray" - перевод в полутоновое с параметром weights
+        """
+        self.steps = [(name, dict(params)) for name, params in steps]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def then(self, name, **params):
+        """
+        Добавляет зарегистрированное поточечное преобразование.
+
+        :param name: имя преобразования из POINT_TRANSFORMS
+        :param params: параметры формулы
+        :return: сам конвейер (для цепочек вызовов)
+        """
+        if name not in POINT_TRANSFORMS:
+            raise ValueError(f"Неизвестное поточечное преобразование: {name}")
+        self.steps.append((name, params))
+        return self
+
+    def gray(self, weights=None):
+        """
+        Добавляет перевод цветного изображения BGR в полутоновое (только первым шагом).
+
+        :param weights: веса каналов (B, G, R); None - веса cv2.COLOR_BGR2GRAY
+        :return: сам конвейер
+        """
+        if self.steps:
+            raise ValueError("Перевод в полутоновое должен быть первым шагом конвейера")
+        self.steps.append(("gray", {"weights": weights}))
+        return self
+
+    def threshold(self, thresh=127, maxval=255):
+        """
+        Добавляет бинаризацию по порогу (как cv2.threshold с THRESH_BINARY).
+        """
+        return self.then("threshold", thresh=thresh, maxval=maxval)
+
+    def negative(self):
+        """
+        Добавляет негатив.
+        """
+        return self.then("negative")
+
+    def _source_stage(self, image):
+        """
+        Функция перевода полосы строк в полутоновое (или None, если перевод не нужен).
+        """
+        if not self.steps or self.steps[0][0] != "gray" or image.ndim == 2:
+            return None
+        weights = self.steps[0][1]["weights"]
+        if weights is None:
+            return lambda block, dst: cv2.cvtColor(block, cv2.COLOR_BGR2GRAY, dst=dst)
+        matrix = np.asarray(weights, dtype=np.float32).reshape(1, -1)
+        return lambda block, dst: cv2.transform(block, matrix, dst=dst)
+
+    def compile(self, dtype="uint8", histogram=None):
+        """
+        Сворачивает таблицы подстановки цепочки в одну.
+
+        :param dtype: тип пикселей на входе таблиц (после перевода в полутоновое)
+        :param histogram: гистограмма входа таблиц (нужна, если шаг зависит от максимума)
+        :return: итоговая таблица или None, если в цепочке нет таблиц
+        """
+        dtype = np.dtype(dtype)
+        composite = None
+        for name, params in self.steps:
+            if name == "gray":
+                continue
+            if composite is None:
+                composite = np.arange(np.iinfo(dtype).max + 1, dtype=dtype)
+            params = dict(params)
+            if POINT_TRANSFORMS[name][1]:
+                if histogram is None:
+                    raise ValueError(f"Для шага {name} нужна гистограмма входного изображения")
+                # Максимум промежуточного изображения - максимум таблицы по встречающимся уровням
+                params["peak"] = int(composite[np.flatnonzero(histogram)].max())
+            table = compile_lut(name, composite.dtype.str.lstrip("<>|="), **params)
+            composite = table[composite]
+        return composite
+
+    def needs_histogram(self):
+        """
+        Зависит ли результат от гистограммы всего входного изображения (шаги с максимумом).
+        """
+        return any(name != "gray" and POINT_TRANSFORMS[name][1] for name, _ in self.steps)
+
+    def histogram(self, image):
+        """
+        Гистограмма входа таблиц цепочки (после перевода в полутоновое).
+        Гистограммы частей изображения можно складывать и передавать в __call__.
+
+        :param image: изображение или его часть
+        :return: массив длины 256 или 65536
+        """
+        convert = self._source_stage(image)
+        if convert is not None:
+            gray = np.empty(image.shape[:2], dtype=image.dtype)
+            _apply_by_rows(convert, image, gray)
+            image = gray
+        return np.bincount(image.ravel(), minlength=np.iinfo(image.dtype).max + 1)
+
+    def __call__(self, image, out=None, histogram=None):
+        """
+        Выполняет цепочку над изображением.
+
+        :param image: изображение uint8 или uint16 (полутоновое или BGR)
+        :param out: массив для результата подходящей формы и типа (можно переиспользовать между вызовами)
+        :param histogram: гистограмма всего изображения, если image - его часть (см. histogram)
+        :return: результат цепочки
+        """
+        convert = self._source_stage(image)
+        if histogram is None and self.needs_histogram():
+            # Гистограмму можно получить только после перевода в полутоновое - здесь два прохода
+            if convert is not None:
+                gray = np.empty(image.shape[:2], dtype=image.dtype)
+                _apply_by_rows(convert, image, gray)
+                image, convert = gray, None
+            histogram = np.bincount(image.ravel(), minlength=np.iinfo(image.dtype).max + 1)
+        table = self.compile(image.dtype, histogram)
+
+        shape = image.shape[:2] if convert is not None else image.shape
+        dtype = image.dtype if table is None else table.dtype
+        if out is None or out.shape != shape or out.dtype != dtype:
+            out = np.empty(shape, dtype=dtype)
+
+        if convert is None and table is None:
+            out[...] = image
+        elif convert is None:
+            _apply_by_rows(lambda block, dst: apply_lut(block, table, dst), image, out)
+        elif table is None:
+            _apply_by_rows(convert, image, out)
+        else:
+            def convert_and_apply(block, dst):
+                # Полутоновая полоса пишется прямо в результат и там же проходит через таблицу
+                gray = convert(block, dst if dst.dtype == block.dtype else None)
+                return apply_lut(gray.reshape(dst.shape), table, dst)
+            _apply_by_rows(convert_and_apply, image, out)
+        return out
+
+
+def _apply_by_rows(operation, image, out):
+    """
+    Выполняет операцию над полосами строк изображения, записывая результат в соответствующие полосы out.
+    """
+    rows = max(PIPELINE_BLOCK_BYTES // max(image[:1].nbytes, 1), 1)
+    for start in range(0, image.shape[0], rows):
+        dst = out[start:start + rows]
+        result = operation(image[start:start + rows], dst)
+        if result is not None and result is not dst and not np.shares_memory(result, dst):
+            dst[...] = result.reshape(dst.shape)
@@ -0,0 +1,248 @@
+"""
+Просмотр больших изображений в Tk: пирамида уменьшенных копий и отрисовка только видимой области.
+
+PreviewPyramid хранит исходное изображение и по запросу строит уменьшенные вдвое
+уровни (каждый уровень строится один раз). ImageViewer выбирает уровень, близкий к
+разрешению экрана, вырезает из него видимую область и переводит в PhotoImage только
+ее, поэтому перерисовка не зависит от размера исходного изображения. Масштаб меняется
+колесом мыши, изображение перетаскивается левой кнопкой, двойной щелчок - вписать в окно.
+
+Приложения обрабатывают для показа уровень пирамиды размером с экран (``fit``),
+а изображение в полном разрешении вычисляют только при сохранении.
+"""
+import math
+import tkinter as tk
+
+import numpy as np
+
+from common.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+Image = lazy_import("PIL.Image")
+ImageTk = lazy_import("PIL.ImageTk")
+
+ZOOM_STEP = 1.25
+MAX_ZOOM = 8.0
+
+
+class PreviewPyramid:
+    """
+    Пирамида изображения: уровень 0 - исходное, каждый следующий вдвое меньше (INTER_AREA).
+    """
+    def __init__(self, image):
+        self.levels = [image]
+
+    @property
+    def shape(self):
+        return self.levels[0].shape
+
+    def level(self, index):
+        """
+        Уровень пирамиды (строится при первом обращении).
+
+        :param index: номер уровня; больше последнего возможного - последний (1 пиксель по меньшей стороне)
+        :return: изображение уровня
+        """
+        while len(self.levels) <= index:
+            previous = self.levels[-1]
+            height, width = previous.shape[:2]
+            if min(height, width) == 1:
+                break
+            self.levels.append(cv2.resize(previous, (width // 2, height // 2), interpolation=cv2.INTER_AREA))
+        return self.levels[min(index, len(self.levels) - 1)]
+
+    def level_index(self, scale):
+        """
+        Номер самого мелкого уровня, разрешение которого не меньше нужного для масштаба.
+
+        :param scale: пикселей экрана на пиксель исходного изображения
+        """
+        if scale >= 0.5:
+            return 0
+        return int(math.floor(-math.log2(scale)))
+
+    def fit(self, width, height):
+        """
+        Самый мелкий уровень, который еще не меньше прямоугольника width x height по вписыванию.
+
+        :param width: ширина области (например, экрана)
+        :param height: высота области
+        :return: изображение уровня
+        """
+        full_height, full_width = self.shape[:2]
+        return self.level(self.level_index(min(width / full_width, height / full_height)))
+
+    def region(self, scale, x0, y0, x1, y1):
+        """
+        Вырезает прямоугольник исходного изображения из уровня, подходящего для масштаба.
+
+        :param scale: пикселей экрана на пиксель исходного изображения
+        :param x0, y0, x1, y1: границы прямоугольника в координатах исходного изображения
+        :return: (фрагмент уровня, фактические границы фрагмента в координатах исходного изображения)
+        """
+        level = self.level(self.level_index(scale))
+        full_height, full_width = self.shape[:2]
+        fx, fy = full_width / level.shape[1], full_height / level.shape[0]
+        lx0, ly0 = int(math.floor(x0 / fx)), int(math.floor(y0 / fy))
+        lx1 = min(int(math.ceil(x1 / fx)), level.shape[1])
+        ly1 = min(int(math.ceil(y1 / fy)), level.shape[0])
+        return level[ly0:ly1, lx0:lx1], (lx0 * fx, ly0 * fy, lx1 * fx, ly1 * fy)
+
+
+class ImageViewer:
+    """
+    Область просмотра изображения на Canvas с масштабированием и перетаскиванием.
+    """
+    def __init__(self, parent, width=800, height=600):
+        """
+        :param parent: родительский виджет
+        :param width: начальная ширина области
+        :param height: начальная высота области
+        """
+        self.canvas = tk.Canvas(parent, width=width, height=height, highlightthickness=0)
+        self.pyramid = None
+        self.scale = 1.0
+        self.center = (0.0, 0.0)
+        self._photo = None
+        self._drag = None
+
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.canvas.bind("<MouseWheel>", lambda event: self.zoom(ZOOM_STEP if event.delta > 0 else 1 / ZOOM_STEP,
+                                                                 event.x, event.y))
+        self.canvas.bind("<Button-4>", lambda event: self.zoom(ZOOM_STEP, event.x, event.y))
+        self.canvas.bind("<Button-5>", lambda event: self.zoom(1 / ZOOM_STEP, event.x, event.y))
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._drag_to)
+        self.canvas.bind("<Double-Button-1>", lambda event: (self.fit(), self.render()))
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def viewport_size(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            # Окно еще не отображено - берется заданный размер
+            width, height = int(self.canvas["width"]), int(self.canvas["height"])
+        return width, height
+
+    def show(self, image, keep_view=False):
+        """
+        Показывает изображение или готовую пирамиду.
+
+        :param image: массив или PreviewPyramid
+        :param keep_view: сохранить относительный масштаб и положение (например, при показе
+                          уменьшенного результата обработки вместо исходного изображения)
+        """
+        pyramid = image if isinstance(image, PreviewPyramid) else PreviewPyramid(image)
+        previous = self.pyramid
+        self.pyramid = pyramid
+        if keep_view and previous is not None:
+            ratio = pyramid.shape[1] / previous.shape[1]
+            self.scale /= ratio
+            self.center = (self.center[0] * ratio, self.center[1] * pyramid.shape[0] / previous.shape[0])
+        else:
+            self.fit()
+        self.render()
+
+    def fit(self):
+        """
+        Вписывает изображение в область просмотра (без увеличения мелких изображений).
+        """
+        if self.pyramid is None:
+            return
+        width, height = self.viewport_size()
+        image_height, image_width = self.pyramid.shape[:2]
+        self.scale = min(width / image_width, height / image_height, 1.0)
+        self.center = (image_width / 2, image_height / 2)
+
+    def zoom(self, factor, x, y):
+        """
+        Меняет масштаб, оставляя на месте точку изображения под курсором.
+
+        :param factor: во сколько раз увеличить
+        :param x, y: положение курсора в области просмотра
+        """
+        if self.pyramid is None:
+            return
+        width, height = self.viewport_size()
+        image_height, image_width = self.pyramid.shape[:2]
+        min_scale = min(width / image_width, height / image_height, 1.0) / 2
+        scale = min(max(self.scale * factor, min_scale), MAX_ZOOM)
+        # Точка изображения под курсором до и после изменения масштаба должна совпадать
+        px = self.center[0] + (x - width / 2) / self.scale
+        py = self.center[1] + (y - height / 2) / self.scale
+        self.center = (px - (x - width / 2) / scale, py - (y - height / 2) / scale)
+        self.scale = scale
+        self.render()
+
+    def _start_drag(self, event):
+        self._drag = (event.x, event.y)
+
+    def _drag_to(self, event):
+        if self._drag is None or self.pyramid is None:
+            return
+        dx, dy = event.x - self._drag[0], event.y - self._drag[1]
+        self._drag = (event.x, event.y)
+        self.center = (self.center[0] - dx / self.scale, self.center[1] - dy / self.scale)
+        self.render()
+
+    def visible_region(self, width, height):
+        """
+        Видимый прямоугольник изображения; центр сдвигается так, чтобы не показывать пустоту за краем.
+
+        :return: (x0, y0, x1, y1) в координатах изображения
+        """
+        image_height, image_width = self.pyramid.shape[:2]
+        half_width, half_height = width / 2 / self.scale, height / 2 / self.scale
+        cx, cy = self.center
+        if half_width * 2 >= image_width:
+            cx = image_width / 2
+        else:
+            cx = min(max(cx, half_width), image_width - half_width)
+        if half_height * 2 >= image_height:
+            cy = image_height / 2
+        else:
+            cy = min(max(cy, half_height), image_height - half_height)
+        self.center = (cx, cy)
+        return (max(cx - half_width, 0), max(cy - half_height, 0),
+                min(cx + half_width, image_width), min(cy + half_height, image_height))
+
+    def render_array(self, width, height):
+        """
+        Изображение видимой области в разрешении экрана (RGB или полутоновое).
+
+        :param width: ширина области просмотра
+        :param height: высота области просмотра
+        :return: (массив, x, y) - где на области просмотра рисовать его левый верхний угол
+        """
+        x0, y0, x1, y1 = self.visible_region(width, height)
+        crop, (cx0, cy0, cx1, cy1) = self.pyramid.region(self.scale, x0, y0, x1, y1)
+        size = (max(int(round((cx1 - cx0) * self.scale)), 1), max(int(round((cy1 - cy0) * self.scale)), 1))
+        interpolation = cv2.INTER_AREA if size[0] < crop.shape[1] else cv2.INTER_NEAREST
+        crop = cv2.resize(np.ascontiguousarray(crop), size, interpolation=interpolation)
+        if crop.ndim == 3 and crop.shape[2] == 3:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        x = int(round(width / 2 + (cx0 - self.center[0]) * self.scale))
+        y = int(round(height / 2 + (cy0 - self.center[1]) * self.scale))
+        return crop, x, y
+
+    def render(self):
+        """
+        Перерисовывает видимую область.
+        """
+        if self.pyramid is None:
+            return
+        width, height = self.viewport_size()
+        array, x, y = self.render_array(width, height)
+        self._photo = ImageTk.PhotoImage(Image.fromarray(array))
+        self.canvas.delete("image")
+        self.canvas.create_image(x, y, anchor="nw", image=self._photo, tags="image")
+
+
+def screen_size(widget):
+    """
+    Размер экрана, на котором находится виджет.
+
+    :return: (ширина, высота)
+    """
+    return widget.winfo_screenwidth(), widget.winfo_screenheight()
@@ -0,0 +1,240 @@
+"""
+Отображение в память несжатых TIFF и «сырых» файлов изображений.
+
+Заголовок TIFF (обычного и BigTIFF) разбирается вручную. Отобразить в память можно
+только несжатое изображение с чередующимися каналами, полосы которого лежат в файле
+подряд, - как раз такие файлы пишет ``create_tiff``. Сырой файл - это пиксели без
+заголовка построчно; форму и тип задает вызывающий код.
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+TiffInfo = namedtuple("TiffInfo", ["shape", "dtype", "data_offset", "photometric"])
+
+TAG_IMAGE_WIDTH = 256
+TAG_IMAGE_LENGTH = 257
+TAG_BITS_PER_SAMPLE = 258
+TAG_COMPRESSION = 259
+TAG_PHOTOMETRIC = 262
+TAG_STRIP_OFFSETS = 273
+TAG_SAMPLES_PER_PIXEL = 277
+TAG_ROWS_PER_STRIP = 278
+TAG_STRIP_BYTE_COUNTS = 279
+TAG_PLANAR_CONFIGURATION = 284
+TAG_EXTRA_SAMPLES = 338
+TAG_TILE_WIDTH = 322
+TAG_SAMPLE_FORMAT = 339
+
+PHOTOMETRIC_MINISBLACK = 1
+PHOTOMETRIC_RGB = 2
+
+# Тип поля TIFF -> (формат struct, размер)
+FIELD_TYPES = {1: ("B", 1), 3: ("H", 2), 4: ("I", 4), 16: ("Q", 8)}
+
+# (SampleFormat, бит на отсчет) -> тип numpy
+SAMPLE_DTYPES = {
+    (1, 8): "u1", (1, 16): "u2", (1, 32): "u4",
+    (2, 8): "i1", (2, 16): "i2", (2, 32): "i4",
+    (3, 32): "f4", (3, 64): "f8",
+}
+
+
+def _read_ifd(f, byteorder, bigtiff):
+    """
+    Читает первый каталог (IFD) файла.
+
+    :return: словарь {тег: кортеж значений}
+    """
+    offset_format, count_format, offset_size = ("Q", "Q", 8) if bigtiff else ("I", "H", 4)
+    f.seek(8 if bigtiff else 4)
+    ifd_offset = struct.unpack(byteorder + offset_format, f.read(offset_size))[0]
+    f.seek(ifd_offset)
+    count = struct.unpack(byteorder + count_format, f.read(struct.calcsize(count_format)))[0]
+    entry_size = 12 + 8 * bigtiff
+    entries = f.read(count * entry_size)
+    if len(entries) < count * entry_size:
+        raise ValueError("Поврежден каталог TIFF")
+
+    tags = {}
+    for index in range(count):
+        entry = entries[index * entry_size:(index + 1) * entry_size]
+        tag, field_type = struct.unpack(byteorder + "HH", entry[:4])
+        if field_type not in FIELD_TYPES:
+            continue
+        number = struct.unpack(byteorder + offset_format, entry[4:4 + offset_size])[0]
+        value_format, value_size = FIELD_TYPES[field_type]
+        data = entry[4 + offset_size:]
+        if number * value_size > offset_size:
+            position = f.tell()
+            f.seek(struct.unpack(byteorder + offset_format, data)[0])
+            data = f.read(number * value_size)
+            f.seek(position)
+        tags[tag] = struct.unpack(byteorder + value_format * number, data[:number * value_size])
+    return tags
+
+
+def read_tiff_info(path):
+    """
+    Разбирает заголовок TIFF и проверяет, что изображение можно отобразить в память.
+
+    :param path: путь к файлу
+    :return: TiffInfo с формой (строки, столбцы[, каналы]), типом отсчета с порядком байт,
+             смещением начала пикселей и фотометрической интерпретацией
+    """
+    with open(path, "rb") as f:
+        header = f.read(4)
+        if header[:2] not in (b"II", b"MM") or len(header) < 4:
+            raise ValueError(f"Файл не является TIFF: {path}")
+        byteorder = "<" if header[:2] == b"II" else ">"
+        version = struct.unpack(byteorder + "H", header[2:])[0]
+        if version not in (42, 43):
+            raise ValueError(f"Файл не является TIFF: {path}")
+        tags = _read_ifd(f, byteorder, version == 43)
+
+    if TAG_TILE_WIDTH in tags:
+        raise ValueError(f"TIFF с плиточной организацией не поддерживается: {path}")
+    if tags.get(TAG_COMPRESSION, (1,))[0] != 1:
+        raise ValueError(f"Сжатый TIFF нельзя отобразить в память: {path}")
+    samples = tags.get(TAG_SAMPLES_PER_PIXEL, (1,))[0]
+    if samples > 1 and tags.get(TAG_PLANAR_CONFIGURATION, (1,))[0] != 1:
+        raise ValueError(f"TIFF с раздельными плоскостями каналов не поддерживается: {path}")
+    bits = tags.get(TAG_BITS_PER_SAMPLE, (1,))
+    sample_format = tags.get(TAG_SAMPLE_FORMAT, (1,))[0]
+    if len(set(bits)) != 1 or (sample_format, bits[0]) not in SAMPLE_DTYPES:
+        raise ValueError(f"Неподдерживаемый тип отсчетов TIFF: {path}")
+    dtype = np.dtype(byteorder + SAMPLE_DTYPES[sample_format, bits[0]])
+
+    height, width = tags[TAG_IMAGE_LENGTH][0], tags[TAG_IMAGE_WIDTH][0]
+    shape = (height, width) if samples == 1 else (height, width, samples)
+    offsets, counts = tags[TAG_STRIP_OFFSETS], tags[TAG_STRIP_BYTE_COUNTS]
+    # Полосы должны идти в файле подряд, тогда все изображение - один непрерывный массив
+    if any(offsets[i] + counts[i] != offsets[i + 1] for i in range(len(offsets) - 1)) \
+            or sum(counts) < dtype.itemsize * int(np.prod(shape)):
+        raise ValueError(f"Полосы TIFF расположены не подряд: {path}")
+    return TiffInfo(shape, dtype, offsets[0], tags.get(TAG_PHOTOMETRIC, (PHOTOMETRIC_MINISBLACK,))[0])
+
+
+def open_tiff(path, mode="r"):
+    """
+    Отображает пиксели TIFF в память.
+
+    :param path: путь к файлу
+    :param mode: "r" - только чтение, "r+" - с изменением файла
+    :return: np.memmap формы (строки, столбцы[, каналы]); каналы в порядке файла (RGB)
+    """
+    info = read_tiff_info(path)
+    return np.memmap(path, dtype=info.dtype, mode=mode, offset=info.data_offset, shape=info.shape)
+
+
+def create_tiff(path, shape, dtype, bigtiff=None):
+    """
+    Создает несжатый TIFF (BigTIFF, если данные больше 4 ГиБ) и отображает его пиксели в память для записи.
+
+    :param path: путь к файлу
+    :param shape: (строки, столбцы) или (строки, столбцы, каналы)
+    :param dtype: тип отсчета (из SAMPLE_DTYPES)
+    :param bigtiff: писать BigTIFF; None - только если иначе не помещается
+    :return: np.memmap, заполненный нулями
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    sample = next((key for key, value in SAMPLE_DTYPES.items() if np.dtype("<" + value) == dtype), None)
+    if sample is None:
+        raise ValueError(f"Тип {dtype} нельзя записать в TIFF")
+    height, width = shape[:2]
+    samples = shape[2] if len(shape) == 3 else 1
+    nbytes = height * width * samples * dtype.itemsize
+    if bigtiff is None:
+        bigtiff = nbytes + 4096 >= 1 << 32
+    # Каналы сверх цветовых (например, альфа) описываются тегом ExtraSamples
+    color_samples = 3 if samples >= 3 else 1
+
+    long_type, offset_format = (16, "Q") if bigtiff else (4, "I")
+    entries = [
+        (TAG_IMAGE_WIDTH, long_type, (width,)),
+        (TAG_IMAGE_LENGTH, long_type, (height,)),
+        (TAG_BITS_PER_SAMPLE, 3, (sample[1],) * samples),
+        (TAG_COMPRESSION, 3, (1,)),
+        (TAG_PHOTOMETRIC, 3, (PHOTOMETRIC_RGB if color_samples == 3 else PHOTOMETRIC_MINISBLACK,)),
+        (TAG_STRIP_OFFSETS, long_type, (0,)),
+        (TAG_SAMPLES_PER_PIXEL, 3, (samples,)),
+        (TAG_ROWS_PER_STRIP, long_type, (height,)),
+        (TAG_STRIP_BYTE_COUNTS, long_type, (nbytes,)),
+        (TAG_PLANAR_CONFIGURATION, 3, (1,)),
+        (TAG_EXTRA_SAMPLES, 3, (0,) * (samples - color_samples)),
+        (TAG_SAMPLE_FORMAT, 3, (sample[0],) * samples),
+    ]
+    entries = [entry for entry in entries if entry[2]]
+    offset_size = 8 if bigtiff else 4
+    header_size = 16 if bigtiff else 8
+    ifd_size = (8 if bigtiff else 2) + len(entries) * (12 + 8 * bigtiff) + offset_size
+    # Значения, не помещающиеся в запись каталога, кладутся сразу после него
+    extra = bytearray()
+    extra_offset = header_size + ifd_size
+    data_offset = (extra_offset + 3 * samples * 2 + 15) // 16 * 16
+
+    ifd = bytearray(struct.pack("<Q" if bigtiff else "<H", len(entries)))
+    for tag, field_type, values in entries:
+        if tag == TAG_STRIP_OFFSETS:
+            values = (data_offset,)
+        value_format, value_size = FIELD_TYPES[field_type]
+        data = struct.pack("<" + value_format * len(values), *values)
+        if len(data) > offset_size:
+            pointer = extra_offset + len(extra)
+            extra += data
+            data = struct.pack("<" + offset_format, pointer)
+        ifd += struct.pack("<HH" + offset_format, tag, field_type, len(values)) + data.ljust(offset_size, b"\0")
+    ifd += bytes(offset_size)  # следующего каталога нет
+
+    if bigtiff:
+        header = b"II" + struct.pack("<HHHQ", 43, 8, 0, header_size)
+    else:
+        header = b"II" + struct.pack("<HI", 42, header_size)
+    with open(path, "wb") as f:
+        f.write(header + ifd + extra)
+        f.truncate(data_offset + nbytes)
+    return np.memmap(path, dtype=dtype, mode="r+", offset=data_offset, shape=tuple(shape))
+
+
+def open_raw(path, shape, dtype, mode="r"):
+    """
+    Отображает в память сырой файл пикселей без заголовка.
+
+    :param path: путь к файлу
+    :param shape: (строки, столбцы) или (строки, столбцы, каналы)
+    :param dtype: тип отсчета
+    :param mode: "r", "r+" или "w+" (создать файл нужного размера)
+    :return: np.memmap
+    """
+    shape = tuple(shape)
+    if mode != "w+":
+        expected = np.dtype(dtype).itemsize * int(np.prod(shape))
+        if os.path.getsize(path) < expected:
+            raise ValueError(f"Размер файла {path} меньше, чем нужно для изображения {shape} {np.dtype(dtype)}")
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+def is_tiff(path):
+    return os.path.splitext(path)[1].lower() in (".tif", ".tiff")
+
+
+def release_rows(array, stop):
+    """
+    Разрешает системе выгрузить из памяти страницы отображения со строками до stop
+    (там, где есть madvise). Данные не теряются: при обращении страницы снова читаются
+    из файла, поэтому для записываемого файла функцию вызывают после flush.
+
+    :param array: np.memmap (строки по первой оси)
+    :param stop: номер строки, до которой страницы больше не нужны
+    """
+    mapping = getattr(array, "_mmap", None)
+    if mapping is None or not hasattr(mapping, "madvise") or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    # np.memmap отображает файл с границы ALLOCATIONGRANULARITY, данные начинаются со сдвигом
+    start = array.offset % mmap.ALLOCATIONGRANULARITY
+    end = (start + stop * array[:1].nbytes) // mmap.PAGESIZE * mmap.PAGESIZE
+    if end > 0:
+        mapping.madvise(mmap.MADV_DONTNEED, 0, end)
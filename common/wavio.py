@@ -0,0 +1,313 @@
+"""
+Чтение и запись WAV файлов: отображение в память и обработка блоками фиксированного размера.
+
+Заголовок RIFF разбирается вручную, поэтому поддерживаются как PCM (8/16/32 бит),
+так и IEEE float (32/64 бит) без загрузки всего файла в память.
+Форма блоков совпадает с ``scipy.io.wavfile.read``: (N,) для моно и (N, каналы) иначе.
+"""
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+WavInfo = namedtuple("WavInfo", ["samplerate", "channels", "dtype", "data_offset", "nframes"])
+
+
+def _sample_dtype(format_tag, bits):
+    """
+    Возвращает тип отсчета numpy для формата WAV.
+
+    :param format_tag: код формата из чанка fmt
+    :param bits: число бит на отсчет
+    :return: np.dtype с явным порядком байт (little-endian)
+    """
+    if format_tag == WAVE_FORMAT_PCM and bits in (8, 16, 32):
+        return np.dtype({8: "u1", 16: "<i2", 32: "<i4"}[bits])
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        return np.dtype({32: "<f4", 64: "<f8"}[bits])
+    raise ValueError(f"Неподдерживаемый формат WAV: код {format_tag}, {bits} бит")
+
+
+def read_wav_info(path):
+    """
+    Разбирает заголовок WAV файла, не читая данные.
+
+    :param path: путь к WAV файлу
+    :return: WavInfo с частотой дискретизации, числом каналов, типом отсчета,
+             смещением начала данных и числом кадров
+    """
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WAVE":
+            raise ValueError(f"Файл не является WAV: {path}")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"В файле нет чанка data: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size)
+                if len(body) < 16:
+                    raise ValueError(f"Поврежден чанк fmt: {path}")
+                format_tag, channels, samplerate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                    # Настоящий код формата - в начале GUID подформата после cbSize, validBits и маски каналов
+                    if len(body) < 26:
+                        raise ValueError(f"Поврежден чанк fmt: {path}")
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, samplerate, bits)
+                f.seek(size & 1, 1)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"Чанк data встречен раньше fmt: {path}")
+                format_tag, channels, samplerate, bits = fmt
+                dtype = _sample_dtype(format_tag, bits)
+                nframes = size // (dtype.itemsize * channels)
+                return WavInfo(samplerate, channels, dtype, f.tell(), nframes)
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+def open_wav_memmap(path):
+    """
+    Отображает данные WAV файла в память без копирования.
+
+    :param path: путь к WAV файлу
+    :return: частота дискретизации и массив только для чтения в исходном типе отсчетов
+    """
+    info = read_wav_info(path)
+    shape = (info.nframes, info.channels) if info.channels > 1 else (info.nframes,)
+    if info.nframes == 0:
+        return info.samplerate, np.zeros(shape, dtype=info.dtype)
+    data = np.memmap(path, dtype=info.dtype, mode="r", offset=info.data_offset, shape=shape)
+    return info.samplerate, data
+
+
+def full_scale(dtype):
+    """
+    Смещение и множитель, переводящие целые отсчеты к диапазону [-1, 1] по полной шкале типа:
+    8-битные (беззнаковые) - (x - 128) / 128, остальные - x / 2^(бит - 1); float не меняется.
+
+    :param dtype: тип отсчета
+    :return: (смещение, множитель)
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.uint8:
+        return 128, 1.0 / 128
+    if dtype.kind == "i":
+        return 0, -1.0 / np.iinfo(dtype).min
+    return 0, 1.0
+
+
+def scale_samples(samples, source_dtype):
+    """
+    Приводит отсчеты, уже переведенные в тип с плавающей точкой, к [-1, 1] по полной шкале исходного типа (на месте).
+
+    :param samples: массив с плавающей точкой
+    :param source_dtype: тип отсчетов в файле
+    :return: samples
+    """
+    offset, factor = full_scale(source_dtype)
+    if offset:
+        samples -= offset
+    if factor != 1.0:
+        samples *= factor
+    return samples
+
+
+def to_pcm(samples, dtype):
+    """
+    Обратное scale_samples: переводит сигнал в [-1, 1] в целые отсчеты типа dtype
+    с округлением и ограничением по диапазону типа; для float - только смена типа.
+
+    :param samples: массив с плавающей точкой
+    :param dtype: тип отсчетов файла
+    :return: новый массив типа dtype
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return samples.astype(dtype)
+    offset, factor = full_scale(dtype)
+    info = np.iinfo(dtype)
+    return np.clip(np.rint(samples / factor + offset), info.min, info.max).astype(dtype)
+
+
+def update_peak(peak, samples):
+    """
+    Накапливает максимум модуля по каждому каналу.
+
+    :param peak: максимум по предыдущим блокам или None
+    :param samples: очередной блок с плавающей точкой (тот же тип, что и у нормализуемого сигнала)
+    :return: новый максимум
+    """
+    block_peak = np.max(np.abs(samples), axis=0)
+    return block_peak if peak is None else np.maximum(peak, block_peak)
+
+
+def normalize_samples(samples, peak):
+    """
+    Делит сигнал на максимум модуля (на месте). Загрузка целиком и потоковая обработка используют
+    одну эту функцию с максимумом того же типа, поэтому нормализованные отсчеты совпадают до бита.
+
+    :param samples: массив с плавающей точкой
+    :param peak: максимум модуля из update_peak
+    :return: samples
+    """
+    return np.divide(samples, peak, out=samples)
+
+
+def load_wav(path, channel=None, mix=False, normalize=True, scale=False, dtype=np.float32,
+             chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Загружает WAV файл в массив с плавающей точкой, нормализуя его по максимуму модуля.
+
+    Данные читаются из отображенного в память файла блоками: каждый блок
+    преобразуется сразу в выходной массив, максимум модуля накапливается
+    за тот же проход, а деление выполняется на месте. Кроме выходного массива
+    дополнительно выделяется память только под один блок.
+
+    :param path: путь к WAV файлу
+    :param channel: номер канала; None - все каналы
+    :param mix: усреднить каналы в один (если channel не задан)
+    :param normalize: делить ли сигнал на максимум модуля (по каждому каналу)
+    :param scale: привести целые отсчеты к [-1, 1] по полной шкале типа (см. full_scale)
+    :param dtype: тип выходного массива
+    :param chunk_size: число кадров в блоке
+    :return: частота дискретизации и массив сигнала
+    """
+    samplerate, data = open_wav_memmap(path)
+    if data.ndim > 1 and channel is not None:
+        data = data[:, channel]
+    mix = mix and data.ndim > 1
+
+    signal = np.empty(len(data) if mix else data.shape, dtype=dtype)
+    peak = None
+    for start in range(0, len(data), chunk_size):
+        out = signal[start:start + chunk_size]
+        if mix:
+            np.mean(data[start:start + chunk_size], axis=1, dtype=dtype, out=out)
+        else:
+            out[...] = data[start:start + chunk_size]
+        if scale:
+            scale_samples(out, data.dtype)
+        if normalize:
+            peak = update_peak(peak, out)
+
+    if normalize and peak is not None:
+        normalize_samples(signal, peak)
+    return samplerate, signal
+
+
+def load_audio(path, mix=True):
+    """
+    Загружает звуковой файл в float32 с исходной частотой дискретизации.
+
+    WAV (PCM 8/16/32 бит, float 32/64 бит) читается собственным разборщиком через
+    load_wav; librosa импортируется только для остальных форматов, поэтому
+    обычная загрузка WAV не тратит время на ее импорт. Оба пути масштабируют
+    сигнал одинаково, как librosa: по полной шкале типа, без нормализации по максимуму.
+
+    :param path: путь к файлу
+    :param mix: усреднить каналы в один
+    :return: частота дискретизации и массив сигнала
+    :raises ValueError: файл не разобран как WAV, а librosa не установлена
+    """
+    try:
+        return load_wav(path, mix=mix, normalize=False, scale=True)
+    except ValueError as error:
+        wav_error = error
+
+    try:
+        import librosa
+    except ImportError:
+        # Без librosa другие форматы не читаются, поэтому важна причина отказа разборщика WAV
+        raise wav_error
+    signal, samplerate = librosa.load(path, sr=None, mono=mix)
+    # librosa возвращает каналы первой осью, здесь принята форма (N, каналы)
+    return samplerate, signal.T
+
+
+def iter_wav_blocks(path, block_size):
+    """
+    Читает WAV файл последовательными блоками.
+
+    :param path: путь к WAV файлу
+    :param block_size: число кадров в блоке (последний блок может быть короче)
+    :return: генератор блоков в исходном типе отсчетов
+    """
+    info = read_wav_info(path)
+    with open(path, "rb") as f:
+        f.seek(info.data_offset)
+        remaining = info.nframes
+        while remaining > 0:
+            count = min(block_size, remaining)
+            block = np.fromfile(f, dtype=info.dtype, count=count * info.channels)
+            remaining -= count
+            if info.channels > 1:
+                block = block.reshape(-1, info.channels)
+            yield block
+
+
+class WavWriter:
+    """
+    Записывает WAV файл по блокам; размеры в заголовке дописываются при закрытии.
+    """
+    def __init__(self, path, samplerate, channels=1, dtype=np.float32):
+        """
+        Создает файл и записывает заголовок.
+
+        :param path: путь к выходному файлу
+        :param samplerate: частота дискретизации
+        :param channels: число каналов
+        :param dtype: тип отсчетов (int16, int32, uint8, float32 или float64)
+        """
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.channels = channels
+        format_tag = WAVE_FORMAT_IEEE_FLOAT if self.dtype.kind == "f" else WAVE_FORMAT_PCM
+        _sample_dtype(format_tag, self.dtype.itemsize * 8)  # проверка поддержки формата
+        block_align = self.dtype.itemsize * channels
+
+        self._file = open(path, "wb")
+        self._data_size = 0
+        self._file.write(struct.pack("<4sI4s", b"RIFF", 0, b"WAVE"))
+        self._file.write(struct.pack("<4sIHHIIHH", b"fmt ", 16, format_tag, channels, samplerate,
+                                     samplerate * block_align, block_align, self.dtype.itemsize * 8))
+        self._file.write(struct.pack("<4sI", b"data", 0))
+
+    def write(self, block):
+        """
+        Дописывает блок кадров в файл.
+
+        :param block: массив (N,) для моно или (N, каналы)
+        """
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        block.tofile(self._file)
+        self._data_size += block.nbytes
+
+    def close(self):
+        """
+        Дописывает размеры чанков в заголовок и закрывает файл.
+        """
+        if self._file.closed:
+            return
+        if self._data_size & 1:
+            self._file.write(b"\x00")
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", 36 + self._data_size + (self._data_size & 1)))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self._data_size))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
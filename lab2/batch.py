@@ -0,0 +1,229 @@
+"""
+Пакетная фильтрация WAV файлов без графического интерфейса.
+
+Каждая пара (файл, фильтр) обрабатывается отдельной задачей в пуле процессов;
+файлы фильтруются потоково, поэтому память на задачу не зависит от длины записи.
+По завершении записывается сводный CSV с временем обработки каждой задачи.
+Результаты раскладываются по подкаталогам, повторяющим расположение исходных файлов
+относительно их общего каталога, поэтому одноименные файлы из разных каталогов
+не перезаписывают друг друга.
+
+Пример запуска из корня репозитория:
+
+    python -m lab2.batch recordings/ -f 1 -f 7 -b low:1000 -b band:300,3000:4 -o out/
+"""
+import argparse
+import csv
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from common.wavio import read_wav_info
+from lab2.filters import FILTER_COEFFICIENTS, DifferenceFilter, SosFilter, butter_sos
+from lab2.streaming import DEFAULT_BLOCK_SIZE, filter_wav_file
+
+FilterSpec = namedtuple("FilterSpec", ["name", "filter_type", "btype", "cutoff", "order"])
+
+SUMMARY_FIELDS = ["input", "filter", "output", "samplerate", "frames", "channels", "seconds", "error"]
+
+
+def parse_difference_spec(text):
+    """
+    Разбирает номер ЦФ из командной строки.
+
+    :param text: номер фильтра (1-10)
+    :return: FilterSpec
+    """
+    filter_type = int(text)
+    if filter_type not in FILTER_COEFFICIENTS:
+        raise argparse.ArgumentTypeError(f"Неизвестный тип ЦФ: {text}")
+    return FilterSpec(f"cf{filter_type}", filter_type, None, None, None)
+
+
+def parse_butter_spec(text):
+    """
+    Разбирает описание фильтра Баттерворта вида ``тип:срез[:порядок]``,
+    например ``low:1000``, ``high:500:3`` или ``band:300,3000``.
+
+    :param text: описание фильтра
+    :return: FilterSpec
+    """
+    parts = text.split(":")
+    if len(parts) not in (2, 3) or parts[0] not in ("low", "high", "band"):
+        raise argparse.ArgumentTypeError(f"Некорректное описание фильтра Баттерворта: {text}")
+    btype = parts[0]
+    try:
+        cutoff = tuple(map(float, parts[1].split(","))) if btype == "band" else float(parts[1])
+        order = int(parts[2]) if len(parts) == 3 else 5
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некорректное описание фильтра Баттерворта: {text}")
+    if btype == "band" and len(cutoff) != 2:
+        raise argparse.ArgumentTypeError(f"Для полосового фильтра нужны две частоты: {text}")
+    name = f"butter_{btype}_{parts[1].replace(',', '-')}_{order}"
+    return FilterSpec(name, None, btype, cutoff, order)
+
+
+def collect_inputs(patterns):
+    """
+    Собирает список WAV файлов по путям, каталогам и шаблонам glob.
+
+    :param patterns: список путей, каталогов или шаблонов
+    :return: отсортированный список путей без повторов
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.wav")
+        paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def make_filter(spec, samplerate):
+    """
+    Создает фильтр с состоянием по описанию.
+
+    :param spec: FilterSpec
+    :param samplerate: частота дискретизации файла
+    :return: объект с методом process(block)
+    """
+    if spec.filter_type is not None:
+        return DifferenceFilter(spec.filter_type)
+    return SosFilter(butter_sos(spec.cutoff, samplerate, spec.btype, spec.order))
+
+
+def output_paths(inputs, specs, output_dir):
+    """
+    Пути результатов для всех пар (файл, фильтр): ``<output_dir>/<каталог файла
+    относительно общего каталога всех файлов>/<имя файла>_<фильтр>.wav``.
+
+    :param inputs: список путей к WAV файлам
+    :param specs: список FilterSpec
+    :param output_dir: каталог для результатов
+    :return: словарь {(путь к файлу, имя фильтра): путь к результату}
+    :raises ValueError: если две пары записали бы результат в один файл
+    """
+    directories = [os.path.dirname(os.path.abspath(path)) for path in inputs]
+    base = os.path.commonpath(directories) if directories else ""
+    paths = {}
+    owners = {}
+    for path, directory in zip(inputs, directories):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for spec in specs:
+            output_path = os.path.normpath(os.path.join(output_dir, os.path.relpath(directory, base),
+                                                        f"{stem}_{spec.name}.wav"))
+            key = os.path.normcase(output_path)
+            if key in owners:
+                other_path, other_name = owners[key]
+                raise ValueError(f"{other_path} ({other_name}) и {path} ({spec.name}) "
+                                 f"записали бы результат в один файл {output_path}")
+            owners[key] = (path, spec.name)
+            paths[path, spec.name] = output_path
+    return paths
+
+
+def process_file(input_path, spec, output_path, block_size=DEFAULT_BLOCK_SIZE, normalize=True):
+    """
+    Фильтрует один файл одним фильтром; выполняется в процессе пула.
+
+    :param input_path: путь к исходному WAV файлу
+    :param spec: FilterSpec
+    :param output_path: путь к результату (см. output_paths)
+    :param block_size: число кадров в блоке потоковой обработки
+    :param normalize: нормализовать ли сигнал по максимуму модуля; иначе - масштабировать по полной шкале типа
+    :return: словарь со строкой сводной таблицы
+    """
+    row = dict.fromkeys(SUMMARY_FIELDS, "")
+    row.update(input=input_path, filter=spec.name, output=output_path)
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        info = read_wav_info(input_path)
+        signal_filter = make_filter(spec, info.samplerate)
+        filter_wav_file(input_path, output_path, signal_filter, block_size=block_size, normalize=normalize)
+        row.update(samplerate=info.samplerate, frames=info.nframes, channels=info.channels)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = f"{time.perf_counter() - start:.6f}"
+    return row
+
+
+def run_batch(inputs, specs, output_dir, workers=None, block_size=DEFAULT_BLOCK_SIZE, normalize=True):
+    """
+    Обрабатывает все пары (файл, фильтр) в пуле процессов.
+
+    :param inputs: список путей к WAV файлам
+    :param specs: список FilterSpec
+    :param output_dir: каталог для результатов
+    :param workers: число процессов (по умолчанию - число ядер)
+    :param block_size: число кадров в блоке потоковой обработки
+    :param normalize: нормализовать ли сигнал по максимуму модуля
+    :return: список строк сводной таблицы в порядке завершения задач
+    :raises ValueError: если две пары записали бы результат в один файл
+    """
+    paths = output_paths(inputs, specs, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_file, path, spec, paths[path, spec.name], block_size, normalize)
+                   for path in inputs for spec in specs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = future.result()
+            rows.append(row)
+            status = row["error"] or f'{row["seconds"]} с'
+            print(f'[{done}/{len(futures)}] {row["input"]} -> {row["filter"]}: {status}')
+    return rows
+
+
+def write_summary(rows, path):
+    """
+    Записывает сводную таблицу в CSV.
+
+    :param rows: список строк, возвращенных process_file
+    :param path: путь к CSV файлу
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная фильтрация WAV файлов процедурами ЦФ лабораторной 2")
+    parser.add_argument("inputs", nargs="+", help="WAV файлы, каталоги или шаблоны glob")
+    parser.add_argument("-f", "--filter", dest="specs", action="append", type=parse_difference_spec, default=[],
+                        metavar="N", help="номер ЦФ (1-10), можно указывать несколько раз")
+    parser.add_argument("-b", "--butter", dest="specs", action="append", type=parse_butter_spec, metavar="SPEC",
+                        help="фильтр Баттерворта тип:срез[:порядок], например low:1000 или band:300,3000:4")
+    parser.add_argument("-o", "--output-dir", default="filtered", help="каталог для результатов")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="число кадров в блоке")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="не нормализовать сигнал по максимуму, а масштабировать по полной шкале типа отсчетов")
+    parser.add_argument("--summary", default=None, help="путь к сводному CSV (по умолчанию <output-dir>/summary.csv)")
+    args = parser.parse_args(argv)
+
+    if not args.specs:
+        parser.error("не задано ни одного фильтра (-f или -b)")
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        parser.error("не найдено ни одного WAV файла")
+
+    start = time.perf_counter()
+    try:
+        rows = run_batch(inputs, args.specs, args.output_dir, args.jobs, args.block_size, not args.no_normalize)
+    except ValueError as e:
+        parser.error(str(e))
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.csv")
+    write_summary(rows, summary_path)
+
+    failed = sum(1 for row in rows if row["error"])
+    print(f"Обработано задач: {len(rows)}, с ошибками: {failed}, "
+          f"общее время: {time.perf_counter() - start:.2f} с. Сводка: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
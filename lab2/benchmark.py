@@ -0,0 +1,150 @@
+"""
+Замер производительности фильтров лабораторной 2 на сигналах разной длины.
+
+Для каждого из десяти ЦФ и вариантов фильтра Баттерворта измеряются время
+(минимум по повторам), пропускная способность в отсчетах в секунду и пиковый
+объем выделенной памяти (tracemalloc, отдельным прогоном). Результаты пишутся
+в JSON; при сравнении с сохраненным ранее файлом программа завершается с кодом 1,
+если пропускная способность упала или пиковая память выросла больше порога.
+
+Пример запуска из корня репозитория:
+
+    python -m lab2.benchmark --sizes 1e3 1e5 1e7 -o bench.json --baseline old_bench.json --threshold 0.2
+"""
+import argparse
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from common.benchmarking import check_baseline, matched_results, write_report
+from lab2.filters import FILTER_COEFFICIENTS, apply_difference_filter, butter_sos, sos_filter
+
+DEFAULT_SIZES = [10 ** k for k in range(3, 9)]
+SAMPLERATE = 44100
+
+BUTTER_VARIANTS = {
+    "butter_low": dict(cutoff=1000.0, btype="low"),
+    "butter_high": dict(cutoff=1000.0, btype="high"),
+    "butter_band": dict(cutoff=(300.0, 3000.0), btype="band"),
+}
+
+
+def benchmark_cases(zero_phase=False):
+    """
+    Формирует набор замеряемых функций.
+
+    :param zero_phase: добавить ли варианты Баттерворта с нулевой фазой
+    :return: словарь {имя: функция от сигнала}
+    """
+    cases = {f"cf{filter_type}": (lambda signal, t=filter_type: apply_difference_filter(signal, t))
+             for filter_type in FILTER_COEFFICIENTS}
+    for name, params in BUTTER_VARIANTS.items():
+        sos = butter_sos(params["cutoff"], SAMPLERATE, params["btype"])
+        cases[name] = lambda signal, sos=sos: sos_filter(signal, sos)
+        if zero_phase:
+            cases[f"{name}_zero_phase"] = lambda signal, sos=sos: sos_filter(signal, sos, zero_phase=True)
+    return cases
+
+
+def measure(func, signal, repeats):
+    """
+    Замеряет время и пиковую память одной функции.
+
+    :param func: функция от сигнала
+    :param signal: входной сигнал
+    :param repeats: число повторов замера времени
+    :return: минимальное время в секундах и пиковый объем выделенной памяти в байтах
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(signal)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(signal)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(sizes, names=None, repeats=3, zero_phase=False, seed=0):
+    """
+    Выполняет замеры для всех сочетаний фильтра и длины сигнала.
+
+    :param sizes: список длин сигнала
+    :param names: имена замеряемых фильтров; None - все
+    :param repeats: число повторов замера времени
+    :param zero_phase: добавить ли варианты Баттерворта с нулевой фазой
+    :param seed: зерно генератора тестового сигнала
+    :return: список словарей с результатами
+    """
+    cases = benchmark_cases(zero_phase)
+    if names:
+        cases = {name: cases[name] for name in names}
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        signal = rng.standard_normal(size, dtype=np.float32)
+        # Для больших сигналов один повтор: время замера и так велико
+        size_repeats = repeats if size <= 10 ** 6 else 1
+        for name, func in cases.items():
+            seconds, peak = measure(func, signal, size_repeats)
+            results.append({
+                "name": name,
+                "size": size,
+                "seconds": seconds,
+                "samples_per_sec": size / seconds if seconds > 0 else float("inf"),
+                "peak_bytes": peak,
+            })
+            print(f"{name:>24} {size:>11d}: {seconds * 1e3:10.3f} мс, "
+                  f"{results[-1]['samples_per_sec'] / 1e6:8.2f} Мотсч/с, {peak / 2 ** 20:9.2f} МиБ")
+        del signal
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Сравнивает результаты с сохраненными ранее.
+
+    :param results: текущие результаты
+    :param baseline: результаты из файла истории
+    :param threshold: допустимая относительная деградация (0.2 - на 20%)
+    :return: список строк с описанием регрессий
+    """
+    regressions = []
+    for item, old in matched_results(results, baseline, lambda item: (item["name"], item["size"])):
+        if item["samples_per_sec"] < old["samples_per_sec"] * (1 - threshold):
+            regressions.append(f'{item["name"]} N={item["size"]}: пропускная способность '
+                               f'{old["samples_per_sec"]:.3g} -> {item["samples_per_sec"]:.3g} отсч/с')
+        if item["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append(f'{item["name"]} N={item["size"]}: пиковая память '
+                               f'{old["peak_bytes"]} -> {item["peak_bytes"]} байт')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер производительности фильтров лабораторной 2")
+    parser.add_argument("--sizes", nargs="+", type=lambda text: int(float(text)), default=DEFAULT_SIZES,
+                        help="длины сигналов (по умолчанию 1e3 ... 1e8)")
+    parser.add_argument("--filters", nargs="+", default=None, help="имена фильтров, например cf1 cf7 butter_band")
+    parser.add_argument("--repeats", type=int, default=3, help="число повторов замера времени")
+    parser.add_argument("--zero-phase", action="store_true", help="добавить варианты Баттерворта с нулевой фазой")
+    parser.add_argument("-o", "--output", default="benchmark_lab2.json", help="файл для сохранения результатов")
+    parser.add_argument("--baseline", default=None, help="файл с прошлыми результатами для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимая относительная деградация")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.filters, args.repeats, args.zero_phase)
+    write_report(args.output, results, numpy=np.__version__, scipy=scipy.__version__,
+                 processor=platform.processor())
+    if args.baseline:
+        return check_baseline(args.baseline, results, compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
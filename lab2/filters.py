@@ -0,0 +1,282 @@
+"""
+Процедуры ЦФ лабораторной работы 2 в виде таблицы коэффициентов (b, a).
+
+Каждый фильтр задается разностным уравнением
+
+    y[n] = b[0]x[n] + b[1]x[n-1] + b[2]x[n-2] - a[1]y[n-1],
+
+которое вычисляется, начиная с отсчета ``FILTER_START[filter_type]``;
+более ранние отсчеты выхода равны нулю, как в исходной реализации на циклах.
+
+Нерекурсивная часть считается векторно в том же порядке сложения, что и цикл,
+а рекурсивная часть (a[1] != 0) выполняется через ``scipy.signal.lfilter``,
+поэтому результат совпадает с поотсчетным циклом до последнего бита.
+На клипе 3 с / 44.1 кГц (132300 отсчетов float64) время фильтрации сокращается
+с 70-150 мс до 2-3.5 мс, т.е. в 30-60 раз в зависимости от типа фильтра
+(таблица замеров - в README). Совпадение с циклами проверяет tests/test_filters.py.
+
+Фильтры Баттерворта рассчитываются в виде каскада звеньев второго порядка (SOS),
+которые численно устойчивы для высоких порядков и узких полос, и кэшируются
+по параметрам расчета.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from common.lazy import lazy_import
+
+scipy_signal = lazy_import("scipy.signal")
+
+# Коэффициенты (b, a) для типов ЦФ 1-10
+FILTER_COEFFICIENTS = {
+    1: ((1.0, -0.5), (1.0,)),
+    2: ((1.0, -0.5, 0.5), (1.0,)),
+    3: ((1.0, 0.5, 0.5), (1.0,)),
+    4: ((0.5, 0.25, 0.25), (1.0,)),
+    5: ((1.0, -0.5), (1.0, -0.5)),
+    6: ((1.0, 0.5, -1.0), (1.0, 0.5)),
+    7: ((1.0, 0.5, -0.5), (1.0, 0.5)),
+    8: ((1.0, -0.5, -0.5), (1.0, 0.5)),
+    9: ((1.0, 0.5, 0.5), (1.0, 0.5)),
+    10: ((1.0, -0.5, 0.5), (1.0, -0.5)),
+}
+
+# Номер первого вычисляемого отсчета (до него выход равен нулю)
+FILTER_START = {filter_type: len(b) - 1 for filter_type, (b, a) in FILTER_COEFFICIENTS.items()}
+
+
+def get_coefficients(filter_type):
+    """
+    Возвращает коэффициенты фильтра в виде массивов numpy.
+
+    :param filter_type: тип фильтра (1-10)
+    :return: кортеж (b, a)
+    """
+    if filter_type not in FILTER_COEFFICIENTS:
+        raise ValueError(f"Неизвестный тип ЦФ: {filter_type}")
+    b, a = FILTER_COEFFICIENTS[filter_type]
+    return np.asarray(b, dtype=np.float64), np.asarray(a, dtype=np.float64)
+
+
+@lru_cache(maxsize=64)
+def butter_sos(cutoff, fs, btype, order=5):
+    """
+    Рассчитывает цифровой фильтр Баттерворта в виде каскада звеньев второго порядка.
+    Результат кэшируется, поэтому повторный вызов с теми же параметрами не пересчитывает фильтр.
+
+    :param cutoff: частота среза в Гц или пара (нижняя, верхняя) для полосового фильтра
+    :param fs: частота дискретизации
+    :param btype: тип фильтра: 'low', 'high' или 'band'
+    :param order: порядок фильтра
+    :return: массив звеньев формы (число звеньев, 6), только для чтения
+    """
+    nyquist = 0.5 * fs
+    if btype == 'band':
+        low, high = cutoff
+        normal_cutoff = [low / nyquist, high / nyquist]
+    else:
+        normal_cutoff = float(cutoff) / nyquist
+    sos = scipy_signal.butter(order, normal_cutoff, btype=btype, analog=False, output='sos')
+    sos.flags.writeable = False
+    return sos
+
+
+def sos_filter(data, sos, zero_phase=False, dtype=np.float32):
+    """
+    Применяет каскад звеньев второго порядка ко всем каналам сигнала.
+
+    :param data: сигнал формы (N,) или (N, каналы)
+    :param sos: звенья фильтра, например из butter_sos
+    :param zero_phase: фильтровать в прямом и обратном направлении (нулевая фаза,
+                       квадрат АЧХ); требует весь сигнал целиком
+    :param dtype: тип вычислений; float32 вдвое сокращает объем данных
+    :return: отфильтрованный сигнал типа dtype
+    """
+    # Копия звеньев: sosfilt требует записываемый массив, а кэш хранит массивы только для чтения
+    sos = np.array(sos, dtype=dtype)
+    data = np.asarray(data, dtype=dtype)
+    if zero_phase:
+        return scipy_signal.sosfiltfilt(sos, data, axis=0)
+    return scipy_signal.sosfilt(sos, data, axis=0)
+
+
+class DifferenceFilter:
+    """
+    ЦФ типа 1-10 с сохранением состояния между блоками.
+
+    Последовательная обработка блоков дает тот же результат, что и обработка
+    всего сигнала за один вызов: между блоками переносятся последние входные
+    отсчеты и состояние рекурсивной части. Многоканальный сигнал формы
+    (N, каналы) фильтруется за один вызов вдоль оси отсчетов.
+
+    Рабочие буферы (входной сигнал с памятью фильтра и нерекурсивная часть)
+    выделяются при первом блоке и переиспользуются, пока размер блока не превышает
+    первый, а форма каналов и тип отсчетов не меняются. С аргументом out выход
+    пишется в готовый массив; тогда нерекурсивные фильтры (1-4) не выделяют память
+    на блок, а рекурсивные - только под результат и состояние scipy.signal.lfilter.
+    """
+    def __init__(self, filter_type):
+        """
+        :param filter_type: тип фильтра (1-10)
+        """
+        if filter_type not in FILTER_COEFFICIENTS:
+            raise ValueError(f"Неизвестный тип ЦФ: {filter_type}")
+        # Коэффициенты берутся как скаляры Python, чтобы не менять тип данных сигнала
+        self.b, self.a = FILTER_COEFFICIENTS[filter_type]
+        self.start = FILTER_START[filter_type]
+        self._buffer = None
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает состояние фильтра к нулевому (рабочие буферы сохраняются).
+        """
+        self._zi = None
+        self._count = 0
+        if self._buffer is not None:
+            self._buffer[:len(self.b) - 1] = 0
+
+    def _prepare(self, block):
+        """
+        Выделяет рабочие буферы под блок, если нынешние не подходят, сохраняя память фильтра.
+        """
+        memory = len(self.b) - 1
+        dtype = np.result_type(block.dtype, 1.0)
+        buffer = self._buffer
+        if buffer is not None and len(buffer) >= memory + len(block) and buffer.shape[1:] == block.shape[1:] \
+                and buffer.dtype == block.dtype and self._fir.dtype == dtype:
+            return
+        self._buffer = np.zeros((memory + len(block),) + block.shape[1:], dtype=block.dtype)
+        if buffer is not None and buffer.shape[1:] == block.shape[1:]:
+            self._buffer[:memory] = buffer[:memory]
+        self._fir = np.empty((len(block),) + block.shape[1:], dtype=dtype)
+        self._product = np.empty_like(self._fir)
+        self._lfilter_b = np.ones(1, dtype=dtype)
+        self._lfilter_a = np.asarray(self.a, dtype=dtype)
+
+    def process(self, block, out=None):
+        """
+        Фильтрует очередной блок сигнала.
+
+        :param block: очередной блок входного сигнала формы (N,) или (N, каналы)
+        :param out: массив той же формы для результата; None - выделить новый
+        :return: выходной блок того же размера и типа (out, если он задан)
+        """
+        memory = len(self.b) - 1
+        n = len(block)
+        self._prepare(block)
+        if out is None:
+            out = np.zeros_like(block)
+        # Буфер: memory последних входных отсчетов прошлых блоков, затем текущий блок
+        x = self._buffer
+        x[memory:memory + n] = block
+        first = max(self.start - self._count, 0)
+
+        out[:min(first, n)] = 0
+        if first < n:
+            # Нерекурсивная часть: b[0]x[n] + b[1]x[n-1] + ... слева направо, как в цикле
+            fir = self._fir[:n - first]
+            product = self._product[:n - first]
+            np.multiply(x[memory + first:memory + n], self.b[0], out=fir)
+            for k in range(1, len(self.b)):
+                np.multiply(x[memory + first - k:memory + n - k], self.b[k], out=product)
+                np.add(fir, product, out=fir)
+
+            # Рекурсивная часть: y[n] = fir[n] - a[1]y[n-1]
+            if len(self.a) > 1:
+                if self._zi is None:
+                    self._zi = np.zeros((len(self.a) - 1,) + fir.shape[1:], dtype=fir.dtype)
+                fir, self._zi = scipy_signal.lfilter(self._lfilter_b, self._lfilter_a, fir, axis=0, zi=self._zi)
+            out[first:] = fir
+
+        # Память фильтра - последние memory входных отсчетов, включая прошлые блоки, если текущий короче
+        if memory:
+            x[:memory] = x[n:n + memory].copy() if n < memory else x[n:n + memory]
+        self._count += n
+        return out
+
+
+class LinearFilter:
+    """
+    Фильтр с произвольными коэффициентами (b, a) на основе lfilter
+    с сохранением состояния между блоками. Каналы фильтруются вдоль оси 0.
+    """
+    def __init__(self, b, a):
+        """
+        :param b: коэффициенты числителя
+        :param a: коэффициенты знаменателя
+        """
+        self.b = np.asarray(b, dtype=np.float64)
+        self.a = np.asarray(a, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает состояние фильтра к нулевому.
+        """
+        self._zi = None
+
+    def process(self, block, out=None):
+        """
+        Фильтрует очередной блок сигнала.
+
+        :param block: очередной блок входного сигнала формы (N,) или (N, каналы)
+        :param out: массив той же формы, в который копируется результат; None - вернуть результат lfilter
+        :return: выходной блок
+        """
+        if self._zi is None:
+            self._zi = np.zeros((max(len(self.a), len(self.b)) - 1,) + block.shape[1:])
+        output_block, self._zi = scipy_signal.lfilter(self.b, self.a, block, axis=0, zi=self._zi)
+        if out is None:
+            return output_block
+        out[...] = output_block
+        return out
+
+
+class SosFilter:
+    """
+    Каскад звеньев второго порядка с сохранением состояния между блоками.
+    Каналы фильтруются вдоль оси 0.
+    """
+    def __init__(self, sos, dtype=np.float32):
+        """
+        :param sos: звенья фильтра, например из butter_sos
+        :param dtype: тип вычислений
+        """
+        self.sos = np.array(sos, dtype=dtype)
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает состояние фильтра к нулевому.
+        """
+        self._zi = None
+
+    def process(self, block, out=None):
+        """
+        Фильтрует очередной блок сигнала.
+
+        :param block: очередной блок входного сигнала формы (N,) или (N, каналы)
+        :param out: массив той же формы, в который копируется результат; None - вернуть результат sosfilt
+        :return: выходной блок типа dtype
+        """
+        block = np.asarray(block, dtype=self.dtype)
+        if self._zi is None:
+            self._zi = np.zeros((len(self.sos), 2) + block.shape[1:], dtype=self.dtype)
+        output_block, self._zi = scipy_signal.sosfilt(self.sos, block, axis=0, zi=self._zi)
+        if out is None:
+            return output_block
+        out[...] = output_block
+        return out
+
+
+def apply_difference_filter(signal, filter_type):
+    """
+    Применяет ЦФ заданного типа к сигналу без поотсчетных циклов Python.
+
+    :param signal: входной сигнал формы (N,) или (N, каналы)
+    :param filter_type: тип фильтра (1-10)
+    :return: выходной сигнал того же размера и типа, что и входной
+    """
+    return DifferenceFilter(filter_type).process(signal)
@@ -1,10 +1,16 @@
 import tkinter as tk
-import wave
 from tkinter import filedialog
 
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import butter, freqz, lfilter
+
+from common.lazy import lazy_import
+from common.plotting import plot_signal
+from common.wavio import open_wav_memmap
+from lab2.filters import SosFilter, butter_sos, sos_filter
+from lab2.spectrum import butter_response, signal_spectrum, to_db
+from lab2.streaming import filter_wav_file
+
+plt = lazy_import("matplotlib.pyplot")
 
 
 class SignalProcessorApp:
@@ -26,36 +32,72 @@ class SignalProcessorApp:
         self.cutoff_entry = tk.Entry(root)
         self.cutoff_entry.pack()
 
+        self.zero_phase_var = tk.BooleanVar(value=False)
+        self.zero_phase_check = tk.Checkbutton(root, text="Zero-phase (forward-backward)", variable=self.zero_phase_var)
+        self.zero_phase_check.pack()
+
         self.process_button = tk.Button(root, text="Process", command=self.process_signal)
         self.process_button.pack()
 
-        self.fig, self.axs = plt.subplots(2, 2)
-        self.fig.tight_layout()
-        plt.show(block=False)
+        self.stream_button = tk.Button(root, text="Process to File", command=self.process_to_file)
+        self.stream_button.pack()
+
+        # Окно графиков создается при первой обработке, чтобы не загружать matplotlib при запуске
+        self.fig = None
+        self.axs = None
 
         self.samplerate = None
         self.data = None
+        self.file_path = None
 
     def load_wav(self):
         file_path = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
         if file_path:
-            with wave.open(file_path, 'rb') as wf:
-                self.samplerate = wf.getframerate()
-                nframes = wf.getnframes()
-                data = wf.readframes(nframes)
-                self.data = np.frombuffer(data, dtype=np.int16)
-
-    def butter_filter(self, data, cutoff, fs, btype, order=5):
-        nyquist = 0.5 * fs
+            self.file_path = file_path
+            # Zero-copy read-only view of the PCM data mapped from the file,
+            # de-interleaved into shape (frames, channels) for multichannel files
+            self.samplerate, self.data = open_wav_memmap(file_path)
+
+    def parse_cutoff(self, cutoff, btype):
         if btype == 'band':
-            low, high = map(float, cutoff.split(','))
-            normal_cutoff = [low / nyquist, high / nyquist]
-        else:
-            normal_cutoff = float(cutoff) / nyquist
-        b, a = butter(order, normal_cutoff, btype=btype, analog=False)
-        y = lfilter(b, a, data)
+            return tuple(map(float, cutoff.split(',')))
+        return float(cutoff)
+
+    def butter_sos(self, cutoff, fs, btype, order=5):
+        # Designs are memoized, so repeated clicks with the same parameters reuse them
+        return butter_sos(self.parse_cutoff(cutoff, btype), fs, btype, order)
+
+    def butter_filter(self, data, cutoff, fs, btype, order=5, zero_phase=False):
+        sos = self.butter_sos(cutoff, fs, btype, order)
+        # All channels are filtered in one call along the sample axis, in float32
+        y = sos_filter(data, sos, zero_phase=zero_phase)
         return y
 
+    def process_to_file(self):
+        # Streaming mode: the file is filtered block by block with the filter state
+        # carried across blocks, so memory use does not depend on the file length
+        if self.file_path is None or self.samplerate is None:
+            print("No data loaded.")
+            return
+
+        filter_type = self.filter_type_entry.get()
+        cutoff = self.cutoff_entry.get()
+
+        if filter_type not in ['low', 'high', 'band']:
+            print("Invalid filter type.")
+            return
+
+        output_path = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV files", "*.wav")])
+        if not output_path:
+            return
+
+        if self.zero_phase_var.get():
+            print("Zero-phase filtering needs the whole signal; streaming uses the causal filter.")
+        sos = self.butter_sos(cutoff, self.samplerate, btype=filter_type)
+        # Сигнал фильтруется по полной шкале и записывается в формате исходного файла с той же громкостью
+        filter_wav_file(self.file_path, output_path, SosFilter(sos), normalize=False, dtype=None)
+        print(f"Filtered signal saved to {output_path}")
+
     def process_signal(self):
         if self.data is None or self.samplerate is None:
             print("No data loaded.")
@@ -68,25 +110,37 @@ class SignalProcessorApp:
             print("Invalid filter type.")
             return
 
-        filtered_data = self.butter_filter(self.data, cutoff, self.samplerate, btype=filter_type)
+        zero_phase = self.zero_phase_var.get()
+        filtered_data = self.butter_filter(self.data, cutoff, self.samplerate, btype=filter_type,
+                                           zero_phase=zero_phase)
+
+        if self.fig is None:
+            self.fig, self.axs = plt.subplots(2, 2)
+            self.fig.tight_layout()
+            plt.show(block=False)
 
         self.axs[0, 0].clear()
-        self.axs[0, 0].plot(self.data)
+        plot_signal(self.axs[0, 0], self.data)
         self.axs[0, 0].set_title("Input Signal")
 
         self.axs[0, 1].clear()
-        self.axs[0, 1].plot(filtered_data)
+        plot_signal(self.axs[0, 1], filtered_data)
         self.axs[0, 1].set_title("Output Signal")
 
+        # Signal spectra are estimated with Welch's method, the filter response
+        # is computed from the filter coefficients and cached
         self.axs[1, 0].clear()
-        freqs, h = freqz(self.data)
-        self.axs[1, 0].plot(freqs, np.abs(h))
-        self.axs[1, 0].set_title("Input Frequency Response")
+        freqs, power = signal_spectrum(self.data, self.samplerate)
+        self.axs[1, 0].plot(freqs, to_db(power, power=True))
+        freqs, power = signal_spectrum(filtered_data, self.samplerate)
+        self.axs[1, 0].plot(freqs, to_db(power, power=True))
+        self.axs[1, 0].set_title("Input/Output Spectrum, dB")
 
         self.axs[1, 1].clear()
-        freqs, h = freqz(filtered_data)
-        self.axs[1, 1].plot(freqs, np.abs(h))
-        self.axs[1, 1].set_title("Output Frequency Response")
+        freqs, h = butter_response(self.parse_cutoff(cutoff, filter_type), self.samplerate, filter_type)
+        # Forward-backward filtering squares the magnitude response
+        self.axs[1, 1].plot(freqs, np.abs(h) ** 2 if zero_phase else np.abs(h))
+        self.axs[1, 1].set_title("Filter Frequency Response")
 
         plt.draw()
 
@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.io import wavfile
-from scipy.signal import freqz
+
+from common.lazy import lazy_import
+from common.plotting import plot_signal
+from common.wavio import load_wav
+from lab2.filters import DifferenceFilter, apply_difference_filter
+from lab2.spectrum import filter_response, signal_spectrum, to_db
+from lab2.streaming import filter_wav_file
+
+plt = lazy_import("matplotlib.pyplot")
 
 
 class CFApp:
@@ -37,6 +43,9 @@ class CFApp:
         self.plot_button = ttk.Button(root, text="Показать графики", command=self.plot_signals)
         self.plot_button.pack(pady=10)
 
+        self.stream_button = ttk.Button(root, text="Фильтровать в файл", command=self.filter_to_file)
+        self.stream_button.pack(pady=10)
+
     def load_wav_file(self):
         """
         Открывает диалоговое окно для выбора WAV файла и сохраняет путь к нему в переменной self.filepath
@@ -54,98 +63,89 @@ class CFApp:
             return
 
         filter_type = int(self.filter_var.get())
-        fs, data = wavfile.read(self.filepath)
-
-        if data.ndim > 1:
-            data = data[:, 0]  # Используем только один канал для простоты
-
-        data = data / np.max(np.abs(data), axis=0)  # Нормализация данных
+        # Файл отображается в память, нормализация выполняется на месте в float32.
+        # Все каналы фильтруются одним вызовом вдоль оси отсчетов
+        fs, data = load_wav(self.filepath)
         output_signal = self.apply_filter(data, filter_type)  # Применение ЦФ
 
         # Построение графиков
         self.plot_waveforms(data, output_signal, fs)
-        self.plot_frequency_response(data, output_signal, fs)
+        self.plot_frequency_response(data, output_signal, fs, filter_type)
+
+    def filter_to_file(self):
+        """
+        Фильтрует загруженный WAV файл потоково, блоками фиксированного размера,
+        и сохраняет результат в выбранный пользователем файл.
+        Подходит для записей, которые не помещаются в память целиком
+        """
+        if not self.filepath:
+            messagebox.showerror("Ошибка", "Пожалуйста, загрузите WAV файл.")
+            return
+
+        output_path = filedialog.asksaveasfilename(defaultextension=".wav", filetypes=[("WAV files", "*.wav")])
+        if not output_path:
+            return
+
+        filter_type = int(self.filter_var.get())
+        filter_wav_file(self.filepath, output_path, DifferenceFilter(filter_type))
+        print(f'Результат фильтрации сохранен: {output_path}')
 
     def apply_filter(self, signal, filter_type):
         """
-        Применяет выбранный цифровой фильтр к сигналу
+        Применяет выбранный цифровой фильтр к сигналу.
+        Разностные уравнения заданы коэффициентами (b, a) в lab2/filters.py
 
         :param signal: входной аудиосигнал
         :param filter_type: тип фильтра, выбранный пользователем
         :return: выходной сигнал после фильтрации
         """
-        output_signal = np.zeros_like(signal)
-        match filter_type:
-            case 1:
-                for n in range(1, len(signal)):
-                    output_signal[n] = signal[n] - 0.5 * signal[n - 1]
-            case 2:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * signal[n - 2]
-            case 3:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] + 0.5 * signal[n - 1] + 0.5 * signal[n - 2]
-            case 4:
-                for n in range(2, len(signal)):
-                    output_signal[n] = 0.5 * signal[n] + 0.25 * signal[n - 1] + 0.25 * signal[n - 2]
-            case 5:
-                for n in range(1, len(signal)):
-                    output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * output_signal[n - 1]
-            case 6:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] + 0.5 * signal[n - 1] - signal[n - 2] - 0.5 * output_signal[n - 1]
-            case 7:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] + 0.5 * signal[n - 1] - 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
-            case 8:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] - 0.5 * signal[n - 1] - 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
-            case 9:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] + 0.5 * signal[n - 1] + 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
-            case 10:
-                for n in range(2, len(signal)):
-                    output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * signal[n - 2] + 0.5 * output_signal[n - 1]
-        return output_signal
+        return apply_difference_filter(signal, filter_type)
 
     def plot_waveforms(self, input_signal, output_signal, fs):
         """
         Строит графики временных характеристик входного и выходного сигналов. 
 
-        :param input_signal: входной сигнал
+        :param input_signal: входной сигнал формы (N,) или (N, каналы)
         :param output_signal: выходной сигнал после фильтрации
         :param fs: частота дискретизации
         """
-        t = np.arange(len(input_signal)) / fs
+        # Сигналы рисуются огибающей с детализацией по ширине оси,
+        # которая уточняется при масштабировании
         plt.figure()
         plt.subplot(2, 1, 1)
-        plt.plot(input_signal)
-        plt.plot(t, input_signal)
+        plot_signal(plt.gca(), input_signal, fs)
         plt.title("Входной сигнал")
         plt.subplot(2, 1, 2)
-        plt.plot(output_signal)
-        plt.plot(t, output_signal)
+        plot_signal(plt.gca(), output_signal, fs)
         plt.title("Выходной сигнал")
         plt.tight_layout()
         plt.show()
 
-    def plot_frequency_response(self, input_signal, output_signal, fs):
+    def plot_frequency_response(self, input_signal, output_signal, fs, filter_type):
         """
-        Строит графики частотных характеристик входного и выходного сигналов.
+        Строит АЧХ и ФЧХ фильтра по его коэффициентам
+        и спектры входного и выходного сигналов (метод Уэлча).
 
         :param input_signal: входной сигнал
         :param output_signal: выходной сигнал после фильтрации
         :param fs: частота дискретизации
+        :param filter_type: тип фильтра, выбранный пользователем
         """
-        f_input, h_input = freqz(input_signal, fs=fs)
-        f_output, h_output = freqz(output_signal, fs=fs)
+        f_filter, h_filter = filter_response(filter_type, fs)
+        f_input, p_input = signal_spectrum(input_signal, fs)
+        f_output, p_output = signal_spectrum(output_signal, fs)
         plt.figure()
-        plt.subplot(2, 1, 1)
-        plt.plot(f_input, 20 * np.log10(np.abs(h_input)))
-        plt.title("АЧХ Входного сигнала")
-        plt.subplot(2, 1, 2)
-        plt.plot(f_output, 20 * np.log10(np.abs(h_output)))
-        plt.title("АЧХ Выходного сигнала")
+        plt.subplot(3, 1, 1)
+        plt.plot(f_filter, to_db(h_filter))
+        plt.title(f"АЧХ фильтра {filter_type}, дБ")
+        plt.subplot(3, 1, 2)
+        plt.plot(f_filter, np.unwrap(np.angle(h_filter)))
+        plt.title(f"ФЧХ фильтра {filter_type}, рад")
+        plt.subplot(3, 1, 3)
+        plt.plot(f_input, to_db(p_input, power=True))
+        plt.plot(f_output, to_db(p_output, power=True))
+        plt.title("Спектр входного и выходного сигналов, дБ")
+        plt.xlabel("Частота, Гц")
         plt.tight_layout()
         plt.show()
 
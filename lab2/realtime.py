@@ -0,0 +1,270 @@
+"""
+Блочная обработка потокового сигнала фильтрами лабораторной 2 с малой задержкой.
+
+Источник (файл или синтезированный сигнал) отдает блоки фиксированного размера
+в заранее выделенный буфер, фильтр с сохраняемым состоянием обрабатывает блок,
+а результат записывается в заранее выделенный выходной блок и оттуда в кольцевой
+буфер для потребителя. Все буферы движка выделяются один раз при создании, фильтр
+пишет результат в готовый блок (``process(block, out)``); память на блок выделяется
+только внутри scipy у рекурсивных фильтров (результат и состояние lfilter/sosfilt).
+Время обработки каждого блока сравнивается с бюджетом реального времени
+(длительностью блока).
+
+Пример запуска из корня репозитория:
+
+    python -m lab2.realtime -f 7 --block-size 256 recording.wav
+"""
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common.wavio import full_scale, open_wav_memmap
+from lab2.filters import FILTER_COEFFICIENTS, DifferenceFilter
+
+LatencyReport = namedtuple("LatencyReport", ["blocks", "budget_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                                             "late_blocks", "overruns"])
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер кадров фиксированной емкости.
+    При переполнении самые старые кадры перезаписываются, а счетчик overruns растет.
+    """
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        """
+        :param capacity: емкость буфера в кадрах
+        :param channels: число каналов
+        :param dtype: тип отсчетов
+        """
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._start = 0
+        self._size = 0
+        self.overruns = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def write(self, block):
+        """
+        Дописывает кадры в буфер.
+
+        :param block: массив формы (N, каналы)
+        """
+        n = len(block)
+        capacity = self.capacity
+        if n > capacity:
+            block = block[n - capacity:]
+            self.overruns += n - capacity
+            n = capacity
+        dropped = max(self._size + n - capacity, 0)
+        if dropped:
+            self.overruns += dropped
+            self._start = (self._start + dropped) % capacity
+            self._size -= dropped
+
+        end = (self._start + self._size) % capacity
+        first = min(n, capacity - end)
+        self._data[end:end + first] = block[:first]
+        self._data[:n - first] = block[first:]
+        self._size += n
+
+    def read(self, out):
+        """
+        Забирает из буфера до len(out) самых старых кадров.
+
+        :param out: массив формы (N, каналы), в который копируются кадры
+        :return: число прочитанных кадров
+        """
+        n = min(len(out), self._size)
+        first = min(n, self.capacity - self._start)
+        out[:first] = self._data[self._start:self._start + first]
+        out[first:n] = self._data[:n - first]
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+        return n
+
+
+class FileSource:
+    """
+    Источник блоков из WAV файла, отображенного в память.
+    Целочисленные отсчеты масштабируются к диапазону [-1, 1] по полной шкале типа.
+    """
+    def __init__(self, path):
+        """
+        :param path: путь к WAV файлу
+        """
+        self.samplerate, data = open_wav_memmap(path)
+        self._data = data.reshape(len(data), -1)
+        self.channels = self._data.shape[1]
+        self._offset, self._scale = full_scale(data.dtype)
+        self._position = 0
+
+    def read(self, out):
+        """
+        Копирует следующий блок кадров в out.
+
+        :param out: массив формы (N, каналы)
+        :return: число прочитанных кадров (0 в конце файла)
+        """
+        n = min(len(out), len(self._data) - self._position)
+        chunk = out[:n]
+        chunk[...] = self._data[self._position:self._position + n]
+        if self._offset:
+            chunk -= self._offset
+        if self._scale != 1.0:
+            chunk *= self._scale
+        self._position += n
+        return n
+
+
+class SyntheticSource:
+    """
+    Источник суммы синусоид с непрерывной фазой между блоками.
+    """
+    def __init__(self, samplerate, block_size, tones=((440.0, 0.5),), channels=1, duration=None):
+        """
+        :param samplerate: частота дискретизации
+        :param block_size: максимальный размер запрашиваемого блока
+        :param tones: последовательность пар (частота в Гц, амплитуда)
+        :param channels: число каналов (сигнал одинаков во всех каналах)
+        :param duration: длительность в секундах; None - бесконечный источник
+        """
+        self.samplerate = samplerate
+        self.channels = channels
+        self.tones = tuple(tones)
+        self._total = None if duration is None else int(duration * samplerate)
+        self._position = 0
+        self._index = np.arange(block_size, dtype=np.float64)
+        self._phase = np.empty(block_size, dtype=np.float64)
+        self._mono = np.empty(block_size, dtype=np.float64)
+
+    def read(self, out):
+        """
+        Синтезирует следующий блок кадров в out.
+
+        :param out: массив формы (N, каналы)
+        :return: число синтезированных кадров (0 по окончании длительности)
+        """
+        n = len(out) if self._total is None else min(len(out), self._total - self._position)
+        if n <= 0:
+            return 0
+        mono, phase = self._mono[:n], self._phase[:n]
+        mono.fill(0.0)
+        for frequency, amplitude in self.tones:
+            np.add(self._index[:n], self._position, out=phase)
+            phase *= 2 * np.pi * frequency / self.samplerate
+            np.sin(phase, out=phase)
+            phase *= amplitude
+            mono += phase
+        out[:n] = mono[:, np.newaxis]
+        self._position += n
+        return n
+
+
+class BlockProcessor:
+    """
+    Движок блочной обработки: источник -> фильтр -> кольцевой буфер с замером задержки.
+    """
+    def __init__(self, source, signal_filter, block_size=256, buffer_blocks=8, history=100000):
+        """
+        :param source: источник с атрибутами samplerate, channels и методом read(out)
+        :param signal_filter: фильтр с сохраняемым состоянием и методами process(block, out) и reset()
+        :param block_size: размер блока в кадрах
+        :param buffer_blocks: емкость выходного кольцевого буфера в блоках
+        :param history: число последних блоков, по которым считается статистика задержки
+        """
+        self.source = source
+        self.signal_filter = signal_filter
+        self.block_size = block_size
+        self.budget_ns = int(1e9 * block_size / source.samplerate)
+        self.input_block = np.zeros((block_size, source.channels), dtype=np.float32)
+        self.output_block = np.zeros_like(self.input_block)
+        self.output = RingBuffer(block_size * buffer_blocks, source.channels)
+        self._latencies = np.zeros(history, dtype=np.int64)
+        self.blocks = 0
+        self._warm_up()
+
+    def _warm_up(self):
+        """
+        Прогоняет через фильтр один блок тишины и сбрасывает его состояние. Отложенный импорт
+        scipy и первый вызов его функций происходят здесь, а не в первом замеряемом блоке.
+        """
+        self.signal_filter.process(self.input_block, out=self.output_block)
+        self.signal_filter.reset()
+
+    def step(self):
+        """
+        Обрабатывает один блок.
+
+        :return: False, если источник исчерпан
+        """
+        start = time.perf_counter_ns()
+        n = self.source.read(self.input_block)
+        if n == 0:
+            return False
+        self.output.write(self.signal_filter.process(self.input_block[:n], out=self.output_block[:n]))
+        self._latencies[self.blocks % len(self._latencies)] = time.perf_counter_ns() - start
+        self.blocks += 1
+        return True
+
+    def run(self, max_blocks=None, sink=None):
+        """
+        Обрабатывает блоки до исчерпания источника или до max_blocks.
+
+        :param max_blocks: максимальное число блоков; None - до конца источника
+        :param sink: функция, вызываемая с кольцевым буфером после каждого блока
+                     (потребитель должен забирать данные методом read)
+        :return: LatencyReport
+        """
+        while (max_blocks is None or self.blocks < max_blocks) and self.step():
+            if sink is not None:
+                sink(self.output)
+        return self.report()
+
+    def report(self):
+        """
+        Сводка задержек обработки блоков относительно бюджета реального времени.
+
+        :return: LatencyReport со временами в миллисекундах
+        """
+        latencies = self._latencies[:min(self.blocks, len(self._latencies))]
+        if len(latencies) == 0:
+            return LatencyReport(0, self.budget_ns / 1e6, 0.0, 0.0, 0.0, 0.0, 0, self.output.overruns)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) / 1e6
+        late = int(np.count_nonzero(latencies > self.budget_ns))
+        return LatencyReport(self.blocks, self.budget_ns / 1e6, p50, p95, p99, latencies.max() / 1e6, late,
+                             self.output.overruns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Блочная фильтрация потока процедурами ЦФ лабораторной 2")
+    parser.add_argument("input", nargs="?", help="WAV файл; без него используется синтезированный сигнал")
+    parser.add_argument("-f", "--filter", type=int, default=1, choices=sorted(FILTER_COEFFICIENTS), help="номер ЦФ")
+    parser.add_argument("--block-size", type=int, default=256, help="размер блока в кадрах")
+    parser.add_argument("--samplerate", type=int, default=44100, help="частота синтезированного сигнала")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность синтезированного сигнала, с")
+    args = parser.parse_args(argv)
+
+    if args.input:
+        source = FileSource(args.input)
+    else:
+        source = SyntheticSource(args.samplerate, args.block_size, tones=((440.0, 0.5), (3000.0, 0.25)),
+                                 duration=args.duration)
+    processor = BlockProcessor(source, DifferenceFilter(args.filter), args.block_size)
+    out = np.empty((args.block_size, source.channels), dtype=np.float32)
+    report = processor.run(sink=lambda ring: ring.read(out))
+
+    print(f"Блоков: {report.blocks}, бюджет на блок: {report.budget_ms:.3f} мс")
+    print(f"Задержка p50/p95/p99/max: {report.p50_ms:.4f} / {report.p95_ms:.4f} / "
+          f"{report.p99_ms:.4f} / {report.max_ms:.4f} мс")
+    print(f"Блоков с превышением бюджета: {report.late_blocks}, потеряно кадров в буфере: {report.overruns}")
+
+
+if __name__ == "__main__":
+    main()
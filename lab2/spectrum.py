@@ -0,0 +1,86 @@
+"""
+Частотные характеристики фильтров и оценка спектра сигналов.
+
+АЧХ и ФЧХ фильтра вычисляются по его коэффициентам (b, a), а не по отсчетам
+сигнала, и кэшируются по параметрам фильтра, частоте дискретизации и размеру сетки.
+Спектр самих сигналов оценивается методом Уэлча (усреднение FFT по сегментам),
+поэтому время оценки растет как N log N.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from common.lazy import lazy_import
+from lab2.filters import butter_sos, get_coefficients
+
+scipy_signal = lazy_import("scipy.signal")
+
+DEFAULT_GRID_SIZE = 512
+DEFAULT_SEGMENT_SIZE = 4096
+
+
+def _read_only(*arrays):
+    """
+    Запрещает запись в массивы, хранящиеся в кэше.
+
+    :param arrays: массивы numpy
+    :return: те же массивы
+    """
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=128)
+def filter_response(filter_type, fs, grid_size=DEFAULT_GRID_SIZE):
+    """
+    Частотная характеристика ЦФ типа 1-10 по его коэффициентам.
+
+    :param filter_type: тип фильтра (1-10)
+    :param fs: частота дискретизации
+    :param grid_size: число точек частотной сетки
+    :return: частоты (Гц) и комплексная частотная характеристика (только для чтения)
+    """
+    b, a = get_coefficients(filter_type)
+    return _read_only(*scipy_signal.freqz(b, a, worN=grid_size, fs=fs))
+
+
+@lru_cache(maxsize=128)
+def butter_response(cutoff, fs, btype, order=5, grid_size=DEFAULT_GRID_SIZE):
+    """
+    Частотная характеристика фильтра Баттерворта по его коэффициентам.
+
+    :param cutoff: частота среза в Гц или пара (нижняя, верхняя) для полосового фильтра
+    :param fs: частота дискретизации
+    :param btype: тип фильтра: 'low', 'high' или 'band'
+    :param order: порядок фильтра
+    :param grid_size: число точек частотной сетки
+    :return: частоты (Гц) и комплексная частотная характеристика (только для чтения)
+    """
+    return _read_only(*scipy_signal.sosfreqz(butter_sos(cutoff, fs, btype, order), worN=grid_size, fs=fs))
+
+
+def signal_spectrum(signal, fs, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Оценивает спектральную плотность мощности сигнала методом Уэлча.
+
+    :param signal: сигнал формы (N,) или (N, каналы)
+    :param fs: частота дискретизации
+    :param segment_size: длина сегмента FFT (уменьшается для коротких сигналов)
+    :return: частоты (Гц) и спектральная плотность мощности формы (F,) или (F, каналы)
+    """
+    nperseg = max(1, min(segment_size, len(signal)))
+    return scipy_signal.welch(signal, fs=fs, nperseg=nperseg, axis=0)
+
+
+def to_db(values, power=False, floor=1e-12):
+    """
+    Переводит величину в децибелы, ограничивая снизу нулевые значения.
+
+    :param values: амплитуда (или комплексная характеристика) либо мощность
+    :param power: True, если values - мощность (10 log10), иначе амплитуда (20 log10)
+    :param floor: минимальное значение модуля перед логарифмированием
+    :return: значения в дБ
+    """
+    factor = 10 if power else 20
+    return factor * np.log10(np.maximum(np.abs(values), floor))
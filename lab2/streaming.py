@@ -0,0 +1,77 @@
+"""
+Потоковая фильтрация WAV файлов блоками фиксированного размера.
+
+Файл читается и записывается по блокам, а фильтр переносит свое состояние через
+границы блоков, поэтому потребление памяти не зависит от длины записи,
+а результат совпадает с фильтрацией всего файла целиком.
+"""
+import numpy as np
+
+from common.wavio import (
+    WavWriter,
+    iter_wav_blocks,
+    normalize_samples,
+    read_wav_info,
+    scale_samples,
+    to_pcm,
+    update_peak,
+)
+
+DEFAULT_BLOCK_SIZE = 65536
+
+
+def wav_peak(path, block_size=DEFAULT_BLOCK_SIZE, channel=None, dtype=np.float32):
+    """
+    Находит максимум модуля сигнала за один проход по файлу.
+
+    :param path: путь к WAV файлу
+    :param block_size: число кадров в блоке
+    :param channel: номер используемого канала; None - все каналы
+    :param dtype: тип, в котором будет нормализоваться сигнал
+    :return: максимум модуля отсчетов (по каждому каналу) типа dtype
+    """
+    peak = None
+    for block in iter_wav_blocks(path, block_size):
+        if block.ndim > 1 and channel is not None:
+            block = block[:, channel]
+        peak = update_peak(peak, block.astype(dtype))
+    return peak
+
+
+def filter_wav_file(src_path, dst_path, signal_filter, block_size=DEFAULT_BLOCK_SIZE, normalize=True,
+                    channel=None, dtype=np.float32):
+    """
+    Фильтрует WAV файл потоково и записывает результат в новый WAV файл.
+
+    Отсчеты переводятся в float32 теми же функциями, что и в load_wav, поэтому результат
+    совпадает с фильтрацией сигнала, загруженного целиком: с нормализацией - по максимуму
+    модуля, без нее - по полной шкале типа отсчетов (целые отсчеты приводятся к [-1, 1]).
+
+    :param src_path: путь к исходному WAV файлу
+    :param dst_path: путь к выходному WAV файлу
+    :param signal_filter: фильтр с методом process(block), например DifferenceFilter
+    :param block_size: число кадров в блоке
+    :param normalize: нормализовать ли сигнал по максимуму модуля; иначе - масштабировать по полной шкале
+    :param channel: номер используемого канала; None - все каналы фильтруются одним вызовом
+    :param dtype: тип отсчетов выходного файла; None - как в исходном файле (целые отсчеты
+                  записываются по той же полной шкале, по которой масштабировался вход)
+    :return: частота дискретизации и число обработанных кадров
+    """
+    info = read_wav_info(src_path)
+    dtype = info.dtype if dtype is None else np.dtype(dtype)
+    peak = wav_peak(src_path, block_size, channel) if normalize else None
+
+    channels = info.channels if channel is None else 1
+    with WavWriter(dst_path, info.samplerate, channels=channels, dtype=dtype) as writer:
+        for block in iter_wav_blocks(src_path, block_size):
+            if block.ndim > 1 and channel is not None:
+                block = block[:, channel]
+            samples = block.astype(np.float32)
+            if peak is not None:
+                normalize_samples(samples, peak)
+            else:
+                scale_samples(samples, block.dtype)
+            block = samples
+            output_block = signal_filter.process(block)
+            writer.write(to_pcm(output_block, dtype) if dtype.kind != "f" else output_block)
+    return info.samplerate, info.nframes
@@ -0,0 +1,136 @@
+"""
+Замер загрузки звуковых файлов: время импорта загрузчика в новом процессе
+и скорость декодирования WAV собственным разборщиком (common.wavio) и librosa.
+
+Для замера создаются временные WAV файлы (16 бит стерео и float32 моно) заданной
+длительности; librosa замеряется, только если она установлена. Результаты
+печатаются и при необходимости сохраняются в JSON.
+
+Пример запуска из корня репозитория:
+
+    python -m lab3.benchmark_loading --duration 600 -o loading.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common.wavio import WavWriter, load_audio
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTED_MODULES = ["common.wavio", "librosa"]
+
+
+def import_time(module, repeats=3):
+    """
+    Время импорта модуля в новом процессе интерпретатора (минимум по повторам).
+
+    :param module: имя модуля
+    :param repeats: число запусков
+    :return: время в секундах или None, если модуль не импортируется
+    """
+    code = f"import time; s = time.perf_counter(); import {module}; print(time.perf_counter() - s)"
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        seconds = float(result.stdout.split()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def make_test_files(directory, duration, samplerate=44100, seed=0):
+    """
+    Создает тестовые WAV файлы, записывая их блоками.
+
+    :param directory: каталог для файлов
+    :param duration: длительность в секундах
+    :param samplerate: частота дискретизации
+    :param seed: зерно генератора шума
+    :return: словарь {описание: путь}
+    """
+    rng = np.random.default_rng(seed)
+    files = {
+        "pcm16_stereo": (os.path.join(directory, "pcm16_stereo.wav"), 2, np.int16),
+        "float32_mono": (os.path.join(directory, "float32_mono.wav"), 1, np.float32),
+    }
+    total = int(duration * samplerate)
+    for path, channels, dtype in files.values():
+        with WavWriter(path, samplerate, channels, dtype) as writer:
+            for start in range(0, total, samplerate):
+                block = rng.uniform(-0.5, 0.5, (min(samplerate, total - start), channels))
+                if dtype == np.int16:
+                    block = block * 32767
+                writer.write(block.astype(dtype))
+    return {name: path for name, (path, _, _) in files.items()}
+
+
+def loaders():
+    """
+    Замеряемые функции загрузки (librosa - только если установлена).
+
+    :return: словарь {имя: функция от пути}
+    """
+    result = {"wavio": load_audio}
+    if importlib.util.find_spec("librosa") is not None:
+        import librosa
+        result["librosa"] = lambda path: librosa.load(path, sr=None)
+    return result
+
+
+def decode_time(loader, path, repeats=3):
+    """
+    Минимальное время загрузки файла.
+
+    :param loader: функция загрузки
+    :param path: путь к файлу
+    :param repeats: число повторов
+    :return: время в секундах
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        loader(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер импорта загрузчиков и скорости декодирования WAV")
+    parser.add_argument("--duration", type=float, default=60.0, help="длительность тестовых файлов, с")
+    parser.add_argument("--repeats", type=int, default=3, help="число повторов каждого замера")
+    parser.add_argument("-o", "--output", default=None, help="файл JSON для сохранения результатов")
+    args = parser.parse_args(argv)
+
+    report = {"imports": {}, "decode": []}
+    for module in IMPORTED_MODULES:
+        seconds = import_time(module, args.repeats)
+        report["imports"][module] = seconds
+        print(f"импорт {module:>14}: " + ("не установлен" if seconds is None else f"{seconds * 1e3:9.1f} мс"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = make_test_files(directory, args.duration)
+        for file_name, path in files.items():
+            frames = int(args.duration * 44100)
+            for loader_name, loader in loaders().items():
+                seconds = decode_time(loader, path, args.repeats)
+                report["decode"].append({"file": file_name, "loader": loader_name, "seconds": seconds,
+                                         "frames_per_sec": frames / seconds})
+                print(f"{file_name:>13} {loader_name:>8}: {seconds * 1e3:9.1f} мс, "
+                      f"{frames / seconds / 1e6:8.1f} Мкадр/с")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Взаимная корреляция сигнала с шаблоном методом перекрытия с накоплением (overlap-save).
+
+Сигнал обрабатывается блоками: для каждого блока считается одно FFT, которое
+умножается на заранее вычисленный спектр шаблона, поэтому весь сигнал не нужно
+держать в памяти, а время растет как N log M. Результат соответствует
+``scipy.signal.correlate(signal, template, mode='valid')``. Нормированный вариант
+делит корреляцию на произведение норм шаблона и окна сигнала и не зависит от
+амплитуды сигнала. Набор шаблонов (TemplateBank) коррелируется с сигналом
+за одно прямое FFT на блок.
+"""
+import numpy as np
+
+from common.lazy import lazy_import
+
+scipy_fft = lazy_import("scipy.fft")
+scipy_signal = lazy_import("scipy.signal")
+
+# Сигналы не длиннее этого числа отсчетов коррелируются напрямую через scipy
+DIRECT_LIMIT = 1 << 16
+
+
+class TemplateBank:
+    """
+    Потоковый коррелятор с набором шаблонов: спектр каждого блока сигнала считается
+    один раз и умножается сразу на все заранее вычисленные спектры шаблонов,
+    поэтому каждый новый шаблон добавляет только умножение и обратное FFT.
+    """
+    def __init__(self, templates, normalized=False, fft_size=None):
+        """
+        :param templates: последовательность шаблонов (одномерных массивов, длины могут различаться)
+        :param normalized: возвращать нормированную взаимную корреляцию
+        :param fft_size: размер FFT; по умолчанию - не меньше четырех длин самого длинного шаблона
+        """
+        self.templates = [np.asarray(template, dtype=np.float64) for template in templates]
+        if not self.templates:
+            raise ValueError("Набор шаблонов пуст")
+        self.normalized = normalized
+        self.lengths = np.array([len(template) for template in self.templates])
+        m = self.lengths.max()
+        self.fft_size = fft_size or scipy_fft.next_fast_len(max(4 * m, 4096))
+        if self.fft_size < m:
+            raise ValueError("Размер FFT меньше длины шаблона")
+        self.step = self.fft_size - m + 1
+        # Корреляция - это свертка с обращенным шаблоном; спектры считаются один раз
+        self.template_spectra = np.stack([scipy_fft.rfft(template[::-1], self.fft_size) for template in self.templates])
+        self.template_norms = np.array([np.sqrt(np.sum(template ** 2)) for template in self.templates])
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает накопленные отсчеты сигнала.
+        """
+        self._buffer = np.empty(0)
+
+    def _correlate_segment(self, segment, count):
+        """
+        Корреляция для count окон каждого шаблона, начинающихся в первых count отсчетах сегмента.
+
+        :return: массив формы (число шаблонов, count)
+        """
+        spectrum = scipy_fft.rfft(segment, self.fft_size)
+        convolution = scipy_fft.irfft(spectrum * self.template_spectra, self.fft_size, axis=1)
+        # Окно, начинающееся в отсчете p, соответствует отсчету p + m - 1 линейной свертки;
+        # в конце потока окна длинных шаблонов выходят за блок, эти значения потом отбрасываются
+        offsets = np.arange(count)
+        index = np.minimum(self.lengths[:, np.newaxis] - 1 + offsets, self.fft_size - 1)
+        result = np.take_along_axis(convolution, index, axis=1)
+        if self.normalized:
+            squares = np.zeros(count + self.lengths.max() - 1)
+            tail = segment[:len(squares)]
+            squares[:len(tail)] = tail ** 2
+            energy = np.concatenate(([0.0], np.cumsum(squares)))
+            window_energy = energy[offsets + self.lengths[:, np.newaxis]] - energy[offsets]
+            window_norm = np.sqrt(np.maximum(window_energy, 0.0)) * self.template_norms[:, np.newaxis]
+            result = np.divide(result, window_norm, out=np.zeros_like(result), where=window_norm > 1e-12)
+        return result
+
+    def process(self, chunk):
+        """
+        Добавляет очередной кусок сигнала.
+
+        :param chunk: очередной кусок сигнала
+        :return: массив формы (число шаблонов, n) со значениями корреляции для окон, ставших полными
+                 (n одинаково для всех шаблонов)
+        """
+        self._buffer = np.concatenate((self._buffer, np.asarray(chunk, dtype=np.float64)))
+        outputs = []
+        while len(self._buffer) >= self.fft_size:
+            outputs.append(self._correlate_segment(self._buffer[:self.fft_size], self.step))
+            self._buffer = self._buffer[self.step:]
+        return np.concatenate(outputs, axis=1) if outputs else np.empty((len(self.templates), 0))
+
+    def flush(self):
+        """
+        Завершает поток: считает корреляцию для оставшихся полных окон.
+
+        :return: список массивов по шаблонам (у более коротких шаблонов окон больше)
+        """
+        counts = len(self._buffer) - self.lengths + 1
+        count = max(counts.max(), 0)
+        result = self._correlate_segment(self._buffer, count) if count > 0 else np.empty((len(self.templates), 0))
+        self.reset()
+        return [row[:max(n, 0)] for row, n in zip(result, counts)]
+
+
+class TemplateCorrelator(TemplateBank):
+    """
+    Потоковый коррелятор с одним шаблоном: сигнал подается кусками любой длины,
+    результат выдается по мере накопления полных окон.
+    """
+    def __init__(self, template, normalized=False, fft_size=None):
+        """
+        :param template: шаблон (одномерный массив)
+        :param normalized: возвращать нормированную взаимную корреляцию
+        :param fft_size: размер FFT; по умолчанию - не меньше четырех длин шаблона
+        """
+        super().__init__([template], normalized, fft_size)
+        self.template = self.templates[0]
+
+    def process(self, chunk):
+        """
+        Добавляет очередной кусок сигнала.
+
+        :param chunk: очередной кусок сигнала
+        :return: значения корреляции для окон, ставших полными
+        """
+        return super().process(chunk)[0]
+
+    def flush(self):
+        """
+        Завершает поток: считает корреляцию для оставшихся полных окон.
+
+        :return: значения корреляции для последних окон
+        """
+        return super().flush()[0]
+
+
+def correlate_valid(signal, template, normalized=False, block_size=None):
+    """
+    Взаимная корреляция сигнала с шаблоном в режиме 'valid'.
+
+    :param signal: сигнал (одномерный массив)
+    :param template: шаблон (одномерный массив)
+    :param normalized: вернуть нормированную взаимную корреляцию в диапазоне [-1, 1]
+    :param block_size: размер FFT; по умолчанию выбирается по длине шаблона
+    :return: массив длины len(signal) - len(template) + 1
+    """
+    if len(signal) <= DIRECT_LIMIT and not normalized:
+        return scipy_signal.correlate(signal, template, mode='valid')
+
+    correlator = TemplateCorrelator(template, normalized, block_size)
+    chunk = correlator.step * 16
+    parts = [correlator.process(signal[start:start + chunk]) for start in range(0, len(signal), chunk)]
+    parts.append(correlator.flush())
+    return np.concatenate(parts)
+
+
+def correlate_bank(signal, templates, normalized=False, block_size=None):
+    """
+    Взаимная корреляция сигнала сразу с набором шаблонов в режиме 'valid'.
+
+    :param signal: сигнал (одномерный массив)
+    :param templates: последовательность шаблонов
+    :param normalized: вернуть нормированную взаимную корреляцию в диапазоне [-1, 1]
+    :param block_size: размер FFT; по умолчанию выбирается по длине самого длинного шаблона
+    :return: список массивов длины len(signal) - len(template) + 1 по шаблонам
+    """
+    bank = TemplateBank(templates, normalized, block_size)
+    chunk = bank.step * 16
+    parts = [bank.process(signal[start:start + chunk]) for start in range(0, len(signal), chunk)]
+    tails = bank.flush()
+    return [np.concatenate([part[index] for part in parts] + [tail]) for index, tail in enumerate(tails)]
+
+
+def match_templates(signal, templates, normalized=False, relative_height=0.5, distance=None, block_size=None):
+    """
+    Ищет вхождения каждого шаблона набора - пики его корреляции с сигналом.
+
+    :param signal: сигнал (одномерный массив)
+    :param templates: последовательность шаблонов
+    :param normalized: искать пики нормированной корреляции
+    :param relative_height: минимальная высота пика относительно максимума корреляции шаблона
+    :param distance: минимальное расстояние между пиками в отсчетах
+    :param block_size: размер FFT
+    :return: список массивов индексов начал вхождений по шаблонам
+    """
+    peaks = []
+    for correlation in correlate_bank(signal, templates, normalized, block_size):
+        if len(correlation) == 0:
+            peaks.append(np.empty(0, dtype=np.int64))
+            continue
+        found, _ = scipy_signal.find_peaks(correlation, height=np.max(correlation) * relative_height, distance=distance)
+        peaks.append(found)
+    return peaks
@@ -0,0 +1,194 @@
+"""
+Признаки сегментов сигнала, вычисляемые сразу для всех сегментов.
+
+Сегменты задаются массивом границ [b0, b1, ..., bK]: сегмент i - это отсчеты
+[b[i], b[i + 1]). Суммы, минимумы и максимумы по сегментам считаются
+одним проходом ``ufunc.reduceat`` по сигналу, без цикла Python по сегментам.
+
+Спектральные признаки считаются по общему STFT всего сигнала: кадры с окном Ханна
+и перекрытием в половину кадра (как в ``scipy.signal.welch``) вычисляются блоками,
+а спектр мощности сегмента - среднее по кадрам, целиком лежащим в нем.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from common.lazy import lazy_import
+
+scipy_fft = lazy_import("scipy.fft")
+scipy_signal = lazy_import("scipy.signal")
+
+SEGMENT_STATISTICS_DTYPE = np.dtype([
+    ("start", np.int64),
+    ("end", np.int64),
+    ("mean", np.float64),
+    ("variance", np.float64),
+    ("energy", np.float64),
+    ("min", np.float64),
+    ("max", np.float64),
+    ("zcr", np.float64),
+])
+
+SPECTRAL_FEATURES_DTYPE = np.dtype([
+    ("start", np.int64),
+    ("end", np.int64),
+    ("frames", np.int64),
+    ("centroid", np.float64),
+    ("peak_frequency", np.float64),
+    ("bandwidth", np.float64),
+    ("rolloff", np.float64),
+    ("flatness", np.float64),
+])
+
+# Число кадров STFT, преобразуемых за один раз
+FRAMES_PER_BLOCK = 4096
+
+
+def segment_bounds(boundaries, length):
+    """
+    Проверяет массив границ сегментов.
+
+    :param boundaries: неубывающая последовательность границ
+    :param length: длина сигнала
+    :return: массив границ типа int64
+    """
+    bounds = np.asarray(boundaries, dtype=np.int64)
+    if bounds.ndim != 1 or len(bounds) < 2:
+        raise ValueError("Нужно не меньше двух границ сегментов")
+    if bounds[0] < 0 or bounds[-1] > length or np.any(np.diff(bounds) < 0):
+        raise ValueError("Границы сегментов должны не убывать и лежать в пределах сигнала")
+    return bounds
+
+
+def segment_statistics(signal, boundaries):
+    """
+    Статистики всех сегментов: среднее, дисперсия, энергия, минимум, максимум
+    и частота пересечения нуля (доля соседних пар отсчетов с разным знаком).
+
+    :param signal: одномерный сигнал
+    :param boundaries: границы сегментов [b0, b1, ..., bK]
+    :return: структурированный массив длины K с полями SEGMENT_STATISTICS_DTYPE;
+             для пустых сегментов статистики равны nan
+    """
+    signal = np.asarray(signal)
+    bounds = segment_bounds(boundaries, len(signal))
+    starts, ends = bounds[:-1], bounds[1:]
+    lengths = ends - starts
+
+    result = np.zeros(len(starts), dtype=SEGMENT_STATISTICS_DTYPE)
+    result["start"], result["end"] = starts, ends
+    for name in ("mean", "variance", "energy", "min", "max", "zcr"):
+        result[name] = np.nan
+
+    # reduceat не умеет пустые отрезки: непустые сегменты идут подряд, поэтому
+    # редукция от начала одного до начала следующего непустого совпадает с сегментом
+    filled = lengths > 0
+    if not np.any(filled):
+        return result
+    first = starts[filled][0]
+    data = signal[first:bounds[-1]]
+    index = starts[filled] - first
+    count = lengths[filled]
+
+    mean = np.add.reduceat(data, index, dtype=np.float64) / count
+    deviation = data - np.repeat(mean, count)
+    result["mean"][filled] = mean
+    result["variance"][filled] = np.add.reduceat(deviation * deviation, index) / count
+    result["energy"][filled] = np.add.reduceat(np.square(data, dtype=np.float64), index)
+    result["min"][filled] = np.minimum.reduceat(data, index)
+    result["max"][filled] = np.maximum.reduceat(data, index)
+
+    # Пересечения нуля внутри сегмента - пары соседних отсчетов, целиком лежащие в нем
+    crossings = np.concatenate(([0], np.cumsum(np.signbit(data[1:]) != np.signbit(data[:-1]))))
+    result["zcr"][filled] = (crossings[index + count - 1] - crossings[index]) / np.maximum(count - 1, 1)
+    return result
+
+
+def _frame_power(signal, positions, window, scale):
+    """
+    Односторонний спектр мощности кадров, начинающихся в positions (как в welch:
+    вычитание среднего, окно, нормировка на плотность). Кадры у конца сигнала дополняются нулями.
+    """
+    nperseg = len(window)
+    inside = positions + nperseg <= len(signal)
+    frames = np.zeros((len(positions), nperseg), dtype=np.float64)
+    if np.any(inside):
+        view = sliding_window_view(signal, nperseg)
+        frames[inside] = view[positions[inside]]
+    for row in np.flatnonzero(~inside):
+        tail = signal[positions[row]:]
+        frames[row, :len(tail)] = tail
+    frames -= frames.mean(axis=1, keepdims=True)
+    frames *= window
+    power = np.abs(scipy_fft.rfft(frames, axis=1)) ** 2 * scale
+    power[:, 1:(nperseg + 1) // 2] *= 2
+    return power
+
+
+def segment_spectral_features(signal, fs, starts, ends, nperseg=1024, rolloff_percent=0.85):
+    """
+    Спектральные признаки сегментов по общему STFT сигнала: центроид, частота пика,
+    ширина полосы (среднеквадратичное отклонение частоты от центроида), частота спада
+    (ниже нее лежит rolloff_percent мощности) и спектральная плоскостность.
+
+    Сегменты не должны пересекаться. Для сегмента, в который не помещается ни одного
+    кадра, берется один кадр с центром в середине сегмента.
+
+    :param signal: одномерный сигнал
+    :param fs: частота дискретизации
+    :param starts: начала сегментов (по возрастанию)
+    :param ends: концы сегментов
+    :param nperseg: длина кадра
+    :param rolloff_percent: доля мощности для частоты спада
+    :return: структурированный массив с полями SPECTRAL_FEATURES_DTYPE
+    """
+    signal = np.asarray(signal)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if np.any(starts[1:] < ends[:-1]):
+        raise ValueError("Сегменты должны идти по возрастанию и не пересекаться")
+    hop = nperseg // 2
+    window = scipy_signal.get_window("hann", nperseg)
+    scale = 1.0 / (fs * np.sum(window ** 2))
+    frequencies = scipy_fft.rfftfreq(nperseg, 1.0 / fs)
+
+    sums = np.zeros((len(starts), len(frequencies)))
+    counts = np.zeros(len(starts), dtype=np.int64)
+    total_frames = (len(signal) - nperseg) // hop + 1 if len(signal) >= nperseg else 0
+    for first in range(0, total_frames, FRAMES_PER_BLOCK):
+        positions = np.arange(first, min(first + FRAMES_PER_BLOCK, total_frames)) * hop
+        # Сегмент кадра - последний сегмент, начавшийся не позже кадра; кадр должен в нем поместиться
+        owner = np.searchsorted(starts, positions, side="right") - 1
+        valid = owner >= 0
+        valid[valid] = positions[valid] + nperseg <= ends[owner[valid]]
+        if not np.any(valid):
+            continue
+        owner, power = owner[valid], _frame_power(signal, positions[valid], window, scale)
+        # Кадры одного сегмента идут подряд: суммируем отрезки одним reduceat
+        runs = np.flatnonzero(np.diff(owner, prepend=-1))
+        sums[owner[runs]] += np.add.reduceat(power, runs, axis=0)
+        counts[owner[runs]] += np.diff(np.append(runs, len(owner)))
+
+    short = np.flatnonzero((counts == 0) & (ends > starts))
+    for first in range(0, len(short), FRAMES_PER_BLOCK):
+        block = short[first:first + FRAMES_PER_BLOCK]
+        centers = (starts[block] + ends[block]) // 2
+        sums[block] = _frame_power(signal, np.maximum(centers - nperseg // 2, 0), window, scale)
+        counts[block] = 1
+
+    result = np.zeros(len(starts), dtype=SPECTRAL_FEATURES_DTYPE)
+    result["start"], result["end"], result["frames"] = starts, ends, counts
+    for name in ("centroid", "peak_frequency", "bandwidth", "rolloff", "flatness"):
+        result[name] = np.nan
+    filled = counts > 0
+    power = sums[filled] / counts[filled, np.newaxis]
+    total = power.sum(axis=1)
+    centroid = power @ frequencies / total
+    result["centroid"][filled] = centroid
+    result["peak_frequency"][filled] = frequencies[np.argmax(power, axis=1)]
+    result["bandwidth"][filled] = np.sqrt(np.sum((frequencies - centroid[:, np.newaxis]) ** 2 * power, axis=1) / total)
+    cumulative = np.cumsum(power, axis=1)
+    rolloff = np.argmax(cumulative >= rolloff_percent * total[:, np.newaxis], axis=1)
+    result["rolloff"][filled] = frequencies[rolloff]
+    tiny = np.finfo(np.float64).tiny
+    result["flatness"][filled] = np.exp(np.mean(np.log(power + tiny), axis=1)) / (np.mean(power, axis=1) + tiny)
+    return result
@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.io import wavfile
-from scipy.signal import find_peaks
-from scipy.fftpack import fft
+
+from common.lazy import lazy_import
+from common.plotting import plot_signal
+from common.wavio import load_wav
+from lab3.features import segment_statistics
+
+plt = lazy_import("matplotlib.pyplot")
+scipy_signal = lazy_import("scipy.signal")
 
 
 class SignalSegmentationApp:
@@ -29,19 +34,13 @@ class SignalSegmentationApp:
         self.plot_button = ttk.Button(root, text="Показать графики", command=self.plot_signals)
         self.plot_button.pack(pady=10)
 
-        self.segments = None
         self.segment_boundaries = []
 
     def load_wav_file(self):
         self.filepath = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
         if self.filepath:
-            self.sampling_rate, data = wavfile.read(self.filepath)
-            if data.ndim > 1:
-                # Усредняем каналы, если сигнал многоканальный
-                self.signal = np.mean(data, axis=1)
-            else:
-                self.signal = data
-            self.signal = self.signal / np.max(np.abs(self.signal), axis=0)
+            # Усредняем каналы, если сигнал многоканальный, и нормализуем на месте в float32
+            self.sampling_rate, self.signal = load_wav(self.filepath, mix=True)
             print(f'Загружен файл: {self.filepath}')
             print(f'Частота дискретизации: {self.sampling_rate} Гц')
             print(f'Длина сигнала: {len(self.signal)} отсчетов')
@@ -56,10 +55,10 @@ class SignalSegmentationApp:
 
     def segment_signal(self):
         # Простой алгоритм сегментации по пикам
-        peaks, _ = find_peaks(self.signal, height=0.5, distance=self.sampling_rate // 2)
-        self.segment_boundaries = [0] + peaks.tolist() + [len(self.signal)]
-        self.segments = [self.signal[self.segment_boundaries[i]:self.segment_boundaries[i + 1]] for i in range(len(self.segment_boundaries) - 1)]
-        print(f'Найдено {len(self.segments)} сегментов')
+        peaks, _ = scipy_signal.find_peaks(self.signal, height=0.5, distance=self.sampling_rate // 2)
+        # Сегменты хранятся как массив границ: сегмент i - отсчеты [b[i], b[i + 1])
+        self.segment_boundaries = np.concatenate(([0], peaks, [len(self.signal)]))
+        print(f'Найдено {len(self.segment_boundaries) - 1} сегментов')
 
     def plot_signals(self):
         if self.signal is None:
@@ -69,30 +68,28 @@ class SignalSegmentationApp:
         # Построение исходного сигнала
         plt.figure()
         plt.subplot(2, 1, 1)
-        plt.plot(self.signal)
+        plot_signal(plt.gca(), self.signal)
         plt.title("Исходный сигнал")
 
         # Построение сегментированного сигнала
         plt.subplot(2, 1, 2)
         for boundary in self.segment_boundaries:
             plt.axvline(x=boundary, color='r')
-        plt.plot(self.signal)
+        plot_signal(plt.gca(), self.signal)
         plt.title("Сегментированный сигнал с метками границ")
 
         plt.tight_layout()
         plt.show()
 
     def compute_reference_vectors(self):
-        if not self.segments:
+        if len(self.segment_boundaries) < 2:
             print("Сегменты не найдены.")
             return
 
-        ref_vectors = []
-        for segment in self.segments:
-            # Пример вычисления эталонного вектора: математическое ожидание и дисперсия
-            mean = np.mean(segment)
-            variance = np.var(segment)
-            ref_vectors.append((mean, variance))
+        # Статистики всех сегментов считаются одним проходом по сигналу;
+        # эталонный вектор - математическое ожидание и дисперсия
+        ref_vectors = segment_statistics(self.signal, self.segment_boundaries)
+        for mean, variance in ref_vectors[["mean", "variance"]]:
             print(f'Эталонный вектор: {mean}, {variance}')
 
         return ref_vectors
@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
 
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.io import wavfile
-from scipy.signal import correlate, find_peaks
+
+from common.lazy import lazy_import
+from common.plotting import plot_signal
+from common.wavio import load_wav
+from lab3.correlation import match_templates
+from lab3.features import segment_statistics
+
+plt = lazy_import("matplotlib.pyplot")
 
 
 class SignalSegmentationApp:
@@ -23,29 +28,38 @@ class SignalSegmentationApp:
         self.model_button = ttk.Button(root, text="Моделировать сигнал", command=self.model_signal)
         self.model_button.pack(pady=10)
 
+        self.template_button = ttk.Button(root, text="Добавить шаблон из WAV", command=self.load_template)
+        self.template_button.pack(pady=10)
+
         self.segment_button = ttk.Button(root, text="Сегментировать сигнал", command=self.segment_signal)
         self.segment_button.pack(pady=10)
 
+        self.normalized_var = tk.BooleanVar(value=False)
+        self.normalized_check = ttk.Checkbutton(root, text="Нормированная корреляция", variable=self.normalized_var)
+        self.normalized_check.pack(pady=10)
+
         self.plot_button = ttk.Button(root, text="Показать графики", command=self.plot_signals)
         self.plot_button.pack(pady=10)
 
-        self.segments = None
         self.segment_boundaries = []
+        self.templates = []
 
     def load_wav_file(self):
         self.filepath = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
         if self.filepath:
-            self.sampling_rate, data = wavfile.read(self.filepath)
-            if data.ndim > 1:
-                # Усредняем каналы, если сигнал многоканальный
-                self.signal = np.mean(data, axis=1)
-            else:
-                self.signal = data
-            self.signal = self.signal / np.max(np.abs(self.signal), axis=0)
+            # Усредняем каналы, если сигнал многоканальный, и нормализуем на месте в float32
+            self.sampling_rate, self.signal = load_wav(self.filepath, mix=True)
             print(f'Загружен файл: {self.filepath}')
             print(f'Частота дискретизации: {self.sampling_rate} Гц')
             print(f'Длина сигнала: {len(self.signal)} отсчетов')
 
+    def load_template(self):
+        filepath = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
+        if filepath:
+            _, template = load_wav(filepath, mix=True)
+            self.templates.append(template)
+            print(f'Добавлен шаблон: {filepath}, длина {len(template)} отсчетов')
+
     def model_signal(self):
         duration = 5  # seconds
         self.sampling_rate = 44100  # Hz
@@ -61,12 +75,17 @@ class SignalSegmentationApp:
         template = 15 * np.cos(4 * np.pi * t) + 3 * np.cos(20 * np.pi * t)
         template = template / np.max(np.abs(template), axis=0)
 
-        correlation = correlate(self.signal, template, mode='valid')
-        peaks, _ = find_peaks(correlation, height=np.max(correlation) * 0.5)
+        # Все шаблоны коррелируются за один проход: спектр блока сигнала считается один раз
+        # и умножается на спектры всех шаблонов; нормированная корреляция не зависит от амплитуды сигнала
+        templates = [template] + self.templates
+        matches = match_templates(self.signal, templates, normalized=self.normalized_var.get())
+        for index, found in enumerate(matches):
+            print(f'Шаблон {index}: найдено {len(found)} вхождений')
+        peaks = np.unique(np.concatenate(matches))
 
-        self.segment_boundaries = [0] + peaks.tolist() + [len(self.signal)]
-        self.segments = [self.signal[self.segment_boundaries[i]:self.segment_boundaries[i + 1]] for i in range(len(self.segment_boundaries) - 1)]
-        print(f'Найдено {len(self.segments)} сегментов')
+        # Сегменты хранятся как массив границ: сегмент i - отсчеты [b[i], b[i + 1])
+        self.segment_boundaries = np.concatenate(([0], peaks, [len(self.signal)]))
+        print(f'Найдено {len(self.segment_boundaries) - 1} сегментов')
 
     def plot_signals(self):
         if self.signal is None:
@@ -76,30 +95,28 @@ class SignalSegmentationApp:
         # Построение исходного сигнала
         plt.figure()
         plt.subplot(2, 1, 1)
-        plt.plot(self.signal)
+        plot_signal(plt.gca(), self.signal)
         plt.title("Исходный сигнал")
 
         # Построение сегментированного сигнала
         plt.subplot(2, 1, 2)
         for boundary in self.segment_boundaries:
             plt.axvline(x=boundary, color='r')
-        plt.plot(self.signal)
+        plot_signal(plt.gca(), self.signal)
         plt.title("Сегментированный сигнал с метками границ")
 
         plt.tight_layout()
         plt.show()
 
     def compute_reference_vectors(self):
-        if not self.segments:
+        if len(self.segment_boundaries) < 2:
             print("Сегменты не найдены.")
             return
 
-        ref_vectors = []
-        for segment in self.segments:
-            # Пример вычисления эталонного вектора: математическое ожидание и дисперсия
-            mean = np.mean(segment)
-            variance = np.var(segment)
-            ref_vectors.append((mean, variance))
+        # Статистики всех сегментов считаются одним проходом по сигналу;
+        # эталонный вектор - математическое ожидание и дисперсия
+        ref_vectors = segment_statistics(self.signal, self.segment_boundaries)
+        for mean, variance in ref_vectors[["mean", "variance"]]:
             print(f'Эталонный вектор: {mean}, {variance}')
 
         return ref_vectors
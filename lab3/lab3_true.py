@@ -1,10 +1,24 @@
+import os
 import tkinter as tk
 from tkinter import filedialog
 
-import librosa
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.signal
+
+from common.cache import ArrayCache
+from common.lazy import lazy_import
+from common.plotting import plot_signal
+from common.wavio import load_audio
+from lab3.features import segment_spectral_features
+from lab3.library import ReferenceLibrary
+from lab3.segmentation import segment_energy
+
+plt = lazy_import("matplotlib.pyplot")
+
+SEGMENTATION_PARAMS = dict(window=512, high=1.5, low=1.0, min_duration=1024)
+FEATURE_NPERSEG = 1024
+# Версия сегментации и признаков в ключе кэша; увеличивается при изменении кода segment_energy,
+# segment_spectral_features или загрузки сигнала, чтобы не использовать старые результаты
+SEGMENTS_CACHE_VERSION = 2
 
 
 class SignalSegmentationApp:
@@ -21,10 +35,31 @@ class SignalSegmentationApp:
         self.segment_button = tk.Button(root, text="Segment Signal", command=self.segment_signal)
         self.segment_button.pack()
 
+        self.add_reference_button = tk.Button(root, text="Add to Library", command=self.add_to_library)
+        self.add_reference_button.pack()
+
+        self.classify_button = tk.Button(root, text="Classify Segments", command=self.classify_segments)
+        self.classify_button.pack()
+
+        self.save_library_button = tk.Button(root, text="Save Library", command=self.save_library)
+        self.save_library_button.pack()
+
+        self.load_library_button = tk.Button(root, text="Load Library", command=self.load_library)
+        self.load_library_button.pack()
+
+        self.library = ReferenceLibrary()
+        self.signal_name = None
+        self.file_path = None
+        self.reference_vectors = []
+        self.cache = ArrayCache()
+
     def load_wav_file(self):
         file_path = filedialog.askopenfilename()
         if file_path:
-            self.signal, self.sr = librosa.load(file_path, sr=None)
+            # WAV читается без librosa; она импортируется только для других форматов
+            self.sr, self.signal = load_audio(file_path)
+            self.signal_name = os.path.splitext(os.path.basename(file_path))[0]
+            self.file_path = file_path
             self.plot_signal(self.signal, title="Loaded Signal")
 
     def model_signal(self):
@@ -32,39 +67,64 @@ class SignalSegmentationApp:
         self.sr = 22050  # sample rate
         t = np.linspace(0, duration, int(self.sr*duration), endpoint=False)
         self.signal = 15 * np.cos(2 * 2 * np.pi * t) + 3 * np.cos(20 * np.pi * t)
+        self.signal_name = "model"
+        self.file_path = None
         self.plot_signal(self.signal, title="Modeled Signal")
 
+    def compute_segments(self):
+        # Порог - полтора средних уровня энергии кадров, окончание сегмента - ниже среднего уровня
+        segment_start_indices, segment_end_indices = segment_energy(self.signal, **SEGMENTATION_PARAMS)
+        # Спектры всех сегментов усредняются по кадрам одного общего STFT сигнала
+        features = segment_spectral_features(self.signal, self.sr, segment_start_indices, segment_end_indices,
+                                             nperseg=FEATURE_NPERSEG)
+        return {"starts": segment_start_indices, "ends": segment_end_indices, "features": features}
+
     def segment_signal(self):
-        energy = np.abs(self.signal) ** 2
-        threshold = np.mean(energy) * 1.5
-        segments = energy > threshold
-        segment_boundaries = np.diff(segments.astype(int))
-        segment_start_indices = np.where(segment_boundaries == 1)[0]
-        segment_end_indices = np.where(segment_boundaries == -1)[0]
+        # Для файла результат берется из кэша, если файл и параметры не менялись
+        if self.file_path:
+            params = dict(SEGMENTATION_PARAMS, nperseg=FEATURE_NPERSEG, sr=self.sr, version=SEGMENTS_CACHE_VERSION)
+            result = self.cache.get_or_compute(self.file_path, "energy_segments", params, self.compute_segments)
+        else:
+            result = self.compute_segments()
+        segment_start_indices, segment_end_indices, features = result["starts"], result["ends"], result["features"]
 
         self.plot_signal(self.signal, title="Segmented Signal", segment_boundaries=(segment_start_indices, segment_end_indices))
 
         self.reference_vectors = []
-        for start, end in zip(segment_start_indices, segment_end_indices):
-            segment = self.signal[start:end]
-            if len(segment) < 1024:
-                continue
-            avg_freq, peak_freq = self.calculate_spectral_features(segment)
-            if avg_freq is not None and peak_freq is not None:
-                self.reference_vectors.append((avg_freq, peak_freq))
-                print(f'Segment {start}-{end}: Avg Freq = {avg_freq}, Peak Freq = {peak_freq}')
-
-    def calculate_spectral_features(self, segment):
-        f, Pxx = scipy.signal.welch(segment, fs=self.sr, nperseg=1024)
-        if len(Pxx) == 0:
-            return None, None
-        avg_freq = np.sum(f * Pxx) / np.sum(Pxx)
-        peak_freq = f[np.argmax(Pxx)]
-        return avg_freq, peak_freq
+        for start, end, avg_freq, peak_freq in features[["start", "end", "centroid", "peak_frequency"]]:
+            self.reference_vectors.append((avg_freq, peak_freq))
+            print(f'Segment {start}-{end}: Avg Freq = {avg_freq}, Peak Freq = {peak_freq}')
+
+    def add_to_library(self):
+        if not self.reference_vectors:
+            print("No reference vectors: segment a signal first")
+            return
+        # Эталоны сегментов помечаются именем сигнала
+        self.library.add(self.reference_vectors, self.signal_name)
+        print(f'Library size: {len(self.library)} vectors')
+
+    def classify_segments(self):
+        if not self.reference_vectors or not len(self.library):
+            print("Segment a signal and fill the library first")
+            return
+        labels, distances = self.library.classify(self.reference_vectors, k=min(5, len(self.library)))
+        for index, (label, distance) in enumerate(zip(labels, distances)):
+            print(f'Segment {index}: {label} (distance {distance:.3f})')
+
+    def save_library(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".npz", filetypes=[("NumPy archive", "*.npz")])
+        if file_path and len(self.library):
+            self.library.save(file_path)
+
+    def load_library(self):
+        file_path = filedialog.askopenfilename(filetypes=[("NumPy archive", "*.npz")])
+        if file_path:
+            self.library = ReferenceLibrary.load(file_path)
+            print(f'Library size: {len(self.library)} vectors')
 
     def plot_signal(self, signal, title="Signal", segment_boundaries=None):
         plt.figure()
-        plt.plot(np.arange(len(signal)) / self.sr, signal)
+        plot_signal(plt.gca(), signal, self.sr)
         plt.title(title)
         if segment_boundaries:
             segment_start_indices, segment_end_indices = segment_boundaries
@@ -0,0 +1,202 @@
+"""
+Библиотека эталонных векторов признаков с пространственным индексом.
+
+Векторы хранятся вместе с метками, признаки приводятся к нулевому среднему и
+единичному разбросу (по библиотеке), поиск ближайших соседей и поиск в радиусе
+выполняется пакетно по KD-дереву (scipy.spatial.cKDTree). Для признаков большой
+размерности, где дерево не дает выигрыша, используется векторизованный полный
+перебор блоками. Библиотека сохраняется в файл .npz и загружается из него.
+"""
+import numpy as np
+
+from common.lazy import lazy_import
+
+scipy_spatial = lazy_import("scipy.spatial")
+
+# Начиная с этой размерности KD-дерево не быстрее полного перебора
+KDTREE_MAX_DIMENSIONS = 16
+# Число попарных расстояний, вычисляемых за один блок при полном переборе
+BRUTE_BLOCK_ELEMENTS = 1 << 24
+
+
+class ReferenceLibrary:
+    """
+    Набор эталонных векторов с метками и поиском ближайших соседей.
+    """
+    def __init__(self, vectors=None, labels=None, normalize=True, index="auto"):
+        """
+        :param vectors: начальные векторы формы (N, размерность)
+        :param labels: метки векторов (N,)
+        :param normalize: нормировать признаки по среднему и СКО библиотеки
+        :param index: "kdtree", "brute" или "auto" (дерево для малой размерности)
+        """
+        if index not in ("auto", "kdtree", "brute"):
+            raise ValueError(f"Неизвестный тип индекса: {index}")
+        self.normalize = normalize
+        self.index = index
+        self.vectors = None
+        self.labels = None
+        self._reset_index()
+        if vectors is not None:
+            self.add(vectors, labels)
+
+    def __len__(self):
+        return 0 if self.vectors is None else len(self.vectors)
+
+    def _reset_index(self):
+        self._mean = None
+        self._scale = None
+        self._normalized = None
+        self._tree = None
+
+    def add(self, vectors, labels):
+        """
+        Добавляет векторы в библиотеку; индекс перестраивается при следующем запросе.
+
+        :param vectors: векторы формы (N, размерность) или (размерность,)
+        :param labels: метки (N,) или одна метка для всех векторов
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        labels = np.asarray(labels)
+        if labels.ndim == 0:
+            labels = np.full(len(vectors), labels)
+        if len(labels) != len(vectors):
+            raise ValueError("Число меток не совпадает с числом векторов")
+        if self.vectors is not None and vectors.shape[1] != self.vectors.shape[1]:
+            raise ValueError("Размерность векторов не совпадает с размерностью библиотеки")
+
+        if self.vectors is None:
+            self.vectors, self.labels = vectors, labels
+        else:
+            self.vectors = np.concatenate((self.vectors, vectors))
+            self.labels = np.concatenate((self.labels, labels))
+        self._reset_index()
+
+    def _prepare(self):
+        """
+        Вычисляет нормировку и строит индекс, если библиотека изменилась.
+        """
+        if self._normalized is not None:
+            return
+        if not len(self):
+            raise ValueError("Библиотека пуста")
+        if self.normalize:
+            self._mean = self.vectors.mean(axis=0)
+            scale = self.vectors.std(axis=0)
+            self._scale = np.where(scale > 0, scale, 1.0)
+        else:
+            self._mean = np.zeros(self.vectors.shape[1])
+            self._scale = np.ones(self.vectors.shape[1])
+        self._normalized = (self.vectors - self._mean) / self._scale
+        if self._use_tree():
+            self._tree = scipy_spatial.cKDTree(self._normalized)
+
+    def _use_tree(self):
+        if self.index == "auto":
+            return self.vectors.shape[1] <= KDTREE_MAX_DIMENSIONS
+        return self.index == "kdtree"
+
+    def _transform(self, queries):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        if queries.shape[1] != self.vectors.shape[1]:
+            raise ValueError("Размерность запросов не совпадает с размерностью библиотеки")
+        return (queries - self._mean) / self._scale
+
+    def _brute_blocks(self, queries):
+        """
+        Квадраты расстояний от блоков запросов до всех векторов библиотеки.
+
+        :return: генератор пар (номер первого запроса блока, матрица квадратов расстояний)
+        """
+        library = self._normalized
+        library_norms = np.einsum("ij,ij->i", library, library)
+        block = max(BRUTE_BLOCK_ELEMENTS // len(library), 1)
+        for first in range(0, len(queries), block):
+            part = queries[first:first + block]
+            distances = np.einsum("ij,ij->i", part, part)[:, np.newaxis] + library_norms - 2.0 * part @ library.T
+            yield first, np.maximum(distances, 0.0, out=distances)
+
+    def query(self, queries, k=1):
+        """
+        Ищет k ближайших эталонов для каждого запроса.
+
+        :param queries: векторы запросов формы (M, размерность)
+        :param k: число соседей
+        :return: расстояния и индексы эталонов формы (M, k), по возрастанию расстояния
+                 (расстояния - в нормированном пространстве признаков)
+        """
+        self._prepare()
+        queries = self._transform(queries)
+        k = min(k, len(self))
+        if self._tree is not None:
+            distances, indices = self._tree.query(queries, k=k, workers=-1)
+            return distances.reshape(len(queries), k), indices.reshape(len(queries), k)
+
+        distances = np.empty((len(queries), k))
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        for first, block in self._brute_blocks(queries):
+            rows = np.arange(len(block))[:, np.newaxis]
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k < block.shape[1] else \
+                np.broadcast_to(np.arange(k), (len(block), k))
+            order = np.argsort(block[rows, nearest], axis=1)
+            nearest = nearest[rows, order]
+            distances[first:first + len(block)] = np.sqrt(block[rows, nearest])
+            indices[first:first + len(block)] = nearest
+        return distances, indices
+
+    def query_radius(self, queries, radius):
+        """
+        Ищет все эталоны на расстоянии не больше radius от каждого запроса.
+
+        :param queries: векторы запросов формы (M, размерность)
+        :param radius: радиус в нормированном пространстве признаков
+        :return: список из M массивов индексов эталонов
+        """
+        self._prepare()
+        queries = self._transform(queries)
+        if self._tree is not None:
+            found = self._tree.query_ball_point(queries, radius, workers=-1, return_sorted=True)
+            return [np.asarray(indices, dtype=np.int64) for indices in found]
+
+        result = []
+        for _, block in self._brute_blocks(queries):
+            rows, columns = np.nonzero(block <= radius * radius)
+            result.extend(np.split(columns, np.searchsorted(rows, np.arange(1, len(block)))))
+        return result
+
+    def classify(self, queries, k=1):
+        """
+        Классифицирует запросы голосованием k ближайших эталонов; при равенстве
+        голосов выбирается метка ближайшего из соседей-лидеров.
+
+        :param queries: векторы запросов формы (M, размерность)
+        :param k: число соседей
+        :return: метки (M,) и расстояния до ближайшего эталона (M,)
+        """
+        distances, indices = self.query(queries, k)
+        if indices.shape[1] == 1:
+            return self.labels[indices[:, 0]], distances[:, 0]
+        codes = np.unique(self.labels, return_inverse=True)[1].reshape(-1)[indices]
+        # Число голосов за метку каждого соседа; argmax выбирает первого (ближайшего) из лидеров
+        votes = np.sum(codes[:, :, np.newaxis] == codes[:, np.newaxis, :], axis=2)
+        winner = indices[np.arange(len(indices)), np.argmax(votes, axis=1)]
+        return self.labels[winner], distances[:, 0]
+
+    def save(self, path):
+        """
+        Сохраняет библиотеку в файл .npz.
+
+        :param path: путь к файлу
+        """
+        np.savez(path, vectors=self.vectors, labels=self.labels, normalize=self.normalize, index=self.index)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Загружает библиотеку из файла .npz.
+
+        :param path: путь к файлу
+        :return: ReferenceLibrary
+        """
+        with np.load(path) as data:
+            return cls(data["vectors"], data["labels"], bool(data["normalize"]), str(data["index"]))
@@ -0,0 +1,148 @@
+"""
+Потоковая сегментация сигнала по кратковременной энергии.
+
+Сигнал делится на кадры фиксированной длины, отсчитываемые от начала потока,
+поэтому разбиение на куски при подаче не влияет на результат. Для каждого кадра
+считается средняя энергия и обновляется опорный уровень - скользящее
+(накопленное) или экспоненциально взвешенное среднее энергии кадров. Сегмент
+начинается, когда энергия кадра превышает high * уровень, и заканчивается, когда
+она опускается ниже low * уровень (гистерезис). Короткие сегменты отбрасываются,
+близкие - объединяются. Память - O(длина кадра) плюс незавершенный сегмент.
+"""
+import numpy as np
+
+from common.lazy import lazy_import
+
+scipy_signal = lazy_import("scipy.signal")
+
+
+class OnlineEnergySegmenter:
+    """
+    Сегментатор, выдающий границы сегментов по мере поступления кусков сигнала.
+    """
+    def __init__(self, window=1024, high=1.5, low=1.0, alpha=None, min_duration=0, min_gap=0):
+        """
+        :param window: длина кадра в отсчетах
+        :param high: порог начала сегмента относительно опорного уровня энергии
+        :param low: порог окончания сегмента относительно опорного уровня (low <= high)
+        :param alpha: коэффициент экспоненциального сглаживания уровня (0 < alpha <= 1);
+                      None - накопленное среднее по всем кадрам
+        :param min_duration: минимальная длительность сегмента в отсчетах
+        :param min_gap: сегменты, разделенные промежутком короче этого, объединяются
+        """
+        if low > high:
+            raise ValueError("Порог окончания сегмента должен быть не больше порога начала")
+        self.window = window
+        self.high = high
+        self.low = low
+        self.alpha = alpha
+        self.min_duration = min_duration
+        self.min_gap = min_gap
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает состояние сегментатора.
+        """
+        self._pending = np.empty(0)
+        self._frames = 0
+        self._energy_sum = 0.0
+        self._level = None
+        self._start = None
+        self._last = None  # завершенный сегмент, ожидающий проверки промежутка
+
+    def _levels(self, energy):
+        """
+        Опорные уровни энергии для очередных кадров (с учетом самих кадров).
+        """
+        if self.alpha is None:
+            # Накопленная сумма продолжается последовательно, поэтому не зависит от разбиения на куски
+            cumulative = np.cumsum(np.concatenate(([self._energy_sum], energy)))[1:]
+            self._energy_sum = cumulative[-1]
+            return cumulative / (self._frames + np.arange(1, len(energy) + 1))
+        if self._level is None:
+            self._level = energy[0]
+        levels, _ = scipy_signal.lfilter([self.alpha], [1.0, self.alpha - 1.0], energy,
+                                         zi=[(1 - self.alpha) * self._level])
+        self._level = levels[-1]
+        return levels
+
+    def _close(self, start, end):
+        """
+        Завершает сегмент с учетом объединения близких сегментов.
+
+        :return: список сегментов, которые можно выдать
+        """
+        ready = []
+        if self._last is not None and start - self._last[1] < self.min_gap:
+            start = self._last[0]
+        elif self._last is not None:
+            ready = self._emit(self._last)
+        self._last = (start, end)
+        return ready
+
+    def _emit(self, segment):
+        return [segment] if segment[1] - segment[0] >= self.min_duration else []
+
+    def process(self, chunk):
+        """
+        Добавляет очередной кусок сигнала.
+
+        :param chunk: очередной кусок сигнала
+        :return: список завершенных сегментов (начало, конец) в отсчетах от начала потока
+        """
+        data = np.concatenate((self._pending, np.asarray(chunk, dtype=np.float64)))
+        count = len(data) // self.window
+        self._pending = data[count * self.window:]
+        if count == 0:
+            return []
+
+        energy = np.mean(data[:count * self.window].reshape(count, self.window) ** 2, axis=1)
+        levels = self._levels(energy)
+        segments = []
+        for i in range(count):
+            position = (self._frames + i) * self.window
+            if self._start is None:
+                if energy[i] > self.high * levels[i]:
+                    self._start = position
+            elif energy[i] < self.low * levels[i]:
+                segments.extend(self._close(self._start, position))
+                self._start = None
+            if self._last is not None and self._start is None and position - self._last[1] >= self.min_gap:
+                segments.extend(self._emit(self._last))
+                self._last = None
+        self._frames += count
+        return segments
+
+    def flush(self):
+        """
+        Завершает поток: закрывает открытый сегмент по концу последнего полного кадра.
+
+        :return: список оставшихся сегментов
+        """
+        segments = []
+        if self._start is not None:
+            segments.extend(self._close(self._start, self._frames * self.window))
+        if self._last is not None:
+            segments.extend(self._emit(self._last))
+        self.reset()
+        return segments
+
+
+def segment_energy(signal, chunk_size=None, **params):
+    """
+    Сегментирует конечный сигнал тем же алгоритмом, что и потоковый сегментатор.
+
+    :param signal: сигнал (одномерный массив)
+    :param chunk_size: размер подаваемых кусков; None - весь сигнал одним куском
+    :param params: параметры OnlineEnergySegmenter
+    :return: массивы начал и концов сегментов
+    """
+    segmenter = OnlineEnergySegmenter(**params)
+    chunk_size = chunk_size or max(len(signal), 1)
+    segments = []
+    for start in range(0, len(signal), chunk_size):
+        segments.extend(segmenter.process(signal[start:start + chunk_size]))
+    segments.extend(segmenter.flush())
+    bounds = np.array(segments, dtype=np.int64).reshape(-1, 2)
+    return bounds[:, 0], bounds[:, 1]
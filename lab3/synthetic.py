@@ -0,0 +1,241 @@
+"""
+Потоковый генератор синтетических сигналов для нагрузочной проверки сегментации.
+
+Сигнал - сумма тонов, периодических линейных ЛЧМ-сигналов, белого шума и тональных
+пачек (участков с известными границами - эталонной разметкой сегментов). Отсчеты
+выдаются кусками float32 по запросу, поэтому можно получить часы сигнала, не держа
+его в памяти. Каждый отсчет зависит только от своего номера и зерна: результат
+не зависит от того, какими кусками читается сигнал.
+
+Пример запуска из корня репозитория (час сигнала в WAV и разметка в CSV):
+
+    python -m lab3.synthetic --duration 3600 --preset bursts -o synthetic.wav --boundaries synthetic.csv
+"""
+import argparse
+import csv
+from collections import deque, namedtuple
+
+import numpy as np
+
+from common.wavio import WavWriter
+
+Tone = namedtuple("Tone", ["frequency", "amplitude"])
+Chirp = namedtuple("Chirp", ["start_frequency", "stop_frequency", "period", "amplitude"])
+Bursts = namedtuple("Bursts", ["frequency", "amplitude", "min_duration", "max_duration", "min_gap", "max_gap"])
+
+# Сигнал model_signal лабораторной 3: 15 cos(4 pi t) + 3 cos(20 pi t), нормированный по максимуму
+MODEL_TONES = (Tone(2.0, 15.0 / 18.0), Tone(10.0, 3.0 / 18.0))
+
+# Шум генерируется блоками фиксированной длины со своим зерном у каждого блока
+NOISE_BLOCK_SIZE = 1 << 16
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class SignalGenerator:
+    """
+    Генератор сигнала, читаемого кусками по порядку.
+    """
+    def __init__(self, samplerate, duration=None, tones=(), chirps=(), noise=0.0, bursts=None, seed=0,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param samplerate: частота дискретизации
+        :param duration: длительность в секундах; None - бесконечный сигнал
+        :param tones: последовательность Tone (частота в Гц, амплитуда)
+        :param chirps: последовательность Chirp (начальная и конечная частота, период в секундах, амплитуда)
+        :param noise: СКО белого гауссовского шума
+        :param bursts: параметры тональных пачек Bursts (длительности и промежутки в секундах) или None
+        :param seed: зерно генератора случайных чисел
+        :param chunk_size: размер куска при итерации
+        """
+        self.samplerate = samplerate
+        self.total = None if duration is None else int(round(duration * samplerate))
+        self.tones = tuple(tones)
+        self.chirps = tuple(chirps)
+        self.noise = noise
+        self.bursts = bursts
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.reset()
+
+    def reset(self):
+        """
+        Возвращает генератор к началу сигнала.
+        """
+        self.position = 0
+        self._noise_cache = (None, None)
+        self._schedule = _burst_schedule(self.bursts, self.samplerate, self.seed) if self.bursts else None
+        self._pending = deque()  # пачки, которые еще не закончились к текущей позиции
+        self._next_burst = None
+
+    def _noise_block(self, index):
+        cached_index, block = self._noise_cache
+        if cached_index != index:
+            block = np.random.default_rng([self.seed, 0, index]).standard_normal(NOISE_BLOCK_SIZE)
+            self._noise_cache = (index, block)
+        return block
+
+    def _add_noise(self, out, start):
+        stop = start + len(out)
+        for index in range(start // NOISE_BLOCK_SIZE, (stop - 1) // NOISE_BLOCK_SIZE + 1):
+            block_start = index * NOISE_BLOCK_SIZE
+            first, last = max(start, block_start), min(stop, block_start + NOISE_BLOCK_SIZE)
+            block = self._noise_block(index)[first - block_start:last - block_start]
+            out[first - start:last - start] += self.noise * block
+
+    def _add_bursts(self, out, start):
+        stop = start + len(out)
+        # Пачки из расписания добавляются, пока их начало попадает в текущий кусок
+        while True:
+            if self._next_burst is None:
+                self._next_burst = next(self._schedule)
+            if self._next_burst[0] >= stop:
+                break
+            self._pending.append(self._next_burst)
+            self._next_burst = None
+        while self._pending and self._pending[0][1] <= start:
+            self._pending.popleft()
+
+        omega = 2 * np.pi * self.bursts.frequency / self.samplerate
+        for burst_start, burst_end in self._pending:
+            first, last = max(start, burst_start), min(stop, burst_end)
+            if first < last:
+                phase = np.arange(first - burst_start, last - burst_start) * omega
+                out[first - start:last - start] += self.bursts.amplitude * np.sin(phase)
+
+    def read(self, n):
+        """
+        Генерирует следующие n отсчетов.
+
+        :param n: число отсчетов
+        :return: массив float32 (короче n в конце сигнала, пустой после конца)
+        """
+        if self.total is not None:
+            n = max(min(n, self.total - self.position), 0)
+        start = self.position
+        out = np.zeros(n, dtype=np.float64)
+        if n:
+            t = np.arange(start, start + n, dtype=np.float64) / self.samplerate
+            for frequency, amplitude in self.tones:
+                out += amplitude * np.cos(2 * np.pi * frequency * t)
+            for start_frequency, stop_frequency, period, amplitude in self.chirps:
+                tau = np.mod(t, period)
+                sweep = (stop_frequency - start_frequency) / period
+                out += amplitude * np.cos(2 * np.pi * (start_frequency * tau + 0.5 * sweep * tau * tau))
+            if self.noise:
+                self._add_noise(out, start)
+            if self._schedule is not None:
+                self._add_bursts(out, start)
+        self.position += n
+        return out.astype(np.float32)
+
+    def __iter__(self):
+        """
+        Перебирает сигнал кусками chunk_size до конца (для бесконечного сигнала - без конца).
+        """
+        while True:
+            chunk = self.read(self.chunk_size)
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+    def ground_truth(self):
+        """
+        Эталонные границы пачек на всей длительности сигнала (без генерации отсчетов).
+
+        :return: массивы начал и концов пачек в отсчетах
+        """
+        if self.total is None:
+            raise ValueError("Разметка доступна только для сигнала конечной длительности")
+        if not self.bursts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        events = []
+        for burst_start, burst_end in _burst_schedule(self.bursts, self.samplerate, self.seed):
+            if burst_start >= self.total:
+                break
+            events.append((burst_start, min(burst_end, self.total)))
+        bounds = np.array(events, dtype=np.int64).reshape(-1, 2)
+        return bounds[:, 0], bounds[:, 1]
+
+    def write_wav(self, path):
+        """
+        Записывает весь сигнал в WAV (float32) кусками chunk_size.
+
+        :param path: путь к выходному файлу
+        """
+        if self.total is None:
+            raise ValueError("В файл можно записать только сигнал конечной длительности")
+        self.reset()
+        with WavWriter(path, self.samplerate) as writer:
+            for chunk in self:
+                writer.write(chunk)
+
+
+def _burst_schedule(bursts, samplerate, seed):
+    """
+    Бесконечная последовательность пачек (начало, конец) в отсчетах: промежутки и длительности
+    равномерно распределены в заданных пределах и вычисляются по порядку из отдельного потока случайных чисел.
+    """
+    rng = np.random.default_rng([seed, 1])
+    position = 0
+    while True:
+        gap = rng.uniform(bursts.min_gap, bursts.max_gap)
+        duration = rng.uniform(bursts.min_duration, bursts.max_duration)
+        start = position + int(round(gap * samplerate))
+        position = start + max(int(round(duration * samplerate)), 1)
+        yield start, position
+
+
+def model_generator(samplerate=44100, duration=5.0, **kwargs):
+    """
+    Генератор сигнала model_signal лабораторной 3 произвольной длительности.
+
+    :param samplerate: частота дискретизации
+    :param duration: длительность в секундах
+    :param kwargs: прочие параметры SignalGenerator (шум, пачки, зерно)
+    :return: SignalGenerator
+    """
+    return SignalGenerator(samplerate, duration, tones=MODEL_TONES, **kwargs)
+
+
+def bursts_generator(samplerate=22050, duration=60.0, seed=0, **kwargs):
+    """
+    Генератор для проверки сегментации по энергии: шум с тональными пачками 0.2-1 с
+    через промежутки 0.5-3 с.
+
+    :param samplerate: частота дискретизации
+    :param duration: длительность в секундах
+    :param seed: зерно генератора случайных чисел
+    :param kwargs: прочие параметры SignalGenerator
+    :return: SignalGenerator
+    """
+    kwargs.setdefault("noise", 0.1)
+    kwargs.setdefault("bursts", Bursts(1000.0, 1.0, 0.2, 1.0, 0.5, 3.0))
+    return SignalGenerator(samplerate, duration, seed=seed, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетического сигнала с эталонной разметкой")
+    parser.add_argument("--preset", choices=["model", "bursts"], default="bursts", help="семейство сигнала")
+    parser.add_argument("--duration", type=float, default=60.0, help="длительность, с")
+    parser.add_argument("--samplerate", type=int, default=22050, help="частота дискретизации")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument("-o", "--output", required=True, help="выходной WAV файл")
+    parser.add_argument("--boundaries", default=None, help="CSV файл для эталонных границ сегментов")
+    args = parser.parse_args(argv)
+
+    make = model_generator if args.preset == "model" else bursts_generator
+    generator = make(args.samplerate, args.duration, seed=args.seed)
+    generator.write_wav(args.output)
+    print(f"Записано {generator.total} отсчетов: {args.output}")
+
+    if args.boundaries:
+        starts, ends = generator.ground_truth()
+        with open(args.boundaries, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["start", "end"])
+            writer.writerows(zip(starts.tolist(), ends.tolist()))
+        print(f"Сегментов в разметке: {len(starts)}: {args.boundaries}")
+
+
+if __name__ == "__main__":
+    main()
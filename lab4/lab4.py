@@ -1,9 +1,11 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
-import cv2
-import numpy as np
-from PIL import Image, ImageTk
+from common.lazy import lazy_import
+from common.pointops import PointPipeline
+from common.preview import ImageViewer, PreviewPyramid, screen_size
+
+cv2 = lazy_import("cv2")
 
 
 class ImageProcessingApp:
@@ -13,6 +15,12 @@ class ImageProcessingApp:
 
         self.image = None
         self.processed_image = None
+        # Для показа обработка выполняется над уменьшенной до размера экрана копией,
+        # изображение в полном разрешении вычисляется только при сохранении
+        self.pyramid = None
+        self.preview = None
+        # Операции над загруженным изображением накапливаются в конвейере и выполняются за один проход
+        self.pipeline = PointPipeline()
 
         self.load_button = ttk.Button(root, text="Загрузить изображение", command=self.load_image)
         self.load_button.pack(pady=10)
@@ -38,8 +46,8 @@ class ImageProcessingApp:
         self.power_transform_lt1_button = ttk.Button(root, text="Степенное преобразование (y < 1)", command=lambda: self.power_transform(0.5))
         self.power_transform_lt1_button.pack(pady=10)
 
-        self.image_label = ttk.Label(root)
-        self.image_label.pack(pady=10)
+        self.viewer = ImageViewer(root, 800, 500)
+        self.viewer.pack(pady=10)
 
     def load_image(self):
         filetypes = [
@@ -53,11 +61,15 @@ class ImageProcessingApp:
             if self.image is None:
                 messagebox.showerror("Ошибка", "Не удалось загрузить изображение. Пожалуйста, убедитесь, что файл существует и имеет корректный формат.")
             else:
-                self.display_image(self.image)
+                self.pipeline = PointPipeline()
+                self.processed_image = None
+                self.pyramid = PreviewPyramid(self.image)
+                self.preview = self.pyramid.fit(*screen_size(self.root))
+                self.display_image(self.pyramid)
                 print(f'Загружено изображение: {filepath}')
 
     def save_image(self):
-        if self.processed_image is None:
+        if self.image is None or len(self.pipeline) == 0:
             messagebox.showerror("Ошибка", "Нет обработанного изображения для сохранения.")
             return
 
@@ -68,6 +80,7 @@ class ImageProcessingApp:
         ]
         filepath = filedialog.asksaveasfilename(filetypes=filetypes)
         if filepath:
+            self.processed_image = self.pipeline(self.image, out=self.processed_image)
             cv2.imwrite(filepath, self.processed_image)
             print(f'Изображение сохранено: {filepath}')
 
@@ -75,46 +88,43 @@ class ImageProcessingApp:
         if self.image is None:
             messagebox.showerror("Ошибка", "Пожалуйста, загрузите изображение.")
             return
-        self.processed_image = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
-        self.display_image(self.processed_image)
+        self.pipeline = PointPipeline().gray()
+        self.run_pipeline()
 
     def convert_to_binary(self):
-        if self.processed_image is None:
+        if self.image is None or len(self.pipeline) == 0:
             messagebox.showerror("Ошибка", "Пожалуйста, преобразуйте изображение в полутоновое.")
             return
-        _, self.processed_image = cv2.threshold(self.processed_image, 127, 255, cv2.THRESH_BINARY)
-        self.display_image(self.processed_image)
+        self.pipeline.threshold(127, 255)
+        self.run_pipeline()
 
     def convert_to_negative(self):
         if self.image is None:
             messagebox.showerror("Ошибка", "Пожалуйста, загрузите изображение.")
             return
-        self.processed_image = cv2.bitwise_not(self.image)
-        self.display_image(self.processed_image)
+        self.pipeline.negative()
+        self.run_pipeline()
 
     def log_transform(self):
         if self.image is None:
             messagebox.showerror("Ошибка", "Пожалуйста, загрузите изображение.")
             return
-        c = 255 / np.log(1 + np.max(self.image))
-        image_log = np.where(self.image == 0, 1, self.image)  # Заменяем нули на единицы, чтобы избежать деления на ноль
-        self.processed_image = (c * (np.log(1 + image_log))).astype(np.uint8)
-        self.display_image(self.processed_image)
+        self.pipeline.then("log")
+        self.run_pipeline()
 
     def power_transform(self, gamma):
         if self.image is None:
             messagebox.showerror("Ошибка", "Пожалуйста, загрузите изображение.")
             return
-        self.processed_image = np.array(255 * (self.image / 255) ** gamma, dtype=np.uint8)
-        self.display_image(self.processed_image)
-
-    def display_image(self, image):
-        if len(image.shape) == 2:
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        image = Image.fromarray(image)
-        image_tk = ImageTk.PhotoImage(image)
-        self.image_label.config(image=image_tk)
-        self.image_label.image = image_tk
+        self.pipeline.then("power", gamma=gamma)
+        self.run_pipeline()
+
+    def run_pipeline(self):
+        # Для показа вся цепочка пересчитывается от уменьшенной копии исходного изображения
+        self.display_image(self.pipeline(self.preview), keep_view=True)
+
+    def display_image(self, image, keep_view=False):
+        self.viewer.show(image, keep_view)
 
 
 if __name__ == "__main__":
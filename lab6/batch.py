@@ -0,0 +1,263 @@
+"""
+Пакетная обработка изображений операциями лабораторных 4 и 6 без графического интерфейса.
+
+Список файлов делится на порции, каждая порция обрабатывается задачей в пуле процессов.
+Внутри задачи декодирование следующих файлов идет в отдельном потоке заранее,
+а кодирование и запись результатов - в другом потоке, пока обрабатывается следующее
+изображение. Для каждой стадии (декодирование, обработка, кодирование) печатается
+число изображений в секунду; по завершении записывается сводный CSV по файлам.
+Результаты раскладываются по подкаталогам, повторяющим расположение исходных файлов
+относительно их общего каталога; если два файла все равно дают один путь результата
+(например, photo.jpg и photo.png с --format png), обработка не начинается.
+
+Пример запуска из корня репозитория:
+
+    python -m lab6.batch photos/ -p gray -p threshold:127 -p negative -o out/
+    python -m lab6.batch "photos/*.jpg" -p noise:gaussian,25 -p median:5 -p gamma:0.66 -o out/ --format png
+"""
+import argparse
+import csv
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from common.lazy import lazy_import
+from lab6.operations import OPERATION_NAMES, NoiseSource, compile_chain, parse_operation, run_chain
+
+cv2 = lazy_import("cv2")
+
+IMAGE_EXTENSIONS = (".bmp", ".jpg", ".jpeg", ".png", ".tif", ".tiff")
+STAGES = ["decode", "process", "encode"]
+SUMMARY_FIELDS = (["input", "output", "width", "height", "channels"] + [f"{stage}_seconds" for stage in STAGES]
+                  + ["error"])
+
+
+def collect_inputs(patterns):
+    """
+    Собирает список изображений по путям, каталогам и шаблонам glob.
+
+    :param patterns: список путей, каталогов или шаблонов
+    :return: отсортированный список путей без повторов
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        paths.update(path for path in glob.glob(pattern)
+                     if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+
+def decode_image(path, grayscale=False):
+    """
+    Читает и декодирует изображение (через imdecode, чтобы работали пути не в ASCII).
+
+    :return: (изображение, время в секундах)
+    """
+    start = time.perf_counter()
+    flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("не удалось декодировать изображение")
+    return image, time.perf_counter() - start
+
+
+def encode_image(image, path):
+    """
+    Кодирует изображение по расширению пути и записывает файл.
+
+    :return: время в секундах
+    """
+    start = time.perf_counter()
+    ok, data = cv2.imencode(os.path.splitext(path)[1], image)
+    if not ok:
+        raise ValueError("не удалось закодировать изображение")
+    data.tofile(path)
+    return time.perf_counter() - start
+
+
+def output_paths(inputs, output_dir, extension=None):
+    """
+    Пути результатов: ``<output_dir>/<каталог файла относительно общего каталога всех файлов>/<имя>``.
+
+    :param inputs: список путей к изображениям
+    :param output_dir: каталог для результатов
+    :param extension: формат результата (по умолчанию - как у исходного файла)
+    :return: список путей в порядке inputs
+    :raises ValueError: если два файла дают один путь результата
+    """
+    directories = [os.path.dirname(os.path.abspath(path)) for path in inputs]
+    base = os.path.commonpath(directories) if directories else ""
+    paths = []
+    owners = {}
+    for path, directory in zip(inputs, directories):
+        stem, original = os.path.splitext(os.path.basename(path))
+        name = stem + (f".{extension.lstrip('.')}" if extension else original)
+        result = os.path.normpath(os.path.join(output_dir, os.path.relpath(directory, base), name))
+        key = os.path.normcase(result)
+        if key in owners:
+            raise ValueError(f"{owners[key]} и {path} записали бы результат в один файл {result}")
+        owners[key] = path
+        paths.append(result)
+    return paths
+
+
+def _init_worker():
+    # Параллельность дает пул процессов; внутренние потоки OpenCV только конкурировали бы с ним
+    cv2.setNumThreads(1)
+
+
+def process_files(items, operations, grayscale=False, seed=0, prefetch=2):
+    """
+    Обрабатывает порцию файлов; выполняется в процессе пула.
+
+    :param items: список троек (номер файла во всем списке, путь, путь результата)
+    :param operations: последовательность Operation
+    :param grayscale: читать изображения как полутоновые
+    :param seed: зерно шума; генератор каждого файла зависит от зерна и номера файла
+    :param prefetch: сколько файлов декодировать заранее
+    :return: список словарей со строками сводной таблицы в порядке items
+    """
+    stages = compile_chain(operations)
+    prefetch = max(prefetch, 1)
+    rows = []
+    with ThreadPoolExecutor(max_workers=1) as decoder, ThreadPoolExecutor(max_workers=1) as encoder:
+        decodes = deque(decoder.submit(decode_image, path, grayscale) for _, path, _ in items[:prefetch])
+        encodes = []
+        for position, (index, path, result_path) in enumerate(items):
+            decoded = decodes.popleft()
+            if position + prefetch < len(items):
+                decodes.append(decoder.submit(decode_image, items[position + prefetch][1], grayscale))
+
+            row = dict.fromkeys(SUMMARY_FIELDS, "")
+            row.update(input=path, output=result_path)
+            rows.append(row)
+            try:
+                os.makedirs(os.path.dirname(result_path) or ".", exist_ok=True)
+                image, row["decode_seconds"] = decoded.result()
+                start = time.perf_counter()
+                result = run_chain(stages, image, NoiseSource((seed, index)))
+                row["process_seconds"] = time.perf_counter() - start
+                row.update(height=result.shape[0], width=result.shape[1],
+                           channels=1 if result.ndim == 2 else result.shape[2])
+                encodes.append((row, encoder.submit(encode_image, result, row["output"])))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+
+        for row, future in encodes:
+            try:
+                row["encode_seconds"] = future.result()
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+    return rows
+
+
+def run_batch(inputs, operations, output_dir, workers=None, chunk_size=None, extension=None, **options):
+    """
+    Обрабатывает все файлы в пуле процессов.
+
+    :param inputs: список путей к изображениям
+    :param operations: последовательность Operation
+    :param output_dir: каталог для результатов
+    :param workers: число процессов (по умолчанию - число ядер)
+    :param chunk_size: число файлов в задаче (по умолчанию - около четырех задач на процесс)
+    :param extension: формат результатов (по умолчанию - как у исходного файла)
+    :param options: параметры process_files (grayscale, seed, prefetch)
+    :return: список строк сводной таблицы в порядке входных файлов
+    :raises ValueError: если два файла дают один путь результата
+    """
+    paths = output_paths(inputs, output_dir, extension)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(len(inputs) // (workers * 4), 1)
+    items = [(index, path, result_path) for index, (path, result_path) in enumerate(zip(inputs, paths))]
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    rows = [None] * len(inputs)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(process_files, chunk, operations, **options): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            for (index, _, _), row in zip(futures[future], future.result()):
+                rows[index] = row
+                done += 1
+                status = row["error"] or "готово"
+                print(f'[{done}/{len(inputs)}] {row["input"]} -> {row["output"]}: {status}')
+    return rows
+
+
+def stage_rates(rows):
+    """
+    Скорость каждой стадии: число изображений на секунду суммарного времени стадии
+    (то есть скорость одного потока; в пуле стадии разных процессов идут одновременно).
+
+    :param rows: строки сводной таблицы
+    :return: словарь {стадия: изображений в секунду}
+    """
+    rates = {}
+    for stage in STAGES:
+        times = [row[f"{stage}_seconds"] for row in rows if row[f"{stage}_seconds"] != ""]
+        total = sum(times)
+        rates[stage] = len(times) / total if total > 0 else float("nan")
+    return rates
+
+
+def write_summary(rows, path):
+    """
+    Записывает сводную таблицу в CSV.
+
+    :param rows: список строк, возвращенных process_files
+    :param path: путь к CSV файлу
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная обработка изображений операциями лабораторных 4 и 6")
+    parser.add_argument("inputs", nargs="+", help="изображения, каталоги или шаблоны glob")
+    parser.add_argument("-p", "--op", dest="operations", action="append", type=parse_operation, default=[],
+                        metavar="OP", help=f"операция имя[:арг,...], по порядку; имена: {', '.join(OPERATION_NAMES)}")
+    parser.add_argument("-o", "--output-dir", default="processed", help="каталог для результатов")
+    parser.add_argument("--format", default=None, help="формат результатов (png, jpg, bmp...), по умолчанию исходный")
+    parser.add_argument("--grayscale", action="store_true", help="читать изображения как полутоновые")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="число файлов в одной задаче пула")
+    parser.add_argument("--prefetch", type=int, default=2, help="сколько файлов декодировать заранее")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора шума")
+    parser.add_argument("--summary", default=None, help="путь к сводному CSV (по умолчанию <output-dir>/summary.csv)")
+    args = parser.parse_args(argv)
+
+    if not args.operations:
+        parser.error("не задано ни одной операции (-p)")
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        parser.error("не найдено ни одного изображения")
+
+    start = time.perf_counter()
+    try:
+        rows = run_batch(inputs, args.operations, args.output_dir, args.jobs, args.chunk_size, extension=args.format,
+                         grayscale=args.grayscale, seed=args.seed, prefetch=args.prefetch)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.csv")
+    write_summary(rows, summary_path)
+
+    for stage, rate in stage_rates(rows).items():
+        print(f"{stage:>8}: {rate:9.1f} изобр./с на поток")
+    failed = sum(1 for row in rows if row["error"])
+    print(f"Обработано изображений: {len(rows)}, с ошибками: {failed}, общее время: {elapsed:.2f} с "
+          f"({len(rows) / elapsed:.1f} изобр./с). Сводка: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,15 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, messagebox
 from tkinter import ttk
-from PIL import Image, ImageTk
-import cv2
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+from common.lazy import lazy_import
+from common.pointops import transform_image
+from common.preview import ImageViewer, PreviewPyramid, screen_size
+
+cv2 = lazy_import("cv2")
+plt = lazy_import("matplotlib.pyplot")
 
 
 class ImageProcessingApp:
@@ -13,8 +18,15 @@ class ImageProcessingApp:
         self.root.title("Обработка изображений")
 
         self.image = None
+        # noisy_image и processed_image - результаты для показа, полученные из уменьшенной
+        # до размера экрана копии preview; в полном разрешении они вычисляются при сохранении
+        self.preview = None
         self.noisy_image = None
         self.processed_image = None
+        # Зерно шума: при сохранении в полном разрешении шум генерируется с тем же зерном, что и для показа
+        self.noise_seed = None
+        self.filter_type = None
+        self.contrast_methods = []
 
         # UI Elements
         self.load_button = ttk.Button(root, text="Загрузить изображение", command=self.load_image)
@@ -45,81 +57,107 @@ class ImageProcessingApp:
         self.contrast_button = ttk.Button(root, text="Повысить контраст", command=self.enhance_contrast)
         self.contrast_button.pack(pady=10)
 
-        self.image_label = ttk.Label(root)
-        self.image_label.pack(pady=10)
+        self.save_button = ttk.Button(root, text="Сохранить изображение", command=self.save_image)
+        self.save_button.pack(pady=10)
+
+        self.viewer = ImageViewer(root, 800, 500)
+        self.viewer.pack(pady=10)
 
     def load_image(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.jpg;*.jpeg;*.png;*.bmp")])
         if file_path:
             self.image = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
-            self.display_image(self.image)
+            pyramid = PreviewPyramid(self.image)
+            self.preview = pyramid.fit(*screen_size(self.root))
+            self.noisy_image = self.processed_image = None
+            self.display_image(pyramid)
 
-    def display_image(self, img):
-        img = Image.fromarray(img)
-        img_tk = ImageTk.PhotoImage(image=img)
-        self.image_label.img_tk = img_tk
-        self.image_label.configure(image=img_tk)
+    def display_image(self, img, keep_view=False):
+        self.viewer.show(img, keep_view)
 
     def add_noise(self):
         if self.image is not None:
-            row, col = self.image.shape
-            mean = 0
-            sigma = 25
-            gauss = np.random.normal(mean, sigma, (row, col))
-            gauss = gauss.reshape(row, col)
-            noisy = self.image + gauss
-            self.noisy_image = np.clip(noisy, 0, 255).astype(np.uint8)
-            self.display_image(self.noisy_image)
+            self.noise_seed = np.random.SeedSequence().entropy
+            self.noisy_image = self.noise(self.preview)
+            # Прежний результат фильтрации получен из шума с другим зерном - его нужно получить заново
+            self.processed_image = None
+            self.filter_type, self.contrast_methods = None, []
+            self.display_image(self.noisy_image, keep_view=True)
 
     def apply_filter(self):
         if self.noisy_image is not None:
             filter_type = self.filter_var.get()
-            if filter_type == "НЧ фильтр":
-                self.processed_image = cv2.GaussianBlur(self.noisy_image, (5, 5), 0)
-            elif filter_type == "ВЧ фильтр":
-                kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]])
-                self.processed_image = cv2.filter2D(self.noisy_image, -1, kernel)
-            elif filter_type == "Медианный фильтр":
-                self.processed_image = cv2.medianBlur(self.noisy_image, 5)
-            self.display_image(self.processed_image)
+            processed = self.filter(self.noisy_image, filter_type)
+            if processed is None:
+                return
+            self.filter_type, self.contrast_methods = filter_type, []
+            self.processed_image = processed
+            self.display_image(self.processed_image, keep_view=True)
 
     def enhance_contrast(self):
         if self.processed_image is not None:
             method = self.contrast_var.get()
-            if method == "Линейная":
-                self.processed_image = cv2.equalizeHist(self.processed_image)
-            elif method == "Экспоненциальная":
-                self.processed_image = self.exponential_contrast(self.processed_image)
-            elif method == "Рэлея":
-                self.processed_image = self.rayleigh_contrast(self.processed_image)
-            elif method == "Степени 2/3":
-                self.processed_image = self.gamma_contrast(self.processed_image, gamma=2/3)
-            elif method == "Гиперболическая":
-                self.processed_image = self.hyperbolic_contrast(self.processed_image)
-            self.display_image(self.processed_image)
+            self.contrast_methods.append(method)
+            self.processed_image = self.contrast(self.processed_image, method)
+            self.display_image(self.processed_image, keep_view=True)
+
+    def save_image(self):
+        if self.processed_image is None:
+            messagebox.showerror("Ошибка", "Нет обработанного изображения для сохранения.")
+            return
+        filepath = filedialog.asksaveasfilename(defaultextension=".png",
+                                                filetypes=[("Image files", "*.png;*.jpg;*.jpeg;*.bmp")])
+        if filepath:
+            # Та же последовательность операций над изображением в полном разрешении
+            image = self.filter(self.noise(self.image), self.filter_type)
+            for method in self.contrast_methods:
+                image = self.contrast(image, method)
+            cv2.imwrite(filepath, image)
+            print(f'Изображение сохранено: {filepath}')
+
+    def noise(self, img):
+        row, col = img.shape
+        mean = 0
+        sigma = 25
+        gauss = np.random.default_rng(self.noise_seed).normal(mean, sigma, (row, col))
+        gauss = gauss.reshape(row, col)
+        noisy = img + gauss
+        return np.clip(noisy, 0, 255).astype(np.uint8)
+
+    def filter(self, img, filter_type):
+        if filter_type == "НЧ фильтр":
+            return cv2.GaussianBlur(img, (5, 5), 0)
+        elif filter_type == "ВЧ фильтр":
+            kernel = np.array([[0, -1, 0], [-1, 5,-1], [0, -1, 0]])
+            return cv2.filter2D(img, -1, kernel)
+        elif filter_type == "Медианный фильтр":
+            return cv2.medianBlur(img, 5)
+        return None
+
+    def contrast(self, img, method):
+        if method == "Линейная":
+            return cv2.equalizeHist(img)
+        elif method == "Экспоненциальная":
+            return self.exponential_contrast(img)
+        elif method == "Рэлея":
+            return self.rayleigh_contrast(img)
+        elif method == "Степени 2/3":
+            return self.gamma_contrast(img, gamma=2/3)
+        elif method == "Гиперболическая":
+            return self.hyperbolic_contrast(img)
+        return img
 
     def exponential_contrast(self, img):
-        img = img / 255.0
-        img = np.exp(img) - 1
-        img = np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
-        return img
+        return transform_image(img, "exponential")
 
     def rayleigh_contrast(self, img):
-        img = img / 255.0
-        img = img ** 2
-        img = np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
-        return img
+        return transform_image(img, "rayleigh")
 
     def gamma_contrast(self, img, gamma):
-        inv_gamma = 1.0 / gamma
-        table = np.array([((i / 255.0) ** inv_gamma) * 255 for i in np.arange(0, 256)]).astype(np.uint8)
-        return cv2.LUT(img, table)
+        return transform_image(img, "gamma", gamma=gamma)
 
     def hyperbolic_contrast(self, img):
-        img = img / 255.0
-        img = np.tanh(img)
-        img = np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
-        return img
+        return transform_image(img, "hyperbolic")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
-import cv2
+
 import numpy as np
-import matplotlib.pyplot as plt
-from skimage import exposure
+
+from common.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+plt = lazy_import("matplotlib.pyplot")
+exposure = lazy_import("skimage.exposure")
 
 
 class ImageProcessingApp:
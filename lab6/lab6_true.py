@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import Toplevel, filedialog, messagebox
 
-import cv2
 import numpy as np
-from PIL import Image, ImageTk
+
+from common.lazy import lazy_import
+from common.pointops import transform_image
+from common.preview import ImageViewer, PreviewPyramid, screen_size
+
+cv2 = lazy_import("cv2")
 
 
 class ImageProcessorApp:
@@ -13,7 +17,13 @@ class ImageProcessorApp:
         self.root.geometry("800x600")
 
         self.image = None
+        # Уменьшенная до размера экрана копия изображения: обработка для показа идет по ней,
+        # а в полном разрешении - только при сохранении результата
+        self.preview = None
         self.processed_image = None
+        self.noise_seed = None
+        # (изображение, зерно, зашумленное изображение в полном разрешении) для сохранения результатов
+        self._full_noisy = None
 
         self.load_button = tk.Button(root, text="Load Image", command=self.load_image)
         self.load_button.pack()
@@ -33,24 +43,57 @@ class ImageProcessorApp:
         self.contrast_button = tk.Button(root, text="Enhance Contrast", command=self.enhance_contrast)
         self.contrast_button.pack()
 
-        self.image_label = tk.Label(root)
-        self.image_label.pack()
+        self.viewer = ImageViewer(root, 800, 400)
+        self.viewer.pack()
 
     def load_image(self):
         file_path = filedialog.askopenfilename()
         if file_path:
             self.image = cv2.imread(file_path)
-            self.display_image(self.image)
+            pyramid = PreviewPyramid(self.image)
+            self.preview = pyramid.fit(*screen_size(self.root))
+            self.processed_image = None
+            self.display_image(pyramid)
 
     def add_noise(self):
         if self.image is None:
             messagebox.showwarning("Warning", "Please load an image first")
             return
-        noisy_image = self.image + np.random.normal(loc=0, scale=25, size=self.image.shape)
-        noisy_image = np.clip(noisy_image, 0, 255).astype(np.uint8)
+        self.noise_seed = np.random.SeedSequence().entropy
+        noisy_image = self.noisy(self.preview, self.noise_seed)
         self.processed_image = noisy_image
         self.display_image(noisy_image)
 
+    def noisy(self, img, seed):
+        # Шум с одним зерном для копии для показа и для изображения в полном разрешении
+        rng = np.random.default_rng(seed)
+        noisy_image = img + rng.normal(loc=0, scale=25, size=img.shape)
+        return np.clip(noisy_image, 0, 255).astype(np.uint8)
+
+    def full_noisy_image(self, image, seed):
+        """
+        Зашумленное изображение в полном разрешении; вычисляется один раз для изображения и зерна,
+        поэтому окна фильтров, открытые после одного наложения шума, используют общую копию.
+
+        :param image: исходное изображение на момент открытия окна
+        :param seed: зерно шума на момент открытия окна
+        """
+        if self._full_noisy is None or self._full_noisy[0] is not image or self._full_noisy[1] != seed:
+            self._full_noisy = (image, seed, self.noisy(image, seed))
+        return self._full_noisy[2]
+
+    def noisy_render(self, operation):
+        """
+        Функция для кнопки сохранения окна: операция над зашумленным изображением в полном разрешении.
+        Изображение и зерно шума запоминаются при открытии окна, поэтому сохраняется показанный результат,
+        даже если потом шум наложен заново.
+
+        :param operation: функция от изображения
+        :return: функция без аргументов
+        """
+        image, seed = self.image, self.noise_seed
+        return lambda: operation(self.full_noisy_image(image, seed))
+
     def low_pass_filter(self):
         if self.processed_image is None:
             messagebox.showwarning("Warning", "Please add noise to the image first")
@@ -64,7 +107,8 @@ class ImageProcessorApp:
         name_kernel_dict = {0: "3x3 ядро", 1: "5x5 ядро", 2: "7x7 ядро"}
         for i, kernel in enumerate(low_pass_kernels):
             denoised = cv2.filter2D(self.processed_image, -1, kernel)
-            self.show_in_new_window(denoised, title=f"Low-Pass Filter {name_kernel_dict[i]}")
+            self.show_in_new_window(denoised, title=f"Low-Pass Filter {name_kernel_dict[i]}",
+                                    render=self.noisy_render(lambda img, kernel=kernel: cv2.filter2D(img, -1, kernel)))
 
     def high_pass_filter(self):
         if self.processed_image is None:
@@ -83,82 +127,63 @@ class ImageProcessorApp:
         }
         for i, kernel in enumerate(high_pass_kernels):
             denoised = cv2.filter2D(self.processed_image, -1, kernel)
-            self.show_in_new_window(denoised, title=f"High-Pass Filter {name_kernel_dict[i]}")
+            self.show_in_new_window(denoised, title=f"High-Pass Filter {name_kernel_dict[i]}",
+                                    render=self.noisy_render(lambda img, kernel=kernel: cv2.filter2D(img, -1, kernel)))
 
     def median_filter(self):
         if self.processed_image is None:
             messagebox.showwarning("Warning", "Please add noise to the image first")
             return
 
-        median_blurs = [
-            cv2.medianBlur(self.processed_image, 3),
-            cv2.medianBlur(self.processed_image, 5),
-            cv2.medianBlur(self.processed_image, 7)
-        ]
+        median_sizes = [3, 5, 7]
         name_kernel_dict = {0: "3x3 ядро", 1: "5x5 ядро", 2: "7x7 ядро"}
-        for i, denoised in enumerate(median_blurs):
-            self.show_in_new_window(denoised, title=f"Median Filter {name_kernel_dict[i]}")
+        for i, size in enumerate(median_sizes):
+            denoised = cv2.medianBlur(self.processed_image, size)
+            self.show_in_new_window(denoised, title=f"Median Filter {name_kernel_dict[i]}",
+                                    render=self.noisy_render(lambda img, size=size: cv2.medianBlur(img, size)))
 
     def enhance_contrast(self):
         if self.image is None:
             messagebox.showwarning("Warning", "Please load an image first")
             return
 
-        enhanced_images = []
-
-        # Linear
-        linear_image = cv2.convertScaleAbs(self.image, alpha=1.5, beta=0)
-        enhanced_images.append(linear_image)
-
-        # Exponential
-        exp_image = cv2.convertScaleAbs(self.image)
-        exp_image = np.uint8(255 * (exp_image / 255) ** 2)
-        enhanced_images.append(exp_image)
-
-        # Rayleigh
-        rayleigh_image = cv2.convertScaleAbs(self.image)
-        rayleigh_image = np.uint8(255 * (rayleigh_image / 255) ** 1.5)
-        enhanced_images.append(rayleigh_image)
-
-        # Power 2/3
-        power_image = cv2.convertScaleAbs(self.image)
-        power_image = np.uint8(255 * (power_image / 255) ** (2/3))
-        enhanced_images.append(power_image)
-
-        # Hyperbolic
-        hyperbolic_image = cv2.convertScaleAbs(self.image)
-        hyperbolic_image = np.uint8(255 * (np.tanh(hyperbolic_image / 255) * (2 - np.tanh(hyperbolic_image / 255))))
-        enhanced_images.append(hyperbolic_image)
-
-        name_kernel_dict = {
-            0: "Linear",
-            1: "Exponential",
-            2: "Rayleigh",
-            3: "Power 2/3",
-            4: "Hyperbolic",
-        }
-        for i, img in enumerate(enhanced_images):
-            self.show_in_new_window(img, title=f"Enhanced Contrast {name_kernel_dict[i]}")
+        enhancements = [
+            ("Linear", lambda img: transform_image(img, "scale_abs", alpha=1.5, beta=0)),
+            ("Exponential", lambda img: transform_image(img, "power_clip", gamma=2)),
+            ("Rayleigh", lambda img: transform_image(img, "power_clip", gamma=1.5)),
+            ("Power 2/3", lambda img: transform_image(img, "power_clip", gamma=2/3)),
+            ("Hyperbolic", lambda img: transform_image(img, "tanh_contrast")),
+        ]
+        for name, enhance in enhancements:
+            self.show_in_new_window(enhance(self.preview), title=f"Enhanced Contrast {name}",
+                                    render=lambda enhance=enhance, image=self.image: enhance(image))
 
     def display_image(self, img, title="Processed Image"):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img_pil = Image.fromarray(img_rgb)
-        img_tk = ImageTk.PhotoImage(image=img_pil)
-
-        self.image_label.configure(image=img_tk)
-        self.image_label.image = img_tk
+        self.viewer.show(img, keep_view=isinstance(img, np.ndarray))
         self.root.title(title)
 
-    def show_in_new_window(self, img, title="Image"):
+    def show_in_new_window(self, img, title="Image", render=None):
+        """
+        Показывает результат в новом окне.
+
+        :param img: результат для показа (по уменьшенной копии изображения)
+        :param title: заголовок окна
+        :param render: функция без аргументов, вычисляющая результат в полном разрешении для сохранения
+        """
         new_window = Toplevel(self.root)
         new_window.title(title)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img_pil = Image.fromarray(img_rgb)
-        img_tk = ImageTk.PhotoImage(image=img_pil)
-
-        label = tk.Label(new_window, image=img_tk)
-        label.image = img_tk
-        label.pack()
+        viewer = ImageViewer(new_window, min(img.shape[1], 800), min(img.shape[0], 600))
+        viewer.pack(fill=tk.BOTH, expand=True)
+        viewer.show(img)
+        if render is not None:
+            save_button = tk.Button(new_window, text="Save", command=lambda: self.save_result(render, new_window))
+            save_button.pack()
+
+    def save_result(self, render, window):
+        file_path = filedialog.asksaveasfilename(parent=window, defaultextension=".png")
+        if file_path:
+            cv2.imwrite(file_path, render())
+            print(f"Saved: {file_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+"""
+Именованные операции обработки изображений лабораторных 4 и 6 для пакетной обработки.
+
+Операция задается строкой ``имя[:аргумент[,аргумент...]]``, например ``threshold:127``,
+``noise:gaussian,25`` или ``median:5``. Последовательные поточечные операции
+(перевод в полутоновое, порог, негатив, логарифмическое и степенные преобразования,
+контрастные кривые) объединяются в один PointPipeline и выполняются за один проход.
+Каждый шаг знает, сколько соседних строк ему нужно и нужна ли ему гистограмма всего
+изображения, поэтому цепочку можно выполнять и по полосам строк (lab6.tiled).
+"""
+import argparse
+import inspect
+from collections import namedtuple
+
+import numpy as np
+
+from common.lazy import lazy_import
+from common.pointops import PointPipeline, equalize_lut
+
+cv2 = lazy_import("cv2")
+
+Operation = namedtuple("Operation", ["name", "args"])
+# Шаг цепочки: функция (изображение, источник шума, гистограмма) -> изображение; число строк перекрытия
+# сверху и снизу, нужное для обработки по полосам; функция гистограммы входа шага по части изображения
+# (None, если шагу не нужна гистограмма всего изображения)
+Stage = namedtuple("Stage", ["function", "halo", "histogram"])
+
+NOISE_BLOCK_ROWS = 64
+
+# Поточечные операции: имя -> (преобразование common.pointops, имена параметров, значения по умолчанию)
+POINT_OPERATIONS = {
+    "threshold": ("threshold", ("thresh", "maxval"), (127, 255)),
+    "negative": ("negative", (), ()),
+    "log": ("log", (), ()),
+    "power": ("power", ("gamma",), (2,)),
+    "gamma": ("gamma", ("gamma",), (2 / 3,)),
+    "exponential": ("exponential", (), ()),
+    "rayleigh": ("rayleigh", (), ()),
+    "hyperbolic": ("hyperbolic", (), ()),
+    "linear": ("scale_abs", ("alpha", "beta"), (1.5, 0)),
+    "tanh": ("tanh_contrast", (), ()),
+}
+
+# Ядра ВЧ фильтров лабораторной 6 (ImageProcessorApp.high_pass_filter)
+HIGH_PASS_KERNELS = [
+    np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]]),
+    np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]]),
+    np.array([[1, -2, 1], [-2, 5, -2], [1, -2, 1]]),
+]
+
+
+class NoiseSource:
+    """
+    Источник шума, зависящего только от зерна и номеров строк изображения.
+
+    Шум генерируется блоками по NOISE_BLOCK_ROWS строк во всю ширину изображения,
+    у каждого блока свое зерно, поэтому шум для полосы строк совпадает с теми же
+    строками шума всего изображения - это нужно для обработки по полосам.
+    """
+    def __init__(self, key=(0,), row=0):
+        """
+        :param key: зерно (последовательность целых чисел)
+        :param row: номер строки изображения, с которой начинается обрабатываемая часть
+        """
+        self.key = tuple(key)
+        self.row = row
+
+    def at(self, row):
+        """
+        Тот же шум для части изображения, начинающейся со строки row.
+        """
+        return NoiseSource(self.key, row)
+
+    def stream(self, number):
+        """
+        Независимый поток шума (для нескольких операций с шумом в одной цепочке).
+        """
+        return NoiseSource(self.key + (number,), self.row)
+
+    def _generate(self, method, shape, *params):
+        stop = self.row + shape[0]
+        out = np.empty(shape)
+        for block in range(self.row // NOISE_BLOCK_ROWS, (stop - 1) // NOISE_BLOCK_ROWS + 1):
+            block_start = block * NOISE_BLOCK_ROWS
+            rng = np.random.default_rng(self.key + (block,))
+            values = getattr(rng, method)(*params, size=(NOISE_BLOCK_ROWS,) + tuple(shape[1:]))
+            first, last = max(self.row, block_start), min(stop, block_start + NOISE_BLOCK_ROWS)
+            out[first - self.row:last - self.row] = values[first - block_start:last - block_start]
+        return out
+
+    def normal(self, scale, shape):
+        return self._generate("normal", shape, 0, scale)
+
+    def uniform(self, high, shape):
+        return self._generate("uniform", shape, 0, high)
+
+    def random(self, shape):
+        return self._generate("random", shape)
+
+
+def add_noise(image, noise, kind="gaussian", level=None):
+    """
+    Накладывает шум.
+
+    :param image: изображение uint8
+    :param noise: NoiseSource
+    :param kind: gaussian (level - СКО, 25), uniform (level - верхняя граница, 25)
+                 или salt_pepper (level - доля испорченных пикселей, 0.04)
+    :return: изображение uint8 с шумом
+    """
+    if kind == "gaussian":
+        noisy = image + noise.normal(25 if level is None else level, image.shape)
+    elif kind == "uniform":
+        noisy = image + noise.uniform(25 if level is None else level, image.shape)
+    elif kind == "salt_pepper":
+        amount = 0.04 if level is None else level
+        noisy = image.copy()
+        mask = noise.random(image.shape[:2])
+        noisy[mask < amount / 2] = 255
+        noisy[mask > 1 - amount / 2] = 0
+        return noisy
+    else:
+        raise ValueError(f"Неизвестный тип шума: {kind}")
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def low_pass(image, noise, size=5):
+    return cv2.blur(image, (int(size), int(size)))
+
+
+def high_pass(image, noise, kernel=0):
+    return cv2.filter2D(image, -1, HIGH_PASS_KERNELS[int(kernel)])
+
+
+def median(image, noise, size=5):
+    return cv2.medianBlur(image, int(size))
+
+
+def equalize(image, noise, histogram=None):
+    """
+    Выравнивание гистограммы; для части изображения нужна гистограмма всего изображения.
+    """
+    if histogram is None:
+        return cv2.equalizeHist(image)
+    return cv2.LUT(image, equalize_lut(histogram))
+
+
+# Операции, не являющиеся поточечными: имя -> функция (изображение, источник шума, *аргументы)
+IMAGE_OPERATIONS = {
+    "noise": add_noise,
+    "low": low_pass,
+    "high": high_pass,
+    "median": median,
+    "equalize": equalize,
+}
+
+# Сколько соседних строк сверху и снизу нужно операции для вычисления строки: имя -> функция от аргументов
+HALO_ROWS = {
+    "low": lambda size=5: int(size) // 2,
+    "high": lambda kernel=0: 1,
+    "median": lambda size=5: int(size) // 2,
+}
+
+# Операции, зависящие от гистограммы всего изображения
+HISTOGRAM_OPERATIONS = {"equalize"}
+
+OPERATION_NAMES = ["gray"] + list(POINT_OPERATIONS) + list(IMAGE_OPERATIONS)
+
+
+def _point_step(pipeline, operation):
+    transform, names, defaults = POINT_OPERATIONS[operation.name]
+    if len(operation.args) > len(names):
+        raise ValueError(f"Слишком много аргументов у операции {operation.name}")
+    if not all(isinstance(arg, float) for arg in operation.args):
+        raise ValueError("аргументы поточечных операций должны быть числами")
+    params = dict(zip(names, defaults))
+    params.update(zip(names, operation.args))
+    pipeline.then(transform, **params)
+
+
+def _level_histogram(image):
+    return np.bincount(image.ravel(), minlength=np.iinfo(image.dtype).max + 1)
+
+
+def _pipeline_stage(pipeline):
+    histogram_function = pipeline.histogram if pipeline.needs_histogram() else None
+    return Stage(lambda image, noise, histogram=None: pipeline(image, histogram=histogram), 0, histogram_function)
+
+
+def _image_stage(operation, position):
+    function = IMAGE_OPERATIONS[operation.name]
+    halo = HALO_ROWS[operation.name](*operation.args) if operation.name in HALO_ROWS else 0
+    if operation.name in HISTOGRAM_OPERATIONS:
+        return Stage(lambda image, noise, histogram=None: function(image, noise, *operation.args, histogram=histogram),
+                     halo, _level_histogram)
+    # У каждой операции с шумом свой поток, определяемый ее местом в цепочке
+    return Stage(lambda image, noise, histogram=None: function(image, noise.stream(position), *operation.args),
+                 halo, None)
+
+
+def compile_chain(operations):
+    """
+    Превращает последовательность операций в последовательность шагов,
+    объединяя соседние поточечные операции в один конвейер.
+
+    :param operations: последовательность Operation
+    :return: список Stage
+    """
+    steps = []
+    pipeline = None
+    for position, operation in enumerate(operations):
+        if operation.name == "gray" or operation.name in POINT_OPERATIONS:
+            # Перевод в полутоновое может быть только первым шагом конвейера
+            if pipeline is None or operation.name == "gray":
+                pipeline = PointPipeline()
+                steps.append(pipeline)
+            if operation.name == "gray":
+                pipeline.gray()
+            else:
+                _point_step(pipeline, operation)
+        elif operation.name in IMAGE_OPERATIONS:
+            steps.append((operation, position))
+            pipeline = None
+        else:
+            raise ValueError(f"Неизвестная операция: {operation.name}")
+    return [_pipeline_stage(step) if isinstance(step, PointPipeline) else _image_stage(*step) for step in steps]
+
+
+def run_chain(stages, image, noise, histograms=None):
+    """
+    Выполняет шаги над изображением по порядку.
+
+    :param stages: результат compile_chain
+    :param image: изображение или полоса строк изображения
+    :param noise: NoiseSource (для полосы - сдвинутый на ее первую строку)
+    :param histograms: гистограммы входа шагов по всему изображению (для полосы) или None
+    :return: результат
+    """
+    for index, stage in enumerate(stages):
+        image = stage.function(image, noise, None if histograms is None else histograms[index])
+    return image
+
+
+def parse_operation(text):
+    """
+    Разбирает операцию из командной строки: ``имя[:аргумент[,аргумент...]]``;
+    числовые аргументы преобразуются в числа.
+
+    :param text: описание операции
+    :return: Operation
+    """
+    name, _, rest = text.partition(":")
+    if name not in OPERATION_NAMES:
+        raise argparse.ArgumentTypeError(f"Неизвестная операция: {name}. Доступны: {', '.join(OPERATION_NAMES)}")
+    args = []
+    for arg in rest.split(",") if rest else ():
+        try:
+            args.append(float(arg))
+        except ValueError:
+            args.append(arg)
+    operation = Operation(name, tuple(args))
+    if name == "gray" and args:
+        raise argparse.ArgumentTypeError("Операция gray не принимает аргументов")
+    if name in POINT_OPERATIONS:
+        try:
+            _point_step(PointPipeline(), operation)
+        except (TypeError, ValueError) as e:
+            raise argparse.ArgumentTypeError(f"Некорректная операция {text}: {e}")
+    elif name in IMAGE_OPERATIONS:
+        try:
+            inspect.signature(IMAGE_OPERATIONS[name]).bind(None, None, *args)
+        except TypeError:
+            raise argparse.ArgumentTypeError(f"Неверное число аргументов у операции {text}")
+    return operation
@@ -0,0 +1,236 @@
+"""
+Обработка изображений больше оперативной памяти полосами строк.
+
+Исходное изображение (несжатый TIFF или сырой файл пикселей) отображается в память,
+и цепочка операций lab6.operations выполняется над полосами строк во всю ширину.
+Каждая полоса читается с перекрытием: сверху и снизу добавляется столько строк,
+сколько в сумме нужно окрестностным фильтрам цепочки, поэтому результат совпадает
+с обработкой всего изображения целиком. Шагам, которым нужна гистограмма всего
+изображения (выравнивание гистограммы, преобразования с нормировкой по максимуму),
+гистограмма собирается отдельным проходом по полосам. Высота полосы выбирается по
+бюджету памяти; результат пишется в отображенный в память TIFF или сырой файл.
+
+Цветные сырые файлы считаются записанными в порядке каналов BGR (как в OpenCV),
+цветные TIFF - в порядке RGB.
+
+Пример запуска из корня репозитория:
+
+    python -m lab6.tiled scan.tif out.tif -p gray -p median:5 -p equalize --memory 512M
+    python -m lab6.tiled scan.raw out.raw --shape 60000x80000x3 --dtype uint8 -p low:5 -p negative
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common.tiffmap import PHOTOMETRIC_RGB, create_tiff, is_tiff, open_raw, open_tiff, read_tiff_info, release_rows
+from lab6.operations import NOISE_BLOCK_ROWS, OPERATION_NAMES, NoiseSource, compile_chain, parse_operation, run_chain
+
+DEFAULT_MEMORY_BUDGET = 256 << 20
+
+
+class ImageSource:
+    """
+    Отображенное в память изображение, отдающее полосы строк в порядке каналов OpenCV.
+    """
+    def __init__(self, array, rgb=False):
+        """
+        :param array: массив (строки, столбцы[, каналы]), обычно np.memmap
+        :param rgb: каналы в массиве в порядке RGB (будут переставлены в BGR)
+        """
+        self.array = array
+        self.rgb = rgb and array.ndim == 3 and array.shape[2] == 3
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def rows(self, start, stop):
+        """
+        Читает строки [start, stop) в непрерывный массив с родным порядком байт;
+        страницы отображения с предыдущими строками разрешается выгрузить.
+        """
+        release_rows(self.array, start)
+        band = self.array[start:stop]
+        if self.rgb:
+            band = band[..., ::-1]
+        return np.ascontiguousarray(band, dtype=band.dtype.newbyteorder("="))
+
+
+def open_source(path, shape=None, dtype=None):
+    """
+    Открывает исходное изображение: TIFF по расширению, иначе сырой файл.
+
+    :param path: путь к файлу
+    :param shape: форма сырого файла (строки, столбцы[, каналы])
+    :param dtype: тип отсчета сырого файла
+    :return: ImageSource
+    """
+    if is_tiff(path):
+        return ImageSource(open_tiff(path), rgb=read_tiff_info(path).photometric == PHOTOMETRIC_RGB)
+    if shape is None or dtype is None:
+        raise ValueError("Для сырого файла нужно указать форму и тип отсчета")
+    return ImageSource(open_raw(path, shape, dtype))
+
+
+def create_destination(path, shape, dtype):
+    """
+    Создает отображенный в память файл результата (TIFF по расширению, иначе сырой).
+
+    :return: (массив для записи, нужно ли переставлять каналы BGR -> RGB)
+    """
+    if is_tiff(path):
+        return create_tiff(path, shape, dtype), len(shape) == 3 and shape[2] == 3
+    return open_raw(path, shape, dtype, mode="w+"), False
+
+
+def band_rows_for_budget(source, stages, memory_budget):
+    """
+    Оценивает высоту полосы, при которой обработка укладывается в бюджет памяти.
+
+    На строку полосы приходятся: входная полоса, результат каждого шага и до двух
+    временных массивов float64 (наложение шума); перекрытие добавляет строки сверху и снизу.
+
+    :param source: ImageSource
+    :param stages: шаги цепочки
+    :param memory_budget: бюджет памяти в байтах
+    :return: число строк в полосе (без перекрытия)
+    """
+    row = source.array[0]
+    per_row = row.nbytes * (len(stages) + 1) + row.size * 8 * 2
+    # Шум генерируется блоками строк во всю ширину
+    fixed = NOISE_BLOCK_ROWS * row.size * 8
+    halo = sum(stage.halo for stage in stages)
+    rows = (memory_budget - fixed) // per_row - 2 * halo
+    if rows < 1:
+        raise ValueError(f"Бюджета памяти {memory_budget} байт не хватает на полосу с перекрытием {halo} строк")
+    return int(min(rows, source.shape[0]))
+
+
+def run_band(source, stages, noise, start, stop, histograms=None):
+    """
+    Вычисляет строки [start, stop) результата цепочки, читая полосу с перекрытием.
+
+    :param source: ImageSource
+    :param stages: шаги цепочки
+    :param noise: NoiseSource для всего изображения
+    :param start: первая строка
+    :param stop: строка после последней
+    :param histograms: гистограммы входа шагов по всему изображению
+    :return: строки результата
+    """
+    halo = sum(stage.halo for stage in stages)
+    first, last = max(start - halo, 0), min(stop + halo, source.shape[0])
+    result = run_chain(stages, source.rows(first, last), noise.at(first), histograms)
+    return result[start - first:stop - first]
+
+
+def collect_histograms(source, stages, noise, band_rows):
+    """
+    Собирает гистограммы входа шагов, которым нужна гистограмма всего изображения:
+    для каждого такого шага - отдельный проход по полосам через предыдущие шаги.
+
+    :return: список гистограмм (None для остальных шагов)
+    """
+    histograms = [None] * len(stages)
+    for index, stage in enumerate(stages):
+        if stage.histogram is None:
+            continue
+        total = 0
+        for start in range(0, source.shape[0], band_rows):
+            stop = min(start + band_rows, source.shape[0])
+            total = total + stage.histogram(run_band(source, stages[:index], noise, start, stop, histograms))
+        histograms[index] = total
+    return histograms
+
+
+def process_tiled(source, output_path, operations, seed=0, memory_budget=DEFAULT_MEMORY_BUDGET, band_rows=None):
+    """
+    Обрабатывает изображение полосами и пишет результат в файл.
+
+    :param source: ImageSource
+    :param output_path: путь к результату (.tif/.tiff или сырой файл)
+    :param operations: последовательность Operation
+    :param seed: зерно шума
+    :param memory_budget: бюджет памяти в байтах (если band_rows не задан)
+    :param band_rows: высота полосы; None - по бюджету памяти
+    :return: отображенный в память результат
+    """
+    stages = compile_chain(operations)
+    noise = NoiseSource((seed,))
+    if band_rows is None:
+        band_rows = band_rows_for_budget(source, stages, memory_budget)
+    histograms = collect_histograms(source, stages, noise, band_rows)
+
+    height = source.shape[0]
+    destination = reverse = None
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        band = run_band(source, stages, noise, start, stop, histograms)
+        if destination is None:
+            # Форма и тип результата известны только после обработки первой полосы
+            destination, reverse = create_destination(output_path, (height,) + band.shape[1:], band.dtype)
+        destination[start:stop] = band[..., ::-1] if reverse else band
+        # Записанные страницы сбрасываются на диск и выгружаются из памяти
+        destination.flush()
+        release_rows(destination, stop)
+    return destination
+
+
+def parse_shape(text):
+    try:
+        shape = tuple(int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некорректная форма: {text}")
+    if len(shape) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"Форма задается как строкиxстолбцы[xканалы]: {text}")
+    return shape
+
+
+def parse_size(text):
+    """
+    Разбирает размер в байтах с необязательным суффиксом K, M или G.
+    """
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некорректный размер: {text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обработка больших изображений полосами с перекрытием")
+    parser.add_argument("input", help="исходный TIFF (несжатый) или сырой файл пикселей")
+    parser.add_argument("output", help="результат: .tif/.tiff или сырой файл")
+    parser.add_argument("-p", "--op", dest="operations", action="append", type=parse_operation, default=[],
+                        metavar="OP", help=f"операция имя[:арг,...], по порядку; имена: {', '.join(OPERATION_NAMES)}")
+    parser.add_argument("--shape", type=parse_shape, default=None, help="форма сырого файла, например 60000x80000x3")
+    parser.add_argument("--dtype", default=None, help="тип отсчета сырого файла, например uint8")
+    parser.add_argument("--memory", type=parse_size, default=DEFAULT_MEMORY_BUDGET,
+                        help="бюджет памяти на полосу, например 512M")
+    parser.add_argument("--band-rows", type=int, default=None, help="высота полосы (вместо бюджета памяти)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора шума")
+    args = parser.parse_args(argv)
+
+    if not args.operations:
+        parser.error("не задано ни одной операции (-p)")
+    try:
+        source = open_source(args.input, args.shape, args.dtype)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    try:
+        result = process_tiled(source, args.output, args.operations, args.seed, args.memory, args.band_rows)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    print(f"Результат {'x'.join(map(str, result.shape))} {result.dtype}: {args.output}")
+    print(f"Время: {elapsed:.2f} с ({source.array.size / elapsed / 1e6:.1f} Мотсч./с)")
+
+
+if __name__ == "__main__":
+    main()
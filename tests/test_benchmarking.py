@@ -0,0 +1,44 @@
+"""
+Проверка сохранения результатов замеров и сравнения с файлом истории common.benchmarking.
+"""
+import json
+import os
+
+from common.benchmark_startup import compare as compare_startup
+from common.benchmarking import check_baseline, write_report
+from lab2.benchmark import compare as compare_filters
+
+
+def test_report_roundtrip(tmp_path):
+    path = os.path.join(tmp_path, "bench.json")
+    results = [{"module": "lab2.lab2", "import_ms": 10.0}]
+    write_report(path, results, numpy="2.0")
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["results"] == results
+    assert report["meta"]["numpy"] == "2.0"
+    assert {"timestamp", "python", "platform"} <= set(report["meta"])
+    assert check_baseline(path, results, compare_startup, 0.3) == 0
+
+
+def test_startup_regressions(tmp_path):
+    path = os.path.join(tmp_path, "old.json")
+    write_report(path, [{"module": "a", "import_ms": 10.0}, {"module": "b", "import_ms": 10.0},
+                        {"module": "c", "error": "ImportError"}])
+    results = [{"module": "a", "import_ms": 12.0}, {"module": "b", "import_ms": 14.0},
+               {"module": "c", "import_ms": 100.0}, {"module": "d", "import_ms": 100.0}]
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    assert compare_startup(results, baseline, 0.3) == ["b: время запуска 10.0 -> 14.0 мс"]
+    assert check_baseline(path, results, compare_startup, 0.3) == 1
+
+
+def test_filter_regressions():
+    baseline = [{"name": "cf1", "size": 1000, "samples_per_sec": 1e6, "peak_bytes": 1000},
+                {"name": "cf1", "size": 10000, "samples_per_sec": 1e6, "peak_bytes": 1000}]
+    results = [{"name": "cf1", "size": 1000, "samples_per_sec": 0.9e6, "peak_bytes": 1100},
+               {"name": "cf1", "size": 10000, "samples_per_sec": 0.5e6, "peak_bytes": 2000},
+               {"name": "cf2", "size": 1000, "samples_per_sec": 1.0, "peak_bytes": 10 ** 9}]
+    regressions = compare_filters(results, baseline, 0.2)
+    assert len(regressions) == 2
+    assert all(line.startswith("cf1 N=10000") for line in regressions)
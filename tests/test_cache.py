@@ -0,0 +1,64 @@
+"""
+Проверка дискового кэша common.cache.
+"""
+import os
+
+import numpy as np
+
+from common.cache import ArrayCache
+
+
+def make_source(tmp_path, content=b"signal"):
+    path = tmp_path / "source.wav"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_get_or_compute_uses_cache(tmp_path):
+    cache = ArrayCache(str(tmp_path / "cache"))
+    path = make_source(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"values": np.arange(5)}
+
+    first = cache.get_or_compute(path, "segments", {"window": 512, "version": 1}, compute)
+    second = cache.get_or_compute(path, "segments", {"window": 512, "version": 1}, compute)
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first["values"], second["values"])
+
+
+def test_version_and_params_change_key(tmp_path):
+    cache = ArrayCache(str(tmp_path / "cache"))
+    path = make_source(tmp_path)
+    key = cache.key(path, "segments", {"window": 512, "version": 1})
+    assert key != cache.key(path, "segments", {"window": 512, "version": 2})
+    assert key != cache.key(path, "segments", {"window": 1024, "version": 1})
+    assert key != cache.key(path, "features", {"window": 512, "version": 1})
+
+
+def test_changed_file_changes_key(tmp_path):
+    cache = ArrayCache(str(tmp_path / "cache"))
+    path = make_source(tmp_path)
+    key = cache.key(path, "segments", {})
+    os.utime(path, ns=(0, 0))
+    make_source(tmp_path, b"other signal")
+    assert cache.key(path, "segments", {}) != key
+
+
+def test_entry_without_arrays_is_miss(tmp_path):
+    cache = ArrayCache(str(tmp_path / "cache"))
+    os.makedirs(os.path.join(cache.directory, "empty"))
+    assert cache.get("empty") is None
+    assert cache.get("missing") is None
+
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    cache = ArrayCache(str(tmp_path / "cache"), max_bytes=3000)
+    for index in range(4):
+        cache.put(f"entry{index}", {"values": np.zeros(100)})
+        os.utime(os.path.join(cache.directory, f"entry{index}"), ns=(index, index))
+    cache.evict()
+    assert cache.get("entry0") is None
+    assert cache.get("entry3") is not None
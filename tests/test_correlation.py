@@ -0,0 +1,91 @@
+"""
+Проверка корреляции методом перекрытия с накоплением lab3.correlation по scipy.signal.correlate.
+"""
+import numpy as np
+import pytest
+from scipy import signal as scipy_signal
+
+from lab3.correlation import (
+    DIRECT_LIMIT,
+    TemplateCorrelator,
+    correlate_bank,
+    correlate_valid,
+    match_templates,
+)
+
+
+def make_signal(length, seed=0):
+    return np.random.default_rng(seed).normal(size=length)
+
+
+def reference_normalized(signal, template):
+    correlation = scipy_signal.correlate(signal, template, mode="valid")
+    energy = np.concatenate(([0.0], np.cumsum(signal ** 2)))
+    window_norm = np.sqrt(energy[len(template):] - energy[:-len(template)]) * np.linalg.norm(template)
+    return correlation / window_norm
+
+
+def tolerance(reference):
+    return 1e-9 * np.max(np.abs(reference))
+
+
+@pytest.mark.parametrize("length, template_length", [(10, 3), (1000, 1), (5000, 257), (DIRECT_LIMIT, 1000)])
+def test_short_inputs_identical_to_scipy(length, template_length):
+    signal, template = make_signal(length), make_signal(template_length, seed=1)
+    np.testing.assert_array_equal(correlate_valid(signal, template),
+                                  scipy_signal.correlate(signal, template, mode="valid"))
+
+
+@pytest.mark.parametrize("template_length", [1, 100, 3000])
+def test_long_inputs_close_to_scipy(template_length):
+    signal, template = make_signal(DIRECT_LIMIT * 3 + 17), make_signal(template_length, seed=1)
+    reference = scipy_signal.correlate(signal, template, mode="valid")
+    result = correlate_valid(signal, template)
+    assert result.shape == reference.shape
+    np.testing.assert_allclose(result, reference, rtol=0, atol=tolerance(reference))
+
+
+@pytest.mark.parametrize("chunk", [1, 97, 4096, 100000])
+@pytest.mark.parametrize("fft_size", [None, 512])
+def test_streaming_any_chunking_matches_scipy(chunk, fft_size):
+    signal, template = make_signal(20000), make_signal(200, seed=1)
+    correlator = TemplateCorrelator(template, fft_size=fft_size)
+    parts = [correlator.process(signal[start:start + chunk]) for start in range(0, len(signal), chunk)]
+    result = np.concatenate(parts + [correlator.flush()])
+    reference = scipy_signal.correlate(signal, template, mode="valid")
+    np.testing.assert_allclose(result, reference, rtol=0, atol=tolerance(reference))
+
+
+@pytest.mark.parametrize("length", [5000, DIRECT_LIMIT * 2])
+def test_normalized_correlation(length):
+    signal, template = make_signal(length), make_signal(300, seed=1)
+    signal[1234:1534] = 3 * template
+    result = correlate_valid(signal, template, normalized=True)
+    np.testing.assert_allclose(result, reference_normalized(signal, template), rtol=0, atol=1e-9)
+    assert np.argmax(result) == 1234
+    assert result[1234] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("normalized", [False, True])
+def test_template_bank_matches_single_templates(normalized):
+    signal = make_signal(30000)
+    templates = [make_signal(length, seed=length) for length in (5, 300, 2500)]
+    results = correlate_bank(signal, templates, normalized=normalized, block_size=8192)
+    for template, result in zip(templates, results):
+        if normalized:
+            reference = reference_normalized(signal, template)
+        else:
+            reference = scipy_signal.correlate(signal, template, mode="valid")
+        assert result.shape == reference.shape
+        np.testing.assert_allclose(result, reference, rtol=0, atol=tolerance(reference))
+
+
+def test_match_templates_finds_planted_occurrences():
+    signal = 0.1 * make_signal(20000)
+    templates = [make_signal(200, seed=1), make_signal(500, seed=2)]
+    positions = [[1000, 12000], [5000]]
+    for template, starts in zip(templates, positions):
+        for start in starts:
+            signal[start:start + len(template)] += template
+    found = match_templates(signal, templates, normalized=True, relative_height=0.8, distance=100)
+    assert [list(peaks) for peaks in found] == positions
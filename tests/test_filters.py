@@ -0,0 +1,132 @@
+"""
+Проверка совпадения ЦФ лабораторной 2 (lab2.filters) с исходной поотсчетной реализацией на циклах.
+"""
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from lab2.filters import FILTER_COEFFICIENTS, DifferenceFilter, apply_difference_filter
+
+
+def reference_filter(signal, filter_type):
+    """
+    Исходная реализация CFApp.apply_filter: разностные уравнения поотсчетными циклами.
+    """
+    output_signal = np.zeros_like(signal)
+    match filter_type:
+        case 1:
+            for n in range(1, len(signal)):
+                output_signal[n] = signal[n] - 0.5 * signal[n - 1]
+        case 2:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * signal[n - 2]
+        case 3:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] + 0.5 * signal[n - 1] + 0.5 * signal[n - 2]
+        case 4:
+            for n in range(2, len(signal)):
+                output_signal[n] = 0.5 * signal[n] + 0.25 * signal[n - 1] + 0.25 * signal[n - 2]
+        case 5:
+            for n in range(1, len(signal)):
+                output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * output_signal[n - 1]
+        case 6:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] + 0.5 * signal[n - 1] - signal[n - 2] - 0.5 * output_signal[n - 1]
+        case 7:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] + 0.5 * signal[n - 1] - 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
+        case 8:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] - 0.5 * signal[n - 1] - 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
+        case 9:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] + 0.5 * signal[n - 1] + 0.5 * signal[n - 2] - 0.5 * output_signal[n - 1]
+        case 10:
+            for n in range(2, len(signal)):
+                output_signal[n] = signal[n] - 0.5 * signal[n - 1] + 0.5 * signal[n - 2] + 0.5 * output_signal[n - 1]
+    return output_signal
+
+
+def make_signal(length, dtype, channels=None, seed=0):
+    shape = (length,) if channels is None else (length, channels)
+    return np.random.default_rng(seed).uniform(-1.0, 1.0, shape).astype(dtype)
+
+
+def reference_multichannel(signal, filter_type):
+    return np.stack([reference_filter(signal[:, channel], filter_type) for channel in range(signal.shape[1])], axis=1)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("filter_type", sorted(FILTER_COEFFICIENTS))
+def test_whole_signal_matches_loop(filter_type, dtype):
+    signal = make_signal(5000, dtype)
+    result = apply_difference_filter(signal, filter_type)
+    assert result.dtype == signal.dtype
+    np.testing.assert_array_equal(result, reference_filter(signal, filter_type))
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("filter_type", sorted(FILTER_COEFFICIENTS))
+def test_blocks_match_loop(filter_type, dtype):
+    signal = make_signal(5000, dtype)
+    signal_filter = DifferenceFilter(filter_type)
+    # Блоки разной длины, включая блоки короче памяти фильтра и пустой блок
+    bounds = [0, 1, 2, 3, 3, 259, 1283, 1284, 4096, 5000]
+    result = np.concatenate([signal_filter.process(signal[start:stop]) for start, stop in zip(bounds, bounds[1:])])
+    np.testing.assert_array_equal(result, reference_filter(signal, filter_type))
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("filter_type", sorted(FILTER_COEFFICIENTS))
+def test_multichannel_matches_loop(filter_type, dtype):
+    signal = make_signal(3000, dtype, channels=3)
+    expected = reference_multichannel(signal, filter_type)
+    np.testing.assert_array_equal(apply_difference_filter(signal, filter_type), expected)
+
+    signal_filter = DifferenceFilter(filter_type)
+    result = np.concatenate([signal_filter.process(signal[start:start + 256]) for start in range(0, len(signal), 256)])
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("filter_type", sorted(FILTER_COEFFICIENTS))
+def test_blocks_into_out_match_loop(filter_type):
+    signal = make_signal(3000, np.float32, channels=2)
+    signal_filter = DifferenceFilter(filter_type)
+    out = np.full((256, 2), np.nan, dtype=np.float32)
+    parts = []
+    for start in range(0, len(signal), 256):
+        block = signal[start:start + 256]
+        result = signal_filter.process(block, out=out[:len(block)])
+        assert np.shares_memory(result, out)
+        parts.append(result.copy())
+    np.testing.assert_array_equal(np.concatenate(parts), reference_multichannel(signal, filter_type))
+
+
+@pytest.mark.parametrize("filter_type", [filter_type for filter_type, (b, a) in FILTER_COEFFICIENTS.items()
+                                         if len(a) == 1])
+def test_fir_blocks_into_out_do_not_allocate(filter_type):
+    signal = make_signal(256 * 50, np.float32, channels=2)
+    signal_filter = DifferenceFilter(filter_type)
+    out = np.empty((256, 2), dtype=np.float32)
+    signal_filter.process(signal[:256], out=out)
+    tracemalloc.start()
+    for start in range(256, len(signal), 256):
+        signal_filter.process(signal[start:start + 256], out=out)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Допускаются только объекты-представления срезов, но не копии данных блока
+    assert peak < out.nbytes
+
+
+def test_reset_restarts_filter():
+    signal = make_signal(1000, np.float64)
+    signal_filter = DifferenceFilter(7)
+    first = signal_filter.process(signal)
+    signal_filter.reset()
+    np.testing.assert_array_equal(signal_filter.process(signal), first)
+
+
+def test_unknown_filter_type():
+    with pytest.raises(ValueError):
+        DifferenceFilter(11)
@@ -0,0 +1,51 @@
+"""
+Проверка путей результатов пакетной фильтрации lab2.batch.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from common.wavio import WavWriter, load_wav
+from lab2.batch import main, output_paths, parse_butter_spec, parse_difference_spec
+
+
+def test_same_names_in_different_directories():
+    inputs = [os.path.join("rec", "a", "x.wav"), os.path.join("rec", "b", "x.wav")]
+    specs = [parse_difference_spec("1"), parse_butter_spec("low:1000")]
+    paths = output_paths(inputs, specs, "out")
+    assert len(set(paths.values())) == 4
+    assert paths[inputs[0], "cf1"] == os.path.join("out", "a", "x_cf1.wav")
+    assert paths[inputs[1], "butter_low_1000_5"] == os.path.join("out", "b", "x_butter_low_1000_5.wav")
+
+
+def test_single_directory_writes_to_output_dir():
+    paths = output_paths([os.path.join("rec", "x.wav"), os.path.join("rec", "y.wav")], [parse_difference_spec("2")],
+                         "out")
+    assert sorted(paths.values()) == [os.path.join("out", "x_cf2.wav"), os.path.join("out", "y_cf2.wav")]
+
+
+def test_collision_is_reported():
+    with pytest.raises(ValueError):
+        output_paths([os.path.join("rec", "x.wav")], [parse_difference_spec("1"), parse_difference_spec("1")], "out")
+
+
+def test_no_normalize_scales_by_full_scale(tmp_path):
+    data = np.array([30000, 20000, 10000, -32768, 0, 32767, 32767, 32767], dtype=np.int16)
+    source = str(tmp_path / "a.wav")
+    with WavWriter(source, 8000, dtype=np.int16) as writer:
+        writer.write(data)
+
+    output_dir = str(tmp_path / "out")
+    assert main([source, "-f", "3", "-b", "low:1000", "--no-normalize", "-o", output_dir]) == 0
+
+    # ЦФ 3: y[n] = x[n] + 0.5x[n-1] + 0.5x[n-2] при x = отсчет / 32768, первые два отсчета равны нулю
+    x = data / 32768
+    expected = np.zeros(len(x))
+    expected[2:] = x[2:] + 0.5 * x[1:-1] + 0.5 * x[:-2]
+    _, result = load_wav(os.path.join(output_dir, "a_cf3.wav"), normalize=False)
+    np.testing.assert_allclose(result, expected, rtol=1e-6)
+    assert result[2] == pytest.approx((10000 + 10000 + 15000) / 32768, rel=1e-6)
+
+    _, butter = load_wav(os.path.join(output_dir, "a_butter_low_1000_5.wav"), normalize=False)
+    assert np.max(np.abs(butter)) < 2
@@ -0,0 +1,22 @@
+"""
+Проверка путей результатов пакетной обработки изображений lab6.batch.
+"""
+import os
+
+import pytest
+
+from lab6.batch import output_paths
+
+
+def test_same_names_in_different_directories():
+    inputs = [os.path.join("photos", "a", "photo.jpg"), os.path.join("photos", "b", "photo.jpg")]
+    assert output_paths(inputs, "out") == [os.path.join("out", "a", "photo.jpg"), os.path.join("out", "b", "photo.jpg")]
+    assert output_paths(inputs, "out", "png") == [os.path.join("out", "a", "photo.png"),
+                                                  os.path.join("out", "b", "photo.png")]
+
+
+def test_format_collision_is_reported():
+    inputs = [os.path.join("photos", "photo.jpg"), os.path.join("photos", "photo.png")]
+    assert output_paths(inputs, "out") == [os.path.join("out", "photo.jpg"), os.path.join("out", "photo.png")]
+    with pytest.raises(ValueError):
+        output_paths(inputs, "out", "png")
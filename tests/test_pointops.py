@@ -0,0 +1,210 @@
+"""
+Проверка совпадения таблиц подстановки common.pointops с исходными вычислениями формул по всему изображению
+(лабораторные 4 и 6 до перехода на таблицы).
+"""
+import cv2
+import numpy as np
+import pytest
+
+from common import pointops
+from common.pointops import PointPipeline, compile_lut, transform_image
+
+
+# Исходные вычисления из лабораторной 4 (ImageProcessingApp)
+def reference_log(image):
+    c = 255 / np.log(1 + np.max(image))
+    image_log = np.where(image == 0, 1, image)
+    return (c * (np.log(1 + image_log))).astype(np.uint8)
+
+
+def reference_power(image, gamma):
+    return np.array(255 * (image / 255) ** gamma, dtype=np.uint8)
+
+
+# Исходные вычисления из лабораторной 6 (ImageProcessingApp)
+def reference_exponential(img):
+    img = img / 255.0
+    img = np.exp(img) - 1
+    return np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
+
+
+def reference_rayleigh(img):
+    img = img / 255.0
+    img = img ** 2
+    return np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
+
+
+def reference_hyperbolic(img):
+    img = img / 255.0
+    img = np.tanh(img)
+    return np.clip(img * 255.0 / np.max(img), 0, 255).astype(np.uint8)
+
+
+def reference_gamma(img, gamma):
+    inv_gamma = 1.0 / gamma
+    table = np.array([((i / 255.0) ** inv_gamma) * 255 for i in np.arange(0, 256)]).astype(np.uint8)
+    return cv2.LUT(img, table)
+
+
+# Исходные вычисления из лабораторной 6 (ImageProcessorApp)
+def reference_power_clip(image, gamma):
+    image = cv2.convertScaleAbs(image)
+    return np.uint8(255 * (image / 255) ** gamma)
+
+
+def reference_tanh_contrast(image):
+    image = cv2.convertScaleAbs(image)
+    return np.uint8(255 * (np.tanh(image / 255) * (2 - np.tanh(image / 255))))
+
+
+def make_image(dtype=np.uint8, shape=(61, 47, 3), high=None, seed=0):
+    high = np.iinfo(dtype).max if high is None else high
+    image = np.random.default_rng(seed).integers(0, high + 1, size=shape, dtype=dtype)
+    image.flat[0] = 0
+    image.flat[1] = high
+    return image
+
+
+# Изображения с максимумом 255 (1 + максимум переполняет uint8), с меньшим максимумом и полутоновое
+IMAGES_UINT8 = [make_image(), make_image(high=200, seed=1), make_image(shape=(33, 70), high=90, seed=2)]
+
+
+# При максимуме 255 исходная формула делит на log(0) и приводит бесконечности к uint8;
+# таблица должна повторять и это поведение
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("image", IMAGES_UINT8)
+def test_log_matches_formula(image):
+    np.testing.assert_array_equal(transform_image(image, "log"), reference_log(image))
+
+
+@pytest.mark.parametrize("image", IMAGES_UINT8)
+@pytest.mark.parametrize("name, reference", [("exponential", reference_exponential),
+                                             ("rayleigh", reference_rayleigh),
+                                             ("hyperbolic", reference_hyperbolic)])
+def test_peak_normalized_curves_match_formula(image, name, reference):
+    np.testing.assert_array_equal(transform_image(image, name), reference(image))
+
+
+@pytest.mark.parametrize("image", IMAGES_UINT8)
+@pytest.mark.parametrize("gamma", [0.5, 2 / 3, 1.5, 2, 3])
+def test_power_curves_match_formula(image, gamma):
+    np.testing.assert_array_equal(transform_image(image, "power", gamma=gamma), reference_power(image, gamma))
+    np.testing.assert_array_equal(transform_image(image, "gamma", gamma=gamma), reference_gamma(image, gamma))
+    np.testing.assert_array_equal(transform_image(image, "power_clip", gamma=gamma),
+                                  reference_power_clip(image, gamma))
+
+
+@pytest.mark.parametrize("image", IMAGES_UINT8)
+def test_contrast_curves_match_formula(image):
+    np.testing.assert_array_equal(transform_image(image, "tanh_contrast"), reference_tanh_contrast(image))
+    np.testing.assert_array_equal(transform_image(image, "scale_abs", alpha=1.5, beta=0),
+                                  cv2.convertScaleAbs(image, alpha=1.5, beta=0))
+
+
+@pytest.mark.parametrize("image", IMAGES_UINT8)
+@pytest.mark.parametrize("thresh", [0, 127, 254])
+def test_threshold_and_negative(image, thresh):
+    _, expected = cv2.threshold(image, thresh, 255, cv2.THRESH_BINARY)
+    np.testing.assert_array_equal(transform_image(image, "threshold", thresh=thresh, maxval=255), expected)
+    np.testing.assert_array_equal(transform_image(image, "negative"), cv2.bitwise_not(image))
+
+
+# Таблица считается для всех 65536 уровней, и на уровне 65535 1 + уровень переполняет uint16
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_uint16_images():
+    image = make_image(np.uint16, shape=(40, 30), high=4000)
+    assert len(compile_lut("negative", "uint16")) == 65536
+    np.testing.assert_array_equal(transform_image(image, "log"), reference_log(image))
+    np.testing.assert_array_equal(transform_image(image, "hyperbolic"), reference_hyperbolic(image))
+    np.testing.assert_array_equal(transform_image(image, "negative"), cv2.bitwise_not(image))
+    _, expected = cv2.threshold(image, 2000, 65535, cv2.THRESH_BINARY)
+    np.testing.assert_array_equal(transform_image(image, "threshold", thresh=2000, maxval=65535), expected)
+
+
+def test_inplace_and_cached_table():
+    image = make_image(seed=3)
+    expected = reference_power(image, 2)
+    result = transform_image(image, "power", inplace=True, gamma=2)
+    assert result is image
+    np.testing.assert_array_equal(image, expected)
+    assert compile_lut("power", "uint8", gamma=2) is compile_lut("power", "uint8", gamma=2)
+    assert not compile_lut("power", "uint8", gamma=2).flags.writeable
+
+
+def run_steps(image, steps, weights=None, gray=False):
+    """
+    Выполняет шаги по одному, как до объединения в конвейер: перевод в полутоновое, затем каждое преобразование.
+    """
+    if gray and weights is None:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    elif gray:
+        image = cv2.transform(image, np.asarray(weights, dtype=np.float32).reshape(1, -1))
+    for name, params in steps:
+        image = transform_image(image, name, **params)
+    return image
+
+
+PIPELINE_CASES = [
+    # (изображение, перевод в полутоновое, веса, шаги)
+    (make_image(), True, None, [("threshold", dict(thresh=100, maxval=255)), ("negative", {})]),
+    (make_image(high=200, seed=1), False, None, [("log", {}), ("power", dict(gamma=2))]),
+    (make_image(seed=2), True, None, [("power", dict(gamma=0.5)), ("log", {})]),
+    (make_image(seed=3), True, (0.5, 0.25, 0.25), [("negative", {}), ("hyperbolic", {})]),
+    (make_image(np.uint16, shape=(40, 30), high=4000), False, None, [("negative", {}), ("log", {})]),
+    (make_image(np.uint16, shape=(40, 30, 3), seed=4), True, None, [("threshold", dict(thresh=30000, maxval=65535))]),
+    (make_image(shape=(61, 47, 4), seed=5), True, None, [("threshold", dict(thresh=127, maxval=255)),
+                                                         ("negative", {})]),
+    (make_image(shape=(61, 47, 4), seed=6), True, (0.2, 0.3, 0.4, 0.1), [("exponential", {})]),
+    (make_image(seed=7), False, None, []),
+    (make_image(seed=8), True, None, []),
+]
+
+
+def build_pipeline(gray, weights, steps):
+    pipeline = PointPipeline().gray(weights) if gray else PointPipeline()
+    for name, params in steps:
+        pipeline.then(name, **params)
+    return pipeline
+
+
+# Логарифм на 65536 уровнях переполняет uint16, как и исходная формула
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("block_bytes", [1, 1000, pointops.PIPELINE_BLOCK_BYTES])
+@pytest.mark.parametrize("image, gray, weights, steps", PIPELINE_CASES)
+def test_pipeline_matches_steps(monkeypatch, block_bytes, image, gray, weights, steps):
+    monkeypatch.setattr(pointops, "PIPELINE_BLOCK_BYTES", block_bytes)
+    expected = run_steps(image, steps, weights, gray)
+    source = image.copy()
+    result = build_pipeline(gray, weights, steps)(image)
+    np.testing.assert_array_equal(image, source)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("image, gray, weights, steps", PIPELINE_CASES)
+def test_pipeline_by_parts_with_histogram(image, gray, weights, steps):
+    # Части изображения обрабатываются с общей гистограммой и дают тот же результат, что и все изображение
+    pipeline = build_pipeline(gray, weights, steps)
+    parts = np.array_split(image, 3)
+    histogram = sum(pipeline.histogram(part) for part in parts)
+    out = None
+    results = []
+    for part in parts:
+        out = pipeline(part, out=out, histogram=histogram)
+        results.append(out.copy())
+    np.testing.assert_array_equal(np.concatenate(results), run_steps(image, steps, weights, gray))
+
+
+def test_pipeline_reuses_out():
+    image = make_image(seed=9)
+    pipeline = PointPipeline().gray().threshold(100).negative()
+    out = pipeline(image)
+    assert pipeline(image, out=out) is out
+
+
+def test_gray_only_first():
+    with pytest.raises(ValueError):
+        PointPipeline().negative().gray()
+    with pytest.raises(ValueError):
+        PointPipeline().then("unknown")
@@ -0,0 +1,35 @@
+"""
+Проверка движка блочной обработки lab2.realtime.
+"""
+import numpy as np
+import pytest
+
+from lab2.filters import DifferenceFilter, apply_difference_filter
+from lab2.realtime import BlockProcessor, RingBuffer, SyntheticSource
+
+
+def synthetic_source(block_size):
+    return SyntheticSource(8000, block_size, tones=((440.0, 0.5), (3000.0, 0.25)), channels=2, duration=1.0)
+
+
+@pytest.mark.parametrize("filter_type", [1, 7])
+def test_blocks_match_offline_filtering(filter_type):
+    processor = BlockProcessor(synthetic_source(256), DifferenceFilter(filter_type), block_size=256)
+    out = np.empty((256, 2), dtype=np.float32)
+    parts = []
+    report = processor.run(sink=lambda ring: parts.append(out[:ring.read(out)].copy()))
+
+    signal = np.empty((8000, 2), dtype=np.float32)
+    synthetic_source(8000).read(signal)
+    # Прогрев фильтра при создании движка не должен оставлять состояния
+    np.testing.assert_array_equal(np.concatenate(parts), apply_difference_filter(signal, filter_type))
+    assert report.blocks == 32 and report.overruns == 0
+
+
+def test_ring_buffer_overrun():
+    ring = RingBuffer(4)
+    ring.write(np.arange(6, dtype=np.float32).reshape(6, 1))
+    out = np.empty((4, 1), dtype=np.float32)
+    assert ring.read(out) == 4
+    assert ring.overruns == 2
+    np.testing.assert_array_equal(out[:, 0], [2, 3, 4, 5])
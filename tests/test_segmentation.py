@@ -0,0 +1,84 @@
+"""
+Проверка потоковой сегментации lab3.segmentation на синтетическом сигнале с тональными пачками.
+"""
+import numpy as np
+import pytest
+
+from lab3.segmentation import OnlineEnergySegmenter, segment_energy
+from lab3.synthetic import bursts_generator
+
+PARAMS = [
+    dict(window=256, high=2.0, low=1.5),
+    dict(window=512, high=2.0, low=1.5, alpha=0.01),
+    dict(window=256, high=2.0, low=1.5, min_duration=15000, min_gap=30000),
+]
+CHUNK_SIZES = [1, 100, 255, 256, 1000, 4097, None]
+
+
+@pytest.fixture(scope="module")
+def bursts():
+    generator = bursts_generator(duration=8.0, seed=3)
+    signal = np.concatenate(list(generator))
+    return signal, generator.ground_truth()
+
+
+@pytest.mark.parametrize("params", PARAMS)
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_boundaries_do_not_depend_on_chunking(bursts, params, chunk_size):
+    signal, _ = bursts
+    reference = segment_energy(signal, **params)
+    starts, ends = segment_energy(signal, chunk_size=chunk_size, **params)
+    np.testing.assert_array_equal(starts, reference[0])
+    np.testing.assert_array_equal(ends, reference[1])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 1000, 4097])
+def test_chunks_of_varying_length(bursts, chunk_size):
+    signal, _ = bursts
+    params = PARAMS[1]
+    segmenter = OnlineEnergySegmenter(**params)
+    rng = np.random.default_rng(chunk_size)
+    segments, position = [], 0
+    while position < len(signal):
+        size = int(rng.integers(1, 2 * chunk_size + 1))
+        segments.extend(segmenter.process(signal[position:position + size]))
+        position += size
+    segments.extend(segmenter.flush())
+    starts, ends = segment_energy(signal, **params)
+    assert segments == list(zip(starts.tolist(), ends.tolist()))
+
+
+@pytest.mark.parametrize("params", PARAMS[:2])
+def test_boundaries_match_ground_truth(bursts, params):
+    signal, (true_starts, true_ends) = bursts
+    starts, ends = segment_energy(signal, chunk_size=4097, **params)
+    assert len(starts) == len(true_starts)
+    # Границы определяются с точностью до кадра
+    assert np.max(np.abs(starts - true_starts)) < params["window"]
+    assert np.max(np.abs(ends - true_ends)) < params["window"]
+
+
+def merge_reference(starts, ends, min_duration, min_gap):
+    merged = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [segment for segment in merged if segment[1] - segment[0] >= min_duration]
+
+
+def test_min_duration_and_gap(bursts):
+    signal, (true_starts, true_ends) = bursts
+    params = PARAMS[2]
+    starts, ends = segment_energy(signal, **params)
+    expected = np.array(merge_reference(true_starts, true_ends, params["min_duration"], params["min_gap"]))
+    assert 0 < len(expected) < len(true_starts)
+    assert len(starts) == len(expected)
+    assert np.max(np.abs(starts - expected[:, 0])) < params["window"]
+    assert np.max(np.abs(ends - expected[:, 1])) < params["window"]
+
+
+def test_low_above_high_rejected():
+    with pytest.raises(ValueError):
+        OnlineEnergySegmenter(high=1.0, low=2.0)
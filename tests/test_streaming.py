@@ -0,0 +1,74 @@
+"""
+Проверка потоковой фильтрации WAV файлов lab2.streaming: результат должен совпадать
+с фильтрацией сигнала, загруженного целиком через load_wav.
+"""
+import numpy as np
+import pytest
+
+from common.wavio import WavWriter, load_wav, open_wav_memmap, to_pcm
+from lab2.filters import DifferenceFilter, SosFilter, apply_difference_filter, butter_sos, sos_filter
+from lab2.streaming import filter_wav_file
+
+SAMPLERATE = 8000
+FRAMES = 1999
+
+
+@pytest.fixture
+def int16_wav(tmp_path):
+    t = np.arange(FRAMES) / SAMPLERATE
+    noise = np.random.default_rng(0).normal(0, 0.1, (FRAMES, 2))
+    signal = np.stack([0.6 * np.sin(2 * np.pi * 440 * t), 0.3 * np.sin(2 * np.pi * 1300 * t)], axis=1) + noise
+    data = np.round(signal * 20000).astype(np.int16)
+    path = str(tmp_path / "source.wav")
+    with WavWriter(path, SAMPLERATE, channels=2, dtype=np.int16) as writer:
+        writer.write(data)
+    return path
+
+
+def read_result(path):
+    return load_wav(path, normalize=False)[1]
+
+
+# Размер 1, размеры, не делящие длину, и блок длиннее файла
+BLOCK_SIZES = [1, 7, 256, 1000, 4096]
+
+
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+@pytest.mark.parametrize("filter_type", [1, 4, 7, 10])
+def test_difference_filter_matches_whole_file(int16_wav, tmp_path, filter_type, block_size):
+    output = str(tmp_path / "out.wav")
+    filter_wav_file(int16_wav, output, DifferenceFilter(filter_type), block_size=block_size)
+    _, data = load_wav(int16_wav)
+    np.testing.assert_array_equal(read_result(output), apply_difference_filter(data, filter_type))
+
+
+@pytest.mark.parametrize("block_size", BLOCK_SIZES)
+def test_butterworth_matches_whole_file(int16_wav, tmp_path, block_size):
+    sos = butter_sos(1000.0, SAMPLERATE, "low")
+    output = str(tmp_path / "out.wav")
+    filter_wav_file(int16_wav, output, SosFilter(sos), block_size=block_size)
+    _, data = load_wav(int16_wav)
+    np.testing.assert_array_equal(read_result(output), sos_filter(data, sos))
+
+
+@pytest.mark.parametrize("block_size", [1, 300])
+def test_single_channel_matches_whole_file(int16_wav, tmp_path, block_size):
+    output = str(tmp_path / "out.wav")
+    filter_wav_file(int16_wav, output, DifferenceFilter(5), block_size=block_size, channel=1)
+    _, data = load_wav(int16_wav, channel=1)
+    np.testing.assert_array_equal(read_result(output), apply_difference_filter(data, 5))
+
+
+def test_source_format_output_keeps_amplitude(int16_wav, tmp_path):
+    # Так сохраняет результат SignalProcessorApp.process_to_file (лабораторная 2)
+    sos = butter_sos(1000.0, SAMPLERATE, "low")
+    output = str(tmp_path / "out.wav")
+    filter_wav_file(int16_wav, output, SosFilter(sos), block_size=300, normalize=False, dtype=None)
+
+    _, source = open_wav_memmap(int16_wav)
+    _, result = open_wav_memmap(output)
+    assert result.dtype == np.int16
+    _, scaled = load_wav(int16_wav, normalize=False, scale=True)
+    np.testing.assert_array_equal(result, to_pcm(sos_filter(scaled, sos), np.int16))
+    # Тон 440 Гц проходит фильтр, поэтому громкость первого канала сохраняется
+    assert 0.8 < np.max(np.abs(result[:, 0])) / np.max(np.abs(source[:, 0])) < 1.2
@@ -0,0 +1,93 @@
+"""
+Проверка обработки полосами lab6.tiled: результат должен совпадать с обработкой всего изображения целиком.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from common.tiffmap import create_tiff, open_raw, open_tiff
+from lab6.operations import NoiseSource, compile_chain, parse_operation, run_chain
+from lab6.tiled import open_source, process_tiled
+
+# Логарифм изображения с максимумом 255 переполняет uint8 так же, как исходная формула лабораторной 4
+pytestmark = pytest.mark.filterwarnings("ignore::RuntimeWarning")
+
+SEED = 5
+BAND_ROWS = [1, 7, 64, 333]
+CHAINS = [
+    ["gray", "noise:gaussian", "median:5", "equalize"],
+    ["noise:uniform,40", "low:5", "high:1", "negative"],
+    ["gray", "log", "noise:salt_pepper", "median:3", "high", "equalize", "log"],
+    ["median:7", "noise", "gray", "threshold:100", "low:3", "equalize", "power:0.5"],
+    ["noise", "noise:salt_pepper,0.1", "high:2", "tanh"],
+]
+
+
+def make_image(shape=(500, 41, 3)):
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 200, shape[0]).reshape(-1, 1, *([1] * (len(shape) - 2)))
+    return np.clip(gradient + rng.integers(0, 56, size=shape), 0, 255).astype(np.uint8)
+
+
+def untiled(image, chain):
+    return run_chain(compile_chain([parse_operation(text) for text in chain]), image, NoiseSource((SEED,)))
+
+
+def write_raw(path, image):
+    array = open_raw(path, image.shape, image.dtype, mode="w+")
+    array[...] = image
+    array.flush()
+
+
+def write_tiff(path, image):
+    # Цветной TIFF хранит каналы в порядке RGB
+    array = create_tiff(path, image.shape, image.dtype)
+    array[...] = image[..., ::-1] if image.ndim == 3 else image
+    array.flush()
+
+
+def run_tiled(tmp_path, image, chain, extension, band_rows=None, memory_budget=None):
+    source_path = os.path.join(tmp_path, "source" + extension)
+    output_path = os.path.join(tmp_path, "result" + extension)
+    if extension == ".tif":
+        write_tiff(source_path, image)
+        source = open_source(source_path)
+    else:
+        write_raw(source_path, image)
+        source = open_source(source_path, image.shape, image.dtype)
+    options = {} if memory_budget is None else {"memory_budget": memory_budget}
+    result = process_tiled(source, output_path, [parse_operation(text) for text in chain], SEED,
+                           band_rows=band_rows, **options)
+    shape, dtype = result.shape, result.dtype
+    del result
+    if extension == ".tif":
+        result = np.array(open_tiff(output_path))
+        return result[..., ::-1] if result.ndim == 3 else result
+    return np.array(open_raw(output_path, shape, dtype))
+
+
+@pytest.mark.parametrize("extension", [".raw", ".tif"])
+@pytest.mark.parametrize("band_rows", BAND_ROWS)
+@pytest.mark.parametrize("chain", CHAINS)
+def test_tiled_equals_untiled(tmp_path, extension, band_rows, chain):
+    image = make_image()
+    expected = untiled(image, chain)
+    result = run_tiled(tmp_path, image, chain, extension, band_rows)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("extension", [".raw", ".tif"])
+@pytest.mark.parametrize("band_rows", BAND_ROWS)
+def test_gray_source(tmp_path, extension, band_rows):
+    image = make_image((500, 41))
+    chain = ["noise:gaussian", "median:5", "equalize", "log"]
+    np.testing.assert_array_equal(run_tiled(tmp_path, image, chain, extension, band_rows), untiled(image, chain))
+
+
+def test_band_rows_from_memory_budget(tmp_path):
+    image = make_image()
+    chain = CHAINS[0]
+    result = run_tiled(tmp_path, image, chain, ".raw", memory_budget=(1 << 20) + 100000)
+    np.testing.assert_array_equal(result, untiled(image, chain))
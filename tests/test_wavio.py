@@ -0,0 +1,64 @@
+"""
+Проверка чтения WAV common.wavio.
+"""
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+from common.wavio import WavWriter, load_audio, load_wav, read_wav_info, scale_samples, to_pcm
+
+
+def write_wav(path, data, samplerate=8000):
+    with WavWriter(str(path), samplerate, channels=1 if data.ndim == 1 else data.shape[1], dtype=data.dtype) as writer:
+        writer.write(data)
+    return str(path)
+
+
+def test_load_audio_scales_uint8_around_zero(tmp_path):
+    path = write_wav(tmp_path / "u8.wav", np.array([0, 64, 128, 192, 255], dtype=np.uint8))
+    samplerate, signal = load_audio(path)
+    assert samplerate == 8000 and signal.dtype == np.float32
+    np.testing.assert_array_equal(signal, np.array([-128, -64, 0, 64, 127], dtype=np.float32) / 128)
+
+
+def test_load_audio_uses_full_scale_without_peak_normalization(tmp_path):
+    data = np.array([[-32768, 0], [1000, 16384], [0, -2000]], dtype=np.int16)
+    _, signal = load_audio(write_wav(tmp_path / "i16.wav", data))
+    np.testing.assert_allclose(signal, data.mean(axis=1) / 32768, rtol=1e-6)
+
+    _, stereo = load_audio(write_wav(tmp_path / "i16.wav", data), mix=False)
+    np.testing.assert_array_equal(stereo, data / np.float32(32768))
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, np.int32])
+def test_to_pcm_inverts_full_scale(dtype):
+    info = np.iinfo(dtype)
+    data = np.array([info.min, info.min + 1, 0, 1, info.max], dtype=dtype)
+    samples = scale_samples(data.astype(np.float64), dtype)
+    np.testing.assert_array_equal(to_pcm(samples, dtype), data)
+    np.testing.assert_array_equal(to_pcm(np.array([-2.0, 2.0]), dtype), [info.min, info.max])
+
+
+def test_load_wav_normalizes_by_peak(tmp_path):
+    _, signal = load_wav(write_wav(tmp_path / "i16.wav", np.array([0, 100, -400], dtype=np.int16)))
+    np.testing.assert_array_equal(signal, [0, 0.25, -1])
+
+
+def test_malformed_wav_without_librosa_raises_parse_error(tmp_path, monkeypatch):
+    path = tmp_path / "broken.wav"
+    path.write_bytes(b"RIFF\x00\x00\x00\x00WAVEjunk")
+    monkeypatch.setitem(sys.modules, "librosa", None)
+    with pytest.raises(ValueError):
+        load_audio(str(path))
+
+
+def test_truncated_extensible_fmt(tmp_path):
+    # WAVE_FORMAT_EXTENSIBLE с чанком fmt короче 26 байт (без кода подформата)
+    fmt = struct.pack("<HHIIHH", 0xFFFE, 1, 8000, 16000, 2, 16) + b"\x16\x00"
+    path = tmp_path / "extensible.wav"
+    path.write_bytes(b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt)) + b"WAVE" + b"fmt " + struct.pack("<I", len(fmt))
+                     + fmt)
+    with pytest.raises(ValueError):
+        read_wav_info(str(path))